@@ -5,12 +5,77 @@ Provides common functions for security, validation, and error handling
 
 import os
 import re
+import time
+import signal
+import json
+import asyncio
 import logging
-from typing import Any, Optional
-from datetime import datetime
+import sqlite3
+import hashlib
+import functools
+import threading
+import urllib.parse
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+from datetime import datetime, timezone
 
 logger = logging.getLogger(__name__)
 
+# Optional fast JSON backend
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# Character classes shared by the built-in validators
+_THEME_CHARS = r"a-zA-Z0-9\s\-_,."
+_OAUTH_CHARS = r"a-zA-Z0-9\-_"
+
+# Pre-compiled patterns for the built-in validators
+_THEME_RE = re.compile(f"^[{_THEME_CHARS}]+$")
+_OAUTH_RE = re.compile(f"^[{_OAUTH_CHARS}]+$")
+
+# Valid branch name in a single pass: 1-255 chars, no whitespace, control
+# characters or Git-forbidden characters, and no ".." sequence
+_BRANCH_RE = re.compile(r"^(?!.*\.\.)[^\s~^:?*\[\\\x00-\x1f]{1,255}$")
+
+# Accepted repository forms: https URL, owner/repo shorthand, or SSH
+_REPO_RE = re.compile(
+    r"^(?:https://github\.com/(?P<https>[^/\s]+/[^/\s]+?)(?:\.git)?/?"
+    r"|(?P<shorthand>[^/\s:@]+/[^/\s:@]+)"
+    r"|git@github\.com:(?P<ssh>[^/\s]+/[^/\s]+?)(?:\.git)?)$"
+)
+
+# Detail keys masked by safe_log_api_call
+_SENSITIVE_KEYS = frozenset({'api_key', 'token', 'secret', 'password'})
+
+# Highest code point matched by \s is U+3000, so tables built over this
+# range accept exactly what the equivalent regex accepts
+_TABLE_LIMIT = 0x3001
+
+
+def _build_delete_table(pattern: re.Pattern) -> dict:
+    """Build a str.translate table deleting every character the pattern accepts"""
+    return {c: None for c in range(_TABLE_LIMIT) if pattern.match(chr(c))}
+
+
+@functools.lru_cache(maxsize=64)
+def _compile_allowed(allowed_chars: str) -> re.Pattern:
+    """Compile (once) the anchored pattern for a caller-supplied character class"""
+    return re.compile(f"^[{allowed_chars}]+$")
+
+
+# Translation tables for fixed character classes: a value is valid when
+# translating it leaves nothing behind, which avoids the regex engine entirely
+_FAST_TABLES = {
+    _THEME_CHARS: _build_delete_table(_THEME_RE),
+    _OAUTH_CHARS: _build_delete_table(_OAUTH_RE),
+}
+
 
 class SecurityError(Exception):
     """Raised when security validation fails"""
@@ -22,6 +87,11 @@ class ValidationError(Exception):
     pass
 
 
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because its circuit breaker is open"""
+    pass
+
+
 def get_secure_api_key(key_name: str) -> str:
     """
     Retrieve API key from environment variables securely.
@@ -44,7 +114,8 @@ def get_secure_api_key(key_name: str) -> str:
 def validate_string_input(value: Any, field_name: str, 
                          min_length: int = 1, 
                          max_length: int = 1000,
-                         allowed_chars: Optional[str] = None) -> str:
+                         allowed_chars: Optional[str] = None,
+                         compiled_pattern: Optional[re.Pattern] = None) -> str:
     """
     Validate and sanitize string input.
     
@@ -54,6 +125,8 @@ def validate_string_input(value: Any, field_name: str,
         min_length: Minimum allowed length
         max_length: Maximum allowed length
         allowed_chars: Regex pattern for allowed characters (None = all allowed)
+        compiled_pattern: Pre-compiled anchored pattern the whole value must
+            match; takes precedence over allowed_chars
         
     Returns:
         Validated and stripped string
@@ -72,18 +145,29 @@ def validate_string_input(value: Any, field_name: str,
     if len(value) > max_length:
         raise ValidationError(f"{field_name} must not exceed {max_length} characters")
     
-    if allowed_chars and not re.match(f"^[{allowed_chars}]+$", value):
+    if compiled_pattern is not None:
+        if not compiled_pattern.match(value):
+            raise ValidationError(f"{field_name} contains invalid characters")
+    elif allowed_chars in _FAST_TABLES:
+        if value.translate(_FAST_TABLES[allowed_chars]):
+            raise ValidationError(f"{field_name} contains invalid characters")
+    elif allowed_chars and not _compile_allowed(allowed_chars).match(value):
         raise ValidationError(f"{field_name} contains invalid characters")
     
     return value
 
 
-def validate_theme(theme: str) -> str:
+def validate_theme(theme: str, field_name: str = "theme") -> str:
     """
     Validate theme/topic parameter.
     
+    Results are memoized in a bounded LRU cache, since themes, genres and
+    moods are drawn from a small set of repeated values. Failed validations
+    are never cached.
+    
     Args:
         theme: Theme or topic string
+        field_name: Name of the field for error messages
         
     Returns:
         Validated theme string
@@ -91,17 +175,26 @@ def validate_theme(theme: str) -> str:
     Raises:
         ValidationError: If validation fails
     """
+    if not isinstance(theme, str):
+        raise ValidationError(f"{field_name} must be a string, got {type(theme).__name__}")
+    return _validate_theme_cached(theme, field_name)
+
+
+@functools.lru_cache(maxsize=256)
+def _validate_theme_cached(theme: str, field_name: str) -> str:
+    """Memoized body of validate_theme (inputs must be hashable strings)"""
     return validate_string_input(
         theme,
-        "theme",
+        field_name,
         min_length=3,
         max_length=500,
-        allowed_chars=r"a-zA-Z0-9\s\-_,."
+        allowed_chars=_THEME_CHARS
     )
 
 
 def safe_log_api_call(api_name: str, operation: str, 
-                     status: str, details: dict = None) -> None:
+                     status: str, details: dict = None,
+                     level: Optional[int] = None) -> None:
     """
     Log API calls safely without exposing sensitive data.
     
@@ -110,27 +203,630 @@ def safe_log_api_call(api_name: str, operation: str,
         operation: Operation being performed
         status: Status of the operation (success/error/timeout)
         details: Additional details (sensitive values will be masked)
+        level: Logging level; defaults to ERROR for errors, else INFO
     """
-    safe_details = details.copy() if details else {}
+    if level is None:
+        level = logging.ERROR if status == 'error' else logging.INFO
+    if not logger.isEnabledFor(level):
+        return
+    
+    safe_details = dict(details) if details else {}
     # Mask any keys that contain sensitive info
-    sensitive_keys = ['api_key', 'token', 'secret', 'password']
-    for key in sensitive_keys:
-        if key in safe_details:
-            safe_details[key] = '***REDACTED***'
+    for key in safe_details.keys() & _SENSITIVE_KEYS:
+        safe_details[key] = '***REDACTED***'
     
-    log_msg = f"API: {api_name} | Operation: {operation} | Status: {status}"
+    # Formatting is left to the handler so the message is built only when emitted
     if safe_details:
-        log_msg += f" | Details: {safe_details}"
-    
-    if status == 'error':
-        logger.error(log_msg)
+        logger.log(level, "API: %s | Operation: %s | Status: %s | Details: %s",
+                   api_name, operation, status, safe_details)
     else:
-        logger.info(log_msg)
+        logger.log(level, "API: %s | Operation: %s | Status: %s",
+                   api_name, operation, status)
 
 
 def get_timestamp() -> str:
-    """Get current timestamp in ISO format"""
-    return datetime.utcnow().isoformat() + "Z"
+    """Get current UTC timestamp in ISO format (millisecond precision)"""
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds')[:-6] + "Z"
+
+
+def register_reload_handler(callback) -> bool:
+    """
+    Call callback when the process receives SIGHUP.
+    
+    Any previously installed Python-level handler is still invoked after
+    callback, but the default action (terminating the process) is replaced,
+    so only the host application should call this. Registration is skipped on platforms without SIGHUP and
+    outside the main thread, where signal handlers cannot be installed.
+    
+    Args:
+        callback: Function taking no arguments (e.g. to clear a cached instance)
+        
+    Returns:
+        True if the handler was installed
+    """
+    if not hasattr(signal, 'SIGHUP'):
+        return False
+    
+    try:
+        previous = signal.getsignal(signal.SIGHUP)
+        
+        def handler(signum, frame):
+            callback()
+            if callable(previous):
+                previous(signum, frame)
+        
+        signal.signal(signal.SIGHUP, handler)
+        return True
+    except ValueError:
+        # Not running in the main thread
+        return False
+
+
+def run_coroutine_sync(coro) -> Any:
+    """
+    Run a coroutine to completion from synchronous code.
+    
+    asyncio.run cannot be called while an event loop is running in the
+    current thread (e.g. when a synchronous skill entry point is called
+    from async host code), so in that case the coroutine gets its own loop
+    on a worker thread. The caller is blocked until it finishes either way.
+    
+    Args:
+        coro: Coroutine to run
+        
+    Returns:
+        The coroutine's result
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+# ============================================================================
+# HTTP UTILITIES
+# ============================================================================
+
+def json_loads(data: Union[bytes, str]) -> Any:
+    """
+    Parse a JSON document, using orjson when it is installed.
+    
+    Args:
+        data: JSON document as bytes or str (e.g. response.content)
+        
+    Returns:
+        Parsed Python object
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj: Any) -> bytes:
+    """
+    Serialize an object to compact UTF-8 encoded JSON, using orjson when installed.
+    
+    Args:
+        obj: JSON-serializable object
+        
+    Returns:
+        JSON document as bytes, ready to send as a request body
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def json_dumps_pretty(obj: Any) -> str:
+    """
+    Serialize an object to human-readable JSON indented by two spaces,
+    using orjson when installed.
+    
+    Args:
+        obj: JSON-serializable object
+        
+    Returns:
+        JSON document as a string
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode('utf-8')
+    return json.dumps(obj, indent=2)
+
+
+def build_http_session(headers: Optional[dict] = None,
+                       pool_connections: int = 4,
+                       pool_maxsize: int = 8,
+                       retries: int = 3,
+                       backoff_factor: float = 0.5,
+                       status_forcelist: tuple = (502, 503, 504),
+                       allowed_methods: Optional[tuple] = None):
+    """
+    Create a requests.Session with a pooled, retrying HTTP adapter.
+    
+    Reusing one session keeps connections alive between calls, so repeated
+    requests to the same host skip the TCP and TLS handshakes.
+    
+    Args:
+        headers: Default headers sent with every request (optional)
+        pool_connections: Number of per-host connection pools to cache
+        pool_maxsize: Maximum connections kept alive per host
+        retries: Total retries for connection errors and retryable statuses
+        backoff_factor: Backoff factor between retries
+        status_forcelist: HTTP status codes that trigger a retry
+        allowed_methods: HTTP methods eligible for retry (None = urllib3 default)
+        
+    Returns:
+        Configured requests.Session
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    
+    retry_kwargs = {
+        'total': retries,
+        'backoff_factor': backoff_factor,
+        'status_forcelist': status_forcelist
+    }
+    if allowed_methods is not None:
+        retry_kwargs['allowed_methods'] = allowed_methods
+    
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=Retry(**retry_kwargs)
+    )
+    
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def prewarm_connection(session, url: str) -> None:
+    """
+    Open a keep-alive connection to url in the background.
+    
+    DNS resolution and the TCP/TLS handshake happen off the caller's thread,
+    so the first real request reuses a warm connection. Does nothing when
+    MUSIC_PREWARM=0.
+    
+    Args:
+        session: requests.Session or httpx.Client to warm up
+        url: Any URL on the API host; a HEAD request is sent to it
+    """
+    if os.getenv("MUSIC_PREWARM", "1") == "0":
+        return
+    
+    def warm():
+        try:
+            session.head(url, timeout=5)
+        except Exception as e:
+            logger.debug("Connection pre-warm failed: %s", e)
+    
+    threading.Thread(target=warm, daemon=True).start()
+
+
+def get_retry_after(response) -> Optional[float]:
+    """
+    Read the Retry-After header of an HTTP response.
+    
+    Args:
+        response: HTTP response exposing a headers mapping
+        
+    Returns:
+        Delay in seconds, or None if the header is missing or malformed
+    """
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    
+    # Retry-After may also be an HTTP date
+    try:
+        from email.utils import parsedate_to_datetime
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def get_rate_limit_delay(response) -> Optional[float]:
+    """
+    Read how long to wait before the next request from rate limit headers.
+    
+    Retry-After takes precedence. Otherwise, when X-RateLimit-Remaining
+    reports an exhausted quota, the delay until X-RateLimit-Reset is
+    returned. The reset value may be given in seconds or as a Unix time.
+    
+    Args:
+        response: HTTP response exposing a headers mapping
+        
+    Returns:
+        Delay in seconds, or None if the response carries no usable hint
+    """
+    retry_after = get_retry_after(response)
+    if retry_after is not None:
+        return retry_after
+    
+    if response.headers.get('X-RateLimit-Remaining') != '0':
+        return None
+    
+    try:
+        reset = float(response.headers.get('X-RateLimit-Reset', ''))
+    except ValueError:
+        return None
+    
+    # Values this large are epoch timestamps rather than relative delays
+    if reset > 1_000_000_000:
+        reset -= time.time()
+    return max(0.0, reset)
+
+
+def backoff_delay(base: float, attempt: int,
+                  factor: float = 1.5,
+                  max_delay: float = 15.0,
+                  max_exponent: int = 8) -> float:
+    """
+    Compute an exponential backoff delay for polling loops.
+    
+    Args:
+        base: Delay for the first attempt in seconds
+        attempt: Zero-based attempt number
+        factor: Growth factor applied per attempt
+        max_delay: Upper bound for the returned delay
+        max_exponent: Attempt count after which the delay stops growing
+        
+    Returns:
+        Delay in seconds
+    """
+    return min(base * (factor ** min(attempt, max_exponent)), max_delay)
+
+
+class CircuitBreaker:
+    """
+    Fail fast while an upstream service keeps failing.
+    
+    After fail_max consecutive failures the breaker opens and calls are
+    rejected with CircuitOpenError without touching the network. Once
+    reset_timeout seconds have passed a single trial call is let through
+    (half-open): success closes the breaker, failure opens it again.
+    
+    Use call() to wrap a function whose exceptions signal failure, or
+    before_call() with record_success()/record_failure() when failure is
+    reported some other way, e.g. through an error result.
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, name: str, fail_max: int = 5, reset_timeout: float = 30.0,
+                 failure_types: Tuple[type, ...] = (Exception,)):
+        """
+        Args:
+            name: Service name used in log and error messages
+            fail_max: Consecutive failures that open the breaker
+            reset_timeout: Seconds the breaker stays open before a trial call
+            failure_types: Exceptions raised through call() that count as
+                failures; any other exception counts as a success
+        """
+        self.name = name
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self.failure_types = failure_types
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_progress = False
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        """Current state: CLOSED, OPEN or HALF_OPEN"""
+        with self._lock:
+            if self._opened_at is None:
+                return self.CLOSED
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self.OPEN
+    
+    def before_call(self) -> None:
+        """
+        Check that a call may proceed.
+        
+        Raises:
+            CircuitOpenError: If the breaker is open, or half-open with the
+                trial call already in progress
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if (time.monotonic() - self._opened_at >= self.reset_timeout
+                    and not self._trial_in_progress):
+                self._trial_in_progress = True
+                return
+        raise CircuitOpenError(f"{self.name} is unavailable; calls are suspended after repeated failures")
+    
+    def record_success(self) -> None:
+        """Record a successful call, closing the breaker"""
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("Circuit for %s closed", self.name)
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_progress = False
+    
+    def record_failure(self) -> None:
+        """Record a failed call, opening the breaker once fail_max is reached"""
+        with self._lock:
+            self._failures += 1
+            self._trial_in_progress = False
+            if self._opened_at is not None or self._failures >= self.fail_max:
+                if self._opened_at is None:
+                    logger.warning("Circuit for %s opened after %d consecutive failures",
+                                   self.name, self._failures)
+                self._opened_at = time.monotonic()
+    
+    def call(self, func, *args, **kwargs):
+        """
+        Invoke func through the breaker.
+        
+        Returns:
+            Whatever func returns
+            
+        Raises:
+            CircuitOpenError: If the breaker rejects the call
+        """
+        self.before_call()
+        try:
+            result = func(*args, **kwargs)
+        except self.failure_types:
+            self.record_failure()
+            raise
+        except Exception:
+            # The service answered; this error does not indicate an outage
+            self.record_success()
+            raise
+        except BaseException:
+            with self._lock:
+                self._trial_in_progress = False
+            raise
+        self.record_success()
+        return result
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting how often an upstream API is called.
+    
+    Up to max_rate calls may be made in a burst; after that, tokens are
+    refilled at max_rate per time_period seconds. acquire() reserves a token
+    and sleeps until it is due, so waiting callers are served in order.
+    """
+    
+    def __init__(self, max_rate: float, time_period: float = 60.0):
+        if max_rate <= 0 or time_period <= 0:
+            raise ValueError("max_rate and time_period must be positive")
+        self.capacity = float(max_rate)
+        self.fill_rate = max_rate / time_period
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> float:
+        """
+        Take one token, blocking until it is available.
+        
+        Returns:
+            Seconds spent waiting
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity,
+                               self._tokens + (now - self._updated) * self.fill_rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.fill_rate if self._tokens < 0 else 0.0
+        
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class RequestLimiter:
+    """
+    Keep the requests made to an upstream API within its limits.
+    
+    At most max_concurrent calls run at once, and every call first takes a
+    token from bucket. The token is taken before a slot, so a caller
+    sleeping on the rate limit does not keep a slot from others. Several
+    limiters may share one bucket to give some requests their own slots
+    under a common rate limit.
+    """
+    
+    def __init__(self, name: str, max_concurrent: int, bucket: TokenBucket):
+        """
+        Args:
+            name: Service name used in log messages
+            max_concurrent: Calls allowed in flight at once
+            bucket: Rate limit shared by the calls
+        """
+        self.name = name
+        self.bucket = bucket
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+    
+    def call(self, func, *args, **kwargs):
+        """
+        Invoke func once a rate limit token and a slot are available.
+        
+        Returns:
+            Whatever func returns
+        """
+        waited = self.bucket.acquire()
+        if waited:
+            logger.debug("Waited %.2fs for the %s rate limit", waited, self.name)
+        with self._slots:
+            return func(*args, **kwargs)
+
+
+class SingleFlight:
+    """
+    Let concurrent identical requests share one running job.
+    
+    The first caller to claim a key runs the job and publishes its outcome
+    on the returned Future; callers arriving while it runs get the same
+    Future and wait on it instead of starting a job of their own.
+    """
+    
+    def __init__(self):
+        self._jobs: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+    
+    def claim(self, key: str, shared: bool = True) -> Tuple[Future, bool]:
+        """
+        Register a job for key, or join the one already running.
+        
+        With shared=False the caller always runs its own job, which is not
+        visible to identical requests.
+        
+        Returns:
+            Tuple of (future of the job, whether the caller must run it)
+        """
+        if not shared:
+            return Future(), True
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None:
+                return job, False
+            job = Future()
+            self._jobs[key] = job
+            return job, True
+    
+    def release(self, key: str, job: Future) -> None:
+        """Unregister a finished job, unblocking waiters if it was interrupted."""
+        with self._lock:
+            if self._jobs.get(key) is job:
+                del self._jobs[key]
+        if not job.done():
+            job.cancel()
+
+
+# ============================================================================
+# MUSIC CACHE
+# ============================================================================
+
+class MusicCache:
+    """
+    Persistent cache mapping generation parameters to downloaded audio files.
+    
+    The index lives in a SQLite database so it survives restarts and can be
+    shared by several processes; recently used entries are also kept in an
+    in-memory LRU. Entries expire after ttl_seconds, and entries whose audio
+    file has been deleted are dropped on lookup.
+    """
+    
+    DEFAULT_FILENAME = "music_cache.sqlite3"
+    
+    def __init__(self, db_path: Union[str, Path], ttl_seconds: int = 86400,
+                 max_memory_entries: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[str, Tuple[Path, Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), timeout=5.0, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, path TEXT, created REAL, size INT, metadata TEXT)"
+            )
+    
+    @staticmethod
+    def make_key(**params: Any) -> str:
+        """Build a stable cache key from the request parameters"""
+        blob = json.dumps(params, sort_keys=True)
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+    
+    def get(self, key: str) -> Optional[Tuple[Path, Dict[str, Any]]]:
+        """
+        Look up a cached generation.
+        
+        Args:
+            key: Key built with make_key
+            
+        Returns:
+            Tuple of (audio file path, stored metadata), or None on a miss
+        """
+        with self._lock:
+            try:
+                entry = self._memory.get(key)
+                if entry is None:
+                    row = self._conn.execute(
+                        "SELECT path, created, metadata FROM cache WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None:
+                        entry = (Path(row[0]), json_loads(row[2]), row[1])
+                
+                if entry is None:
+                    return None
+                
+                path, metadata, created = entry
+                if created + self.ttl_seconds < time.time() or not path.exists():
+                    self._memory.pop(key, None)
+                    with self._conn:
+                        self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    return None
+                
+            except sqlite3.Error as e:
+                logger.warning(f"Music cache lookup failed: {e}")
+                return None
+            
+            self._remember(key, entry)
+            return path, metadata
+    
+    def put(self, key: str, path: Union[str, Path], metadata: Dict[str, Any]) -> None:
+        """
+        Store a generated audio file under key.
+        
+        Args:
+            key: Key built with make_key
+            path: Path of the downloaded audio file
+            metadata: JSON-serializable data returned alongside the path on a hit
+        """
+        path = Path(path)
+        created = time.time()
+        size = path.stat().st_size if path.exists() else 0
+        
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO cache (key, path, created, size, metadata) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (key, str(path), created, size, json_dumps(metadata).decode('utf-8'))
+                    )
+            except sqlite3.Error as e:
+                logger.warning(f"Music cache store failed: {e}")
+            self._remember(key, (path, metadata, created))
+    
+    def close(self) -> None:
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
+    
+    def _remember(self, key: str, entry: Tuple[Path, Dict[str, Any], float]) -> None:
+        """Add entry to the in-memory LRU. Caller must hold the lock."""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
 
 
 # ============================================================================
@@ -153,27 +849,15 @@ def validate_repository_url(url: str) -> str:
     if not isinstance(url, str):
         raise ValidationError("Repository URL must be a string")
     
-    url = url.strip()
-    
-    # Accept owner/repo format
-    if '/' in url and not url.startswith('http'):
-        return f"https://github.com/{url}.git"
+    match = _REPO_RE.match(url.strip())
+    if not match:
+        raise ValidationError(
+            f"Invalid repository URL: {url.strip()}. "
+            "Use: https://github.com/owner/repo, owner/repo, or git@github.com:owner/repo"
+        )
     
-    # Accept full GitHub URLs
-    if url.startswith('https://github.com/'):
-        if not url.endswith('.git'):
-            url = url.rstrip('/') + '.git'
-        return url
-    
-    # Accept git protocol (convert to https)
-    if url.startswith('git@github.com:'):
-        repo = url.replace('git@github.com:', '').replace('.git', '')
-        return f"https://github.com/{repo}.git"
-    
-    raise ValidationError(
-        f"Invalid repository URL: {url}. "
-        "Use: https://github.com/owner/repo, owner/repo, or git@github.com:owner/repo"
-    )
+    path = match["https"] or match["shorthand"] or match["ssh"]
+    return f"https://github.com/{path}.git"
 
 
 def validate_branch_name(branch: str) -> str:
@@ -189,15 +873,12 @@ def validate_branch_name(branch: str) -> str:
     Raises:
         ValidationError: If branch name is invalid
     """
-    branch = validate_string_input(branch, "branch", min_length=1, max_length=255)
+    if not isinstance(branch, str):
+        raise ValidationError(f"branch must be a string, got {type(branch).__name__}")
     
-    # Git branch name validation
-    invalid_chars = ['..', '~', '^', ':', '?', '*', '[', '\\']
-    for char_seq in invalid_chars:
-        if char_seq in branch:
-            raise ValidationError(
-                f"Branch name contains invalid character sequence: {char_seq}"
-            )
+    branch = branch.strip()
+    if not _BRANCH_RE.match(branch):
+        raise ValidationError(f"Invalid branch name: {branch!r}")
     
     return branch
 
@@ -206,6 +887,10 @@ def validate_file_path(path: str, base_dir: str = None) -> str:
     """
     Validate file path to prevent directory traversal attacks.
     
+    Results are memoized in a bounded LRU cache when base_dir is absent or
+    absolute; relative bases depend on the current directory and are always
+    re-checked. Failed validations are never cached.
+    
     Args:
         path: File path to validate
         base_dir: Base directory to validate against (optional)
@@ -216,6 +901,22 @@ def validate_file_path(path: str, base_dir: str = None) -> str:
     Raises:
         ValidationError: If path is invalid or attempts traversal
     """
+    if not isinstance(path, str):
+        raise ValidationError(f"file_path must be a string, got {type(path).__name__}")
+    
+    if base_dir and not os.path.isabs(base_dir):
+        return _check_file_path(path, base_dir)
+    return _validate_file_path_cached(path, base_dir)
+
+
+@functools.lru_cache(maxsize=1024)
+def _validate_file_path_cached(path: str, base_dir: Optional[str]) -> str:
+    """Memoized body of validate_file_path (base_dir must be None or absolute)"""
+    return _check_file_path(path, base_dir)
+
+
+def _check_file_path(path: str, base_dir: Optional[str]) -> str:
+    """Uncached body of validate_file_path"""
     path = validate_string_input(path, "file_path", min_length=1, max_length=1000)
     
     # Prevent absolute paths
@@ -224,15 +925,15 @@ def validate_file_path(path: str, base_dir: str = None) -> str:
     
     # Prevent directory traversal
     normalized = os.path.normpath(path)
-    if normalized.startswith('..'):
+    if normalized == '..' or normalized.startswith('..' + os.sep):
         raise ValidationError("Directory traversal not allowed (..) in path")
     
     # Validate against base directory if provided
     if base_dir:
-        full_path = os.path.normpath(os.path.join(base_dir, path))
-        base_normalized = os.path.normpath(os.path.abspath(base_dir))
+        base_normalized = os.path.abspath(base_dir)
+        full_path = os.path.join(base_normalized, normalized)
         
-        if not full_path.startswith(base_normalized):
+        if os.path.commonpath([full_path, base_normalized]) != base_normalized:
             raise ValidationError(
                 f"Path {path} escapes base directory {base_dir}"
             )
@@ -262,6 +963,17 @@ class GoogleOAuthConfig:
             ]
             self.auth_uri = 'https://accounts.google.com/o/oauth2/v2/auth'
             self.token_uri = 'https://oauth2.googleapis.com/token'
+            
+            # Everything but the state token is static, so encode it once
+            static_params = urllib.parse.urlencode({
+                'client_id': self.client_id,
+                'redirect_uri': self.redirect_uri,
+                'response_type': 'code',
+                'scope': ' '.join(self.scopes),
+                'access_type': 'offline',
+                'prompt': 'consent'
+            })
+            self._auth_url_prefix = f"{self.auth_uri}?{static_params}"
         except SecurityError as e:
             logger.warning(f"Google OAuth not configured: {e}")
             self.client_id = None
@@ -287,22 +999,10 @@ class GoogleOAuthConfig:
         if not self.is_configured():
             raise SecurityError("Google OAuth is not configured")
         
-        import urllib.parse
-        
-        params = {
-            'client_id': self.client_id,
-            'redirect_uri': self.redirect_uri,
-            'response_type': 'code',
-            'scope': ' '.join(self.scopes),
-            'access_type': 'offline',
-            'prompt': 'consent'
-        }
-        
-        if state:
-            params['state'] = state
+        if not state:
+            return self._auth_url_prefix
         
-        query_string = urllib.parse.urlencode(params)
-        return f"{self.auth_uri}?{query_string}"
+        return f"{self._auth_url_prefix}&{urllib.parse.urlencode({'state': state})}"
 
 
 def validate_oauth_code(code: str) -> str:
@@ -323,7 +1023,7 @@ def validate_oauth_code(code: str) -> str:
         "oauth_code",
         min_length=10,
         max_length=500,
-        allowed_chars=r"a-zA-Z0-9\-_"
+        allowed_chars=_OAUTH_CHARS
     )
     return code
 
@@ -346,6 +1046,6 @@ def validate_oauth_state(state: str) -> str:
         "oauth_state",
         min_length=20,
         max_length=500,
-        allowed_chars=r"a-zA-Z0-9\-_"
+        allowed_chars=_OAUTH_CHARS
     )
     return state
@@ -10,11 +10,13 @@ Rate Limits: Check AIVA documentation for current limits
 """
 
 import os
+import re
 import json
 import time
+import asyncio
 import logging
 import requests
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from datetime import datetime
 from pathlib import Path
 
@@ -27,15 +29,35 @@ logger = logging.getLogger(__name__)
 
 # Add parent directory to path for shared utilities
 import sys
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+_REPO_ROOT = str(Path(__file__).parent.parent.parent)
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
 
 from shared.utils import (
     validate_string_input,
     get_secure_api_key,
     safe_log_api_call,
-    validate_theme
+    validate_theme,
+    build_http_session,
+    get_retry_after,
+    backoff_delay,
+    json_loads,
+    json_dumps
 )
 
+# Fields worth a full JSON parse of a status body; anything else is
+# still processing with no timing hint
+_STATUS_MARKERS_RE = re.compile(rb'"(?:completed|done|failed|error|eta_seconds)"', re.IGNORECASE)
+
+
+def _first_present(data: Dict[str, Any], *keys: str, default: Any = None) -> Any:
+    """Return the first truthy value among keys, checked in order."""
+    for key in keys:
+        value = data.get(key)
+        if value:
+            return value
+    return default
+
 
 class AIVAMusicGenerator:
     """
@@ -48,6 +70,8 @@ class AIVAMusicGenerator:
     """
     
     BASE_URL = "https://api.aiva.ai/v1"
+    DOWNLOAD_CHUNK_SIZE = 64 * 1024
+    MAX_POLL_INTERVAL = 15
     
     def __init__(self):
         """Initialize the AIVA Music Generator skill."""
@@ -57,6 +81,9 @@ class AIVAMusicGenerator:
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         })
+        # Separate pool for audio downloads so the API key is never sent
+        # to the CDN hosting the generated files
+        self._download_session = build_http_session(pool_connections=4, pool_maxsize=8)
         self.output_dir = Path(os.getenv("MUSIC_OUTPUT_DIR", "./generated_music"))
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
@@ -94,16 +121,7 @@ class AIVAMusicGenerator:
             - metadata: Additional information about the composition
         """
         
-        # Validate inputs
-        validate_string_input(prompt, "prompt", min_length=10, max_length=500)
-        validate_theme(genre, "genre")
-        validate_theme(mood, "mood")
-        
-        if not 15 <= duration <= 120:
-            raise ValueError("Duration must be between 15 and 120 seconds")
-        if not 40 <= tempo <= 240:
-            raise ValueError("Tempo must be between 40 and 240 BPM")
-            
+        self._validate_request(prompt, duration, genre, mood, tempo)
         logger.info(f"Starting AIVA music generation with prompt: {prompt[:100]}...")
         
         try:
@@ -137,41 +155,162 @@ class AIVAMusicGenerator:
                 composition_id=composition_id
             )
             
-            result = {
-                "composition_id": composition_id,
-                "generation_id": generation_id,
-                "audio_url": audio_url,
-                "status": "completed",
-                "duration": duration,
-                "genre": genre,
-                "mood": mood,
-                "file_path": str(file_path),
-                "timestamp": datetime.now().isoformat(),
-                "metadata": {
-                    "prompt": prompt,
-                    "tempo": tempo,
-                    "key": key,
-                    "model": "AIVA",
-                    "file_size": file_path.stat().st_size if file_path.exists() else 0
-                }
-            }
+            return self._build_result(
+                composition_id=composition_id,
+                generation_id=generation_id,
+                audio_url=audio_url,
+                file_path=file_path,
+                prompt=prompt,
+                duration=duration,
+                genre=genre,
+                mood=mood,
+                tempo=tempo,
+                key=key
+            )
+            
+        except Exception as e:
+            self._log_failure(e, prompt)
+            raise
+    
+    async def agenerate_music(
+        self,
+        prompt: str,
+        duration: int = 30,
+        genre: str = "ambient",
+        mood: str = "calm",
+        tempo: int = 90,
+        key: str = "C major",
+        polling_interval: int = 2,
+        max_wait_time: int = 300
+    ) -> Dict[str, Any]:
+        """
+        Async variant of generate_music.
+        
+        Each HTTP call runs in a worker thread, while the waits between
+        status polls are awaited on the event loop. Many compositions can
+        therefore be in flight at once without a thread blocked per job.
+        
+        Args and return value are the same as for generate_music.
+        """
+        
+        self._validate_request(prompt, duration, genre, mood, tempo)
+        logger.info(f"Starting async AIVA music generation with prompt: {prompt[:100]}...")
+        
+        try:
+            composition_id = await asyncio.to_thread(
+                self._create_composition,
+                prompt=prompt,
+                duration=duration,
+                genre=genre,
+                mood=mood,
+                tempo=tempo,
+                key=key
+            )
+            logger.info(f"Composition created with ID: {composition_id}")
             
-            safe_log_api_call("AIVA", "generate_music", "success", {
-                "composition_id": composition_id,
-                "duration": duration,
-                "genre": genre
-            })
+            generation_id = await asyncio.to_thread(self._trigger_generation, composition_id)
+            logger.info(f"Generation triggered with ID: {generation_id}")
+            
+            audio_url = await self._apoll_for_completion(
+                generation_id=generation_id,
+                composition_id=composition_id,
+                polling_interval=polling_interval,
+                max_wait_time=max_wait_time
+            )
+            
+            file_path = await asyncio.to_thread(
+                self._download_audio,
+                audio_url=audio_url,
+                composition_id=composition_id
+            )
             
-            return result
+            return self._build_result(
+                composition_id=composition_id,
+                generation_id=generation_id,
+                audio_url=audio_url,
+                file_path=file_path,
+                prompt=prompt,
+                duration=duration,
+                genre=genre,
+                mood=mood,
+                tempo=tempo,
+                key=key
+            )
             
         except Exception as e:
-            logger.error(f"AIVA music generation failed: {str(e)}", exc_info=True)
-            safe_log_api_call("AIVA", "generate_music", "error", {
-                "error": str(e),
-                "prompt": prompt[:50]
-            })
+            self._log_failure(e, prompt)
             raise
     
+    def _validate_request(
+        self,
+        prompt: str,
+        duration: int,
+        genre: str,
+        mood: str,
+        tempo: int
+    ) -> None:
+        """Validate generation parameters."""
+        
+        validate_string_input(prompt, "prompt", min_length=10, max_length=500)
+        validate_theme(genre, "genre")
+        validate_theme(mood, "mood")
+        
+        if not 15 <= duration <= 120:
+            raise ValueError("Duration must be between 15 and 120 seconds")
+        if not 40 <= tempo <= 240:
+            raise ValueError("Tempo must be between 40 and 240 BPM")
+    
+    def _build_result(
+        self,
+        composition_id: str,
+        generation_id: str,
+        audio_url: str,
+        file_path: Path,
+        prompt: str,
+        duration: int,
+        genre: str,
+        mood: str,
+        tempo: int,
+        key: str
+    ) -> Dict[str, Any]:
+        """Assemble the generation result and log the successful call."""
+        
+        result = {
+            "composition_id": composition_id,
+            "generation_id": generation_id,
+            "audio_url": audio_url,
+            "status": "completed",
+            "duration": duration,
+            "genre": genre,
+            "mood": mood,
+            "file_path": str(file_path),
+            "timestamp": datetime.now().isoformat(),
+            "metadata": {
+                "prompt": prompt,
+                "tempo": tempo,
+                "key": key,
+                "model": "AIVA",
+                "file_size": file_path.stat().st_size if file_path.exists() else 0
+            }
+        }
+        
+        safe_log_api_call("AIVA", "generate_music", "success", {
+            "composition_id": composition_id,
+            "duration": duration,
+            "genre": genre
+        })
+        
+        return result
+    
+    def _log_failure(self, error: Exception, prompt: str) -> None:
+        """Log a failed generation."""
+        
+        logger.error(f"AIVA music generation failed: {str(error)}", exc_info=True)
+        safe_log_api_call("AIVA", "generate_music", "error", {
+            "error": str(error),
+            "prompt": prompt[:50]
+        })
+    
     def _create_composition(
         self,
         prompt: str,
@@ -196,13 +335,13 @@ class AIVAMusicGenerator:
         try:
             response = self.session.post(
                 f"{self.BASE_URL}/compositions",
-                json=payload,
+                data=json_dumps(payload),
                 timeout=30
             )
             response.raise_for_status()
             
-            data = response.json()
-            return data.get("id") or data.get("composition_id")
+            data = json_loads(response.content)
+            return _first_present(data, "id", "composition_id")
             
         except requests.RequestException as e:
             logger.error(f"Failed to create composition: {str(e)}")
@@ -214,18 +353,96 @@ class AIVAMusicGenerator:
         try:
             response = self.session.post(
                 f"{self.BASE_URL}/compositions/{composition_id}/generate",
-                json={"quality": "high"},
+                data=json_dumps({"quality": "high"}),
                 timeout=30
             )
             response.raise_for_status()
             
-            data = response.json()
-            return data.get("id") or data.get("generation_id")
+            data = json_loads(response.content)
+            return _first_present(data, "id", "generation_id")
             
         except requests.RequestException as e:
             logger.error(f"Failed to trigger generation: {str(e)}")
             raise
     
+    def _check_generation_status(
+        self,
+        generation_id: str,
+        poll_count: int
+    ) -> Tuple[bool, Optional[str], Optional[float]]:
+        """
+        Issue a single status request for a generation.
+        
+        Returns:
+            Tuple of (done, audio_url, hinted_delay). hinted_delay comes from
+            a Retry-After header or an eta_seconds field, if present.
+            
+        Raises:
+            RuntimeError: If AIVA reports the generation as failed
+        """
+        
+        hinted_delay = None
+        
+        try:
+            response = self.session.get(
+                f"{self.BASE_URL}/generations/{generation_id}/status",
+                timeout=30
+            )
+            hinted_delay = get_retry_after(response)
+            # Any 2xx body is parsed like a 200; an empty one (e.g. 204)
+            # is logged as still processing below
+            if response.status_code >= 300:
+                logger.warning(f"Error polling generation status: HTTP {response.status_code}")
+                return False, None, hinted_delay
+            
+            body = response.content
+            if not _STATUS_MARKERS_RE.search(body):
+                logger.info(f"Poll #{poll_count}: Status = processing")
+                return False, None, hinted_delay
+            data = json_loads(body)
+            
+            status = data.get("status", "processing").lower()
+            
+            if status == "completed" or status == "done":
+                logger.info(f"Generation completed after {poll_count} polls")
+                return True, _first_present(data, "audio_url", "downloadURL"), None
+                
+            elif status == "failed" or status == "error":
+                error_msg = data.get("error", "Unknown error")
+                logger.error(f"Generation failed: {error_msg}")
+                raise RuntimeError(f"AIVA generation failed: {error_msg}")
+            
+            if hinted_delay is None and data.get("eta_seconds"):
+                try:
+                    hinted_delay = float(data["eta_seconds"])
+                except (TypeError, ValueError):
+                    pass
+                
+            logger.info(f"Poll #{poll_count}: Status = {status}")
+            
+        except (requests.RequestException, ValueError) as e:
+            # ValueError covers a malformed or truncated JSON body
+            logger.warning(f"Error polling generation status: {str(e)}")
+        
+        return False, None, hinted_delay
+    
+    def _next_poll_delay(
+        self,
+        polling_interval: int,
+        poll_count: int,
+        hinted_delay: Optional[float]
+    ) -> float:
+        """
+        Compute the wait before the next poll.
+        
+        The delay starts at polling_interval and grows exponentially up to
+        MAX_POLL_INTERVAL. A hint from the API takes precedence.
+        """
+        if hinted_delay is not None:
+            return max(1, hinted_delay)
+        return backoff_delay(polling_interval, poll_count - 1,
+                             max_delay=self.MAX_POLL_INTERVAL)
+    
     def _poll_for_completion(
         self,
         generation_id: str,
@@ -238,34 +455,48 @@ class AIVAMusicGenerator:
         start_time = time.time()
         poll_count = 0
         
-        while time.time() - start_time < max_wait_time:
+        while True:
             poll_count += 1
+            done, audio_url, hinted_delay = self._check_generation_status(
+                generation_id, poll_count
+            )
+            if done:
+                return audio_url
             
-            try:
-                response = self.session.get(
-                    f"{self.BASE_URL}/generations/{generation_id}/status",
-                    timeout=30
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                status = data.get("status", "processing").lower()
-                
-                if status == "completed" or status == "done":
-                    logger.info(f"Generation completed after {poll_count} polls")
-                    return data.get("audio_url") or data.get("downloadURL")
-                    
-                elif status == "failed" or status == "error":
-                    error_msg = data.get("error", "Unknown error")
-                    logger.error(f"Generation failed: {error_msg}")
-                    raise RuntimeError(f"AIVA generation failed: {error_msg}")
-                    
-                logger.info(f"Poll #{poll_count}: Status = {status}")
-                time.sleep(polling_interval)
-                
-            except requests.RequestException as e:
-                logger.warning(f"Error polling generation status: {str(e)}")
-                time.sleep(polling_interval)
+            delay = self._next_poll_delay(polling_interval, poll_count, hinted_delay)
+            remaining = max_wait_time - (time.time() - start_time)
+            if remaining <= 0:
+                break
+            time.sleep(min(delay, remaining))
+        
+        raise TimeoutError(f"Generation did not complete within {max_wait_time} seconds")
+    
+    async def _apoll_for_completion(
+        self,
+        generation_id: str,
+        composition_id: str,
+        polling_interval: int = 2,
+        max_wait_time: int = 300
+    ) -> str:
+        """Async counterpart of _poll_for_completion that awaits between polls."""
+        
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        poll_count = 0
+        
+        while True:
+            poll_count += 1
+            done, audio_url, hinted_delay = await asyncio.to_thread(
+                self._check_generation_status, generation_id, poll_count
+            )
+            if done:
+                return audio_url
+            
+            delay = self._next_poll_delay(polling_interval, poll_count, hinted_delay)
+            remaining = max_wait_time - (loop.time() - start_time)
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(delay, remaining))
         
         raise TimeoutError(f"Generation did not complete within {max_wait_time} seconds")
     
@@ -273,17 +504,20 @@ class AIVAMusicGenerator:
         """Download generated audio file."""
         
         try:
-            response = requests.get(audio_url, timeout=60)
-            response.raise_for_status()
-            
-            # Determine file extension
-            content_type = response.headers.get('content-type', 'audio/wav')
-            extension = 'wav' if 'wav' in content_type else 'mp3'
-            
-            file_path = self.output_dir / f"aiva_{composition_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
-            
-            with open(file_path, 'wb') as f:
-                f.write(response.content)
+            # Stream to disk so the full file is never held in memory
+            with self._download_session.get(audio_url, timeout=60, stream=True) as response:
+                response.raise_for_status()
+                
+                # Determine file extension
+                content_type = response.headers.get('content-type', 'audio/wav')
+                extension = 'wav' if 'wav' in content_type else 'mp3'
+                
+                file_path = self.output_dir / f"aiva_{composition_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+                
+                with open(file_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=self.DOWNLOAD_CHUNK_SIZE):
+                        if chunk:
+                            f.write(chunk)
             
             logger.info(f"Audio saved to {file_path}")
             return file_path
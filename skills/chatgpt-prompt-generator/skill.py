@@ -5,13 +5,34 @@ Generates music creation prompts based on themes provided by the user
 
 import logging
 import json
-from typing import Dict, Any, Optional
+import time
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+import httpx
 import openai
+from openai import OpenAI
 import sys
 import os
 
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 # Add parent directory to path for imports
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+_SKILLS_DIR = os.path.join(os.path.dirname(__file__), '..')
+if _SKILLS_DIR not in sys.path:
+    sys.path.insert(0, _SKILLS_DIR)
 
 from shared.utils import (
     ValidationError, 
@@ -19,7 +40,12 @@ from shared.utils import (
     get_secure_api_key,
     validate_theme,
     safe_log_api_call,
-    get_timestamp
+    get_timestamp,
+    backoff_delay,
+    json_dumps_pretty,
+    json_dumps,
+    json_loads,
+    run_coroutine_sync
 )
 
 logger = logging.getLogger(__name__)
@@ -29,15 +55,7 @@ logging.basicConfig(
 )
 
 
-class ChatGPTPromptGenerator:
-    """
-    Skill to generate music creation prompts using ChatGPT.
-    
-    This skill takes a theme/topic and uses ChatGPT to create a detailed
-    music generation prompt that can be used by music AI services like Suno.
-    """
-    
-    SYSTEM_PROMPT = """You are a creative music prompt expert. Your task is to generate 
+_RAW_SYSTEM_PROMPT = """You are a creative music prompt expert. Your task is to generate 
 detailed, inspiring prompts for music generation AI. When given a theme or topic, create 
 a comprehensive prompt that includes:
 - Musical style/genre
@@ -49,18 +67,161 @@ a comprehensive prompt that includes:
 
 Keep prompts focused and between 100-300 words. Be creative but practical."""
 
+
+class LLMCache:
+    """
+    In-memory cache for deterministic LLM responses.
+    
+    Entries expire after ttl_seconds; once max_entries is reached the least
+    recently used entry is evicted.
+    """
+    
+    def __init__(self, ttl_seconds: int = 1800, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(**params: Any) -> str:
+        """Build a stable cache key from the request parameters"""
+        blob = json.dumps(params, sort_keys=True)
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached value for key, or None if missing or expired"""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._cache[key]
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def set(self, key: str, value: Dict[str, Any], ttl_seconds: Optional[float] = None) -> None:
+        """Store value under key for ttl_seconds (default: the cache's TTL)"""
+        if ttl_seconds is None:
+            ttl_seconds = self.ttl_seconds
+        with self._lock:
+            self._cache[key] = (value, time.monotonic() + ttl_seconds)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._cache)
+        }
+
+
+class RedisLLMCache(LLMCache):
+    """LLMCache backed by Redis so entries are shared across processes"""
+    
+    KEY_PREFIX = "openclaw:prompt:"
+    
+    def __init__(self, url: str, ttl_seconds: int = 1800):
+        super().__init__(ttl_seconds=ttl_seconds)
+        self._client = redis.Redis.from_url(url)
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            raw = self._client.get(self.KEY_PREFIX + key)
+        except redis.RedisError as e:
+            logger.warning(f"Prompt cache lookup failed: {e}")
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json_loads(raw)
+    
+    def set(self, key: str, value: Dict[str, Any], ttl_seconds: Optional[float] = None) -> None:
+        if ttl_seconds is None:
+            ttl_seconds = self.ttl_seconds
+        try:
+            self._client.setex(self.KEY_PREFIX + key, max(1, int(ttl_seconds)), json_dumps(value))
+        except redis.RedisError as e:
+            logger.warning(f"Prompt cache store failed: {e}")
+
+
+def _create_prompt_cache() -> Optional[LLMCache]:
+    """Create the response cache selected by OPENAI_PROMPT_CACHE (off, memory or redis)"""
+    mode = os.getenv('OPENAI_PROMPT_CACHE', 'off').lower()
+    ttl = int(os.getenv('PROMPT_CACHE_TTL', '1800'))
+    
+    if mode == 'memory':
+        return LLMCache(ttl_seconds=ttl)
+    if mode == 'redis':
+        if REDIS_AVAILABLE:
+            return RedisLLMCache(os.getenv('REDIS_URL', 'redis://localhost:6379/0'), ttl_seconds=ttl)
+        logger.warning("redis package not installed; falling back to in-memory prompt cache")
+        return LLMCache(ttl_seconds=ttl)
+    return None
+
+
+class ChatGPTPromptGenerator:
+    """
+    Skill to generate music creation prompts using ChatGPT.
+    
+    This skill takes a theme/topic and uses ChatGPT to create a detailed
+    music generation prompt that can be used by music AI services like Suno.
+    """
+    
+    # Whitespace-collapsed so no tokens are spent on line breaks and the
+    # prefix stays byte-identical across requests
+    SYSTEM_PROMPT = " ".join(_RAW_SYSTEM_PROMPT.split())
+
+    MAX_TOKENS = 500
+    BATCH_PENDING_STATES = frozenset({"validating", "in_progress", "finalizing"})
+    RATE_LIMIT_RETRIES = 3
+
     def __init__(self):
         """Initialize the ChatGPT Prompt Generator"""
         try:
             self.api_key = get_secure_api_key('OPENAI_API_KEY')
-            openai.api_key = self.api_key
             self.model = os.getenv('OPENAI_MODEL', 'gpt-4')
             self.timeout = int(os.getenv('OPENAI_TIMEOUT', '30'))
+            # One client per generator: its pooled keep-alive connections
+            # are reused by every request, including concurrent batches
+            self.client = OpenAI(
+                api_key=self.api_key,
+                timeout=self.timeout,
+                max_retries=2,
+                http_client=httpx.Client(
+                    http2=HTTP2_AVAILABLE,
+                    timeout=self.timeout,
+                    limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+                )
+            )
+            # Stable key for OpenAI's server-side prompt cache; the system
+            # prompt is the shared prefix of every request
+            self._prompt_cache_key = hashlib.sha256(self.SYSTEM_PROMPT.encode('utf-8')).hexdigest()[:32]
+            self.cache = _create_prompt_cache()
+            # Only deterministic completions are safe to cache
+            self.temperature = 0.0 if self.cache is not None else 0.7
             logger.info(f"ChatGPT Prompt Generator initialized with model: {self.model}")
         except SecurityError as e:
             logger.error(f"Failed to initialize ChatGPT: {e}")
             raise
     
+    def _build_messages(self, validated_theme: str) -> List[Dict[str, str]]:
+        """Build the chat messages; the static system prompt always comes first"""
+        user_message = f"Create a detailed music generation prompt for the theme: '{validated_theme}'"
+        return [
+            {"role": "system", "content": self.SYSTEM_PROMPT},
+            {"role": "user", "content": user_message}
+        ]
+    
     def generate_prompt(self, theme: str) -> Dict[str, Any]:
         """
         Generate a music creation prompt for the given theme.
@@ -85,8 +246,21 @@ Keep prompts focused and between 100-300 words. Be creative but practical."""
             validated_theme = validate_theme(theme)
             logger.info(f"Generating prompt for theme: {validated_theme}")
             
-            # Prepare the user message
-            user_message = f"Create a detailed music generation prompt for the theme: '{validated_theme}'"
+            messages = self._build_messages(validated_theme)
+            
+            cache_key = None
+            if self.cache is not None:
+                cache_key = LLMCache.make_key(
+                    model=self.model,
+                    system=self.SYSTEM_PROMPT,
+                    user=messages[1]["content"],
+                    temperature=self.temperature,
+                    max_tokens=self.MAX_TOKENS
+                )
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    logger.info(f"Prompt cache hit for theme: {validated_theme}")
+                    return {**cached, "timestamp": get_timestamp(), "cached": True}
             
             # Call ChatGPT API
             safe_log_api_call(
@@ -96,15 +270,12 @@ Keep prompts focused and between 100-300 words. Be creative but practical."""
                 {"theme": validated_theme, "model": self.model}
             )
             
-            response = openai.ChatCompletion.create(
+            response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": self.SYSTEM_PROMPT},
-                    {"role": "user", "content": user_message}
-                ],
-                temperature=0.7,
-                max_tokens=500,
-                timeout=self.timeout
+                messages=messages,
+                temperature=self.temperature,
+                max_tokens=self.MAX_TOKENS,
+                extra_body={"prompt_cache_key": self._prompt_cache_key}
             )
             
             generated_prompt = response.choices[0].message.content.strip()
@@ -122,9 +293,12 @@ Keep prompts focused and between 100-300 words. Be creative but practical."""
                 "prompt": generated_prompt,
                 "model": self.model,
                 "timestamp": get_timestamp(),
-                "tokens_used": response.usage.total_tokens if hasattr(response, 'usage') else None
+                "tokens_used": response.usage.total_tokens if response.usage else None
             }
             
+            if cache_key is not None:
+                self.cache.set(cache_key, result)
+            
             logger.info(f"Successfully generated prompt for theme: {validated_theme}")
             return result
             
@@ -136,7 +310,7 @@ Keep prompts focused and between 100-300 words. Be creative but practical."""
                 "message": str(e),
                 "timestamp": get_timestamp()
             }
-        except openai.error.RateLimitError as e:
+        except openai.RateLimitError as e:
             logger.error(f"Rate limit exceeded: {e}")
             safe_log_api_call("OpenAI/ChatGPT", "generate_music_prompt", "error", 
                             {"error_type": "rate_limit"})
@@ -146,7 +320,7 @@ Keep prompts focused and between 100-300 words. Be creative but practical."""
                 "message": "OpenAI API rate limit exceeded. Please try again later.",
                 "timestamp": get_timestamp()
             }
-        except openai.error.AuthenticationError as e:
+        except openai.AuthenticationError as e:
             logger.error(f"Authentication error: {e}")
             safe_log_api_call("OpenAI/ChatGPT", "generate_music_prompt", "error", 
                             {"error_type": "authentication"})
@@ -156,7 +330,17 @@ Keep prompts focused and between 100-300 words. Be creative but practical."""
                 "message": "Failed to authenticate with OpenAI API.",
                 "timestamp": get_timestamp()
             }
-        except openai.error.APIError as e:
+        except (openai.APIConnectionError, openai.InternalServerError) as e:
+            logger.error(f"OpenAI API unavailable: {e}")
+            safe_log_api_call("OpenAI/ChatGPT", "generate_music_prompt", "error", 
+                            {"error_type": "openai_unavailable"})
+            return {
+                "status": "error",
+                "error_type": "openai_unavailable",
+                "message": f"OpenAI API unavailable: {str(e)}",
+                "timestamp": get_timestamp()
+            }
+        except openai.APIError as e:
             logger.error(f"OpenAI API error: {e}")
             safe_log_api_call("OpenAI/ChatGPT", "generate_music_prompt", "error", 
                             {"error_type": "openai_api"})
@@ -177,18 +361,275 @@ Keep prompts focused and between 100-300 words. Be creative but practical."""
                 "timestamp": get_timestamp()
             }
 
+    
+    def stream_prompt(self, theme: str) -> Iterator[str]:
+        """
+        Stream a music creation prompt for the given theme as it is generated.
+        
+        The theme is validated and the request is sent before this returns,
+        so validation and API errors are raised here rather than on the
+        first iteration.
+        
+        Args:
+            theme: The theme or topic for music generation
+            
+        Returns:
+            Iterator over content fragments of the generated prompt
+            
+        Raises:
+            ValidationError: If theme validation fails
+            Exception: If ChatGPT API call fails
+        """
+        validated_theme = validate_theme(theme)
+        logger.info(f"Streaming prompt for theme: {validated_theme}")
+        
+        safe_log_api_call(
+            "OpenAI/ChatGPT",
+            "stream_music_prompt",
+            "starting",
+            {"theme": validated_theme, "model": self.model}
+        )
+        
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=self._build_messages(validated_theme),
+            temperature=self.temperature,
+            max_tokens=self.MAX_TOKENS,
+            extra_body={"prompt_cache_key": self._prompt_cache_key},
+            stream=True
+        )
+        return self._iter_stream(response, validated_theme)
+    
+    def _iter_stream(self, response: Any, validated_theme: str) -> Iterator[str]:
+        """Yield content fragments from a streamed completion"""
+        prompt_length = 0
+        for chunk in response:
+            if not chunk.choices:
+                continue
+            content = chunk.choices[0].delta.content
+            if content:
+                prompt_length += len(content)
+                yield content
+        
+        safe_log_api_call(
+            "OpenAI/ChatGPT",
+            "stream_music_prompt",
+            "success",
+            {"theme": validated_theme, "prompt_length": prompt_length}
+        )
+
+    
+    async def generate_prompts_async(self, themes: List[str]) -> List[Dict[str, Any]]:
+        """
+        Generate prompts for several themes concurrently.
+        
+        Concurrency is bounded by OPENAI_MAX_CONCURRENCY. Each theme is
+        retried with exponential backoff when rate limited, so one throttled
+        request does not fail the whole batch.
+        
+        Args:
+            themes: Themes to generate prompts for
+            
+        Returns:
+            One result dictionary per theme, in input order, each shaped like
+            the return value of generate_prompt
+        """
+        semaphore = asyncio.Semaphore(int(os.getenv('OPENAI_MAX_CONCURRENCY', '10')))
+        
+        async def generate_one(theme: str) -> Dict[str, Any]:
+            async with semaphore:
+                for attempt in range(self.RATE_LIMIT_RETRIES + 1):
+                    # The client is synchronous; run it off the event loop
+                    result = await asyncio.to_thread(self.generate_prompt, theme)
+                    if result.get("error_type") != "rate_limit" or attempt == self.RATE_LIMIT_RETRIES:
+                        return result
+                    await asyncio.sleep(backoff_delay(1.0, attempt, factor=2.0, max_delay=30.0))
+        
+        return await asyncio.gather(*(generate_one(theme) for theme in themes))
+
+    
+    def submit_batch(self, themes: List[str]) -> str:
+        """
+        Submit themes to the OpenAI Batch API.
+        
+        Batch requests are billed at a discount and complete within 24 hours,
+        which suits offline workloads. Collect the output with poll_batch.
+        
+        Args:
+            themes: Themes to generate prompts for (duplicates are sent once)
+            
+        Returns:
+            Batch ID
+            
+        Raises:
+            ValidationError: If any theme fails validation
+        """
+        # The theme itself is the custom_id, so poll_batch can map results
+        # back to themes without any state kept between the two calls
+        custom_ids = set()
+        lines = []
+        for theme in themes:
+            validated_theme = validate_theme(theme)
+            if validated_theme in custom_ids:
+                continue
+            custom_ids.add(validated_theme)
+            lines.append(json.dumps({
+                "custom_id": validated_theme,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.model,
+                    "messages": self._build_messages(validated_theme),
+                    "temperature": self.temperature,
+                    "max_tokens": self.MAX_TOKENS,
+                    "prompt_cache_key": self._prompt_cache_key
+                }
+            }))
+        
+        input_file = self.client.files.create(
+            file=("prompts.jsonl", "\n".join(lines).encode('utf-8')),
+            purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        safe_log_api_call(
+            "OpenAI/ChatGPT",
+            "submit_prompt_batch",
+            "success",
+            {"batch_id": batch.id, "themes": len(custom_ids)}
+        )
+        return batch.id
+    
+    def poll_batch(self, batch_id: str) -> Dict[str, Any]:
+        """
+        Check a submitted batch and collect its prompts once complete.
+        
+        Args:
+            batch_id: ID returned by submit_batch
+            
+        Returns:
+            Dictionary with 'status' ('pending', 'success', 'partial' or
+            'error'), 'batch_status', and on completion 'prompts' mapping
+            each theme to its generated prompt plus 'errors' mapping each
+            theme that failed to its error message
+        """
+        batch = self.client.batches.retrieve(batch_id)
+        
+        if batch.status in self.BATCH_PENDING_STATES:
+            return {
+                "status": "pending",
+                "batch_id": batch_id,
+                "batch_status": batch.status,
+                "timestamp": get_timestamp()
+            }
+        
+        if batch.status != "completed" or not (batch.output_file_id or batch.error_file_id):
+            safe_log_api_call("OpenAI/ChatGPT", "poll_prompt_batch", "error",
+                              {"batch_id": batch_id, "batch_status": batch.status})
+            return {
+                "status": "error",
+                "error_type": "batch_failed",
+                "batch_id": batch_id,
+                "batch_status": batch.status,
+                "message": f"Batch ended with status: {batch.status}",
+                "timestamp": get_timestamp()
+            }
+        
+        prompts: Dict[str, str] = {}
+        errors: Dict[str, str] = {}
+        
+        # Successful requests land in the output file and failed ones in the
+        # error file; a batch where every request failed has no output file
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if not line:
+                    continue
+                item = json_loads(line)
+                theme = item["custom_id"]
+                response = item.get("response") or {}
+                if response.get("status_code") == 200:
+                    prompts[theme] = response["body"]["choices"][0]["message"]["content"].strip()
+                else:
+                    error = item.get("error") or (response.get("body") or {}).get("error") or {}
+                    errors[theme] = error.get("message", "Request failed")
+        
+        safe_log_api_call(
+            "OpenAI/ChatGPT",
+            "poll_prompt_batch",
+            "success",
+            {"batch_id": batch_id, "prompts": len(prompts), "errors": len(errors)}
+        )
+        if not errors:
+            status = "success"
+        elif prompts:
+            status = "partial"
+        else:
+            status = "error"
+        return {
+            "status": status,
+            "batch_id": batch_id,
+            "batch_status": batch.status,
+            "prompts": prompts,
+            "errors": errors,
+            "model": self.model,
+            "timestamp": get_timestamp()
+        }
+
+
+# Shared generator instance; construction reads secrets and config, so it is
+# done once per process (and again after an opt-in reload, see below)
+_generator: Optional[ChatGPTPromptGenerator] = None
+_generator_lock = threading.Lock()
+
+
+def _get_generator() -> ChatGPTPromptGenerator:
+    """Return the shared ChatGPTPromptGenerator, creating it on first use"""
+    global _generator
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                _generator = ChatGPTPromptGenerator()
+    return _generator
+
+
+def _reset_generator() -> None:
+    """Drop the shared ChatGPTPromptGenerator so the next call rebuilds it
+    
+    Not installed on import; a host that reloads on SIGHUP can opt in with
+    shared.utils.register_reload_handler(_reset_generator).
+    """
+    global _generator
+    # No lock: when registered via register_reload_handler this runs as a
+    # signal handler and may interrupt a thread that holds the lock
+    _generator = None
+
 
 def execute_skill(parameters: Dict[str, Any]) -> Dict[str, Any]:
     """
     Execute the ChatGPT Prompt Generator skill.
     
     Args:
-        parameters: OpenClaw parameters containing 'theme'
+        parameters: OpenClaw parameters containing 'theme' (a string, or a
+            list of themes to generate concurrently). 'use_batch_api' submits the
+            themes to the OpenAI Batch API instead; pass the returned
+            'batch_id' on a later call to collect the prompts
         
     Returns:
-        Result dictionary with generated prompt or error
+        Result dictionary with generated prompt or error. A list of themes
+        yields a 'results' list with one entry per theme. Results are plain
+        data; callers that want incremental output use
+        ChatGPTPromptGenerator.stream_prompt directly.
     """
     try:
+        if parameters and parameters.get('batch_id'):
+            generator = _get_generator()
+            return generator.poll_batch(parameters['batch_id'])
+        
         if not parameters or 'theme' not in parameters:
             return {
                 "status": "error",
@@ -197,10 +638,46 @@ def execute_skill(parameters: Dict[str, Any]) -> Dict[str, Any]:
                 "timestamp": get_timestamp()
             }
         
-        generator = ChatGPTPromptGenerator()
+        generator = _get_generator()
+        
+        if parameters.get('use_batch_api', False):
+            themes = parameters['theme']
+            if not isinstance(themes, list):
+                themes = [themes]
+            return {
+                "status": "submitted",
+                "batch_id": generator.submit_batch(themes),
+                "timestamp": get_timestamp()
+            }
+        
+        if isinstance(parameters['theme'], list):
+            results = run_coroutine_sync(generator.generate_prompts_async(parameters['theme']))
+            succeeded = sum(1 for r in results if r.get("status") == "success")
+            if succeeded == len(results):
+                status = "success"
+            elif succeeded:
+                status = "partial"
+            else:
+                status = "error"
+            return {
+                "status": status,
+                "results": results,
+                "succeeded": succeeded,
+                "failed": len(results) - succeeded,
+                "timestamp": get_timestamp()
+            }
+        
         result = generator.generate_prompt(parameters['theme'])
         return result
         
+    except ValidationError as e:
+        logger.error(f"Validation error: {e}")
+        return {
+            "status": "error",
+            "error_type": "validation_error",
+            "message": str(e),
+            "timestamp": get_timestamp()
+        }
     except SecurityError as e:
         logger.error(f"Security error in skill execution: {e}")
         return {
@@ -223,4 +700,4 @@ if __name__ == "__main__":
     # Test execution
     test_params = {"theme": "cyberpunk city at night"}
     result = execute_skill(test_params)
-    print(json.dumps(result, indent=2))
+    print(json_dumps_pretty(result))
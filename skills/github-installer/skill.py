@@ -4,15 +4,21 @@ Pulls code, skills, files, and tools from GitHub repositories with authenticatio
 """
 
 import logging
-import json
+import hashlib
 import os
 import shutil
 import subprocess
 import sys
+import threading
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, Any, List, Optional
 
 # Add parent directory to path for imports
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+_SKILLS_DIR = os.path.join(os.path.dirname(__file__), '..')
+if _SKILLS_DIR not in sys.path:
+    sys.path.insert(0, _SKILLS_DIR)
 
 from shared.utils import (
     ValidationError,
@@ -24,7 +30,8 @@ from shared.utils import (
     GoogleOAuthConfig,
     validate_oauth_code,
     safe_log_api_call,
-    get_timestamp
+    get_timestamp,
+    json_dumps_pretty
 )
 
 logger = logging.getLogger(__name__)
@@ -47,7 +54,13 @@ class GitHubInstaller:
     - Backup and restoration
     """
     
-    OPENCLAW_SKILL_MARKERS = ['config.yaml', 'skill.py', 'SKILL.md']
+    OPENCLAW_SKILL_MARKERS = frozenset({'config.yaml', 'skill.py', 'SKILL.md'})
+    # Lines of git output kept for error messages
+    GIT_OUTPUT_TAIL = 200
+    # Directories that never contain skills and can be large
+    SKIP_DIRS = frozenset({'.git', 'node_modules', '__pycache__', '.venv'})
+    # Commits whose detected skills are remembered
+    SKILL_CACHE_SIZE = 64
     
     def __init__(self):
         """Initialize GitHub Installer"""
@@ -56,7 +69,25 @@ class GitHubInstaller:
             self.github_api_base = os.getenv('GITHUB_API_BASE_URL', 'https://api.github.com')
             self.timeout = int(os.getenv('GITHUB_TIMEOUT', '30'))
             self.backup_enabled = os.getenv('BACKUP_ENABLED', 'true').lower() == 'true'
+            self.install_mode = os.getenv('INSTALL_MODE', 'copy').lower()
+            self.sparse_paths = [
+                path.strip() for path in os.getenv('GIT_SPARSE_PATHS', '').split(',')
+                if path.strip()
+            ]
             self.google_oauth = GoogleOAuthConfig()
+            # (HEAD commit, sparse-checkout patterns) -> relative paths of
+            # the skills in that clean checkout
+            self._skill_cache: "OrderedDict[tuple, List[str]]" = OrderedDict()
+            self._skill_cache_lock = threading.Lock()
+            # Optional shared object pool (e.g. ~/.cache/openclaw/git-objects)
+            # so repeated clones only fetch missing objects; off when unset
+            cache_dir = os.getenv('GIT_OBJECT_CACHE', '')
+            self.object_cache = os.path.expanduser(cache_dir) if cache_dir else None
+            # Cache fills run in the background and may take much longer
+            # than a shallow clone
+            self.object_cache_timeout = int(os.getenv('GIT_OBJECT_CACHE_TIMEOUT', '600'))
+            self._cache_fetches: set = set()
+            self._cache_fetches_lock = threading.Lock()
             logger.info("GitHub Installer initialized successfully")
         except SecurityError as e:
             logger.error(f"Failed to initialize GitHub Installer: {e}")
@@ -137,30 +168,23 @@ class GitHubInstaller:
         """Execute git clone command"""
         try:
             cmd = [
-                'git', 'clone',
+                'git', 'clone', '--progress',
                 '--branch', branch,
-                '--depth', '1',  # Shallow clone for speed
-                '--'
+                '--depth', '1'  # Shallow clone for speed
             ]
-            
-            # Use GitHub token for authentication
-            if self.github_token:
-                authenticated_url = repo_url.replace(
-                    'https://github.com/',
-                    f'https://{self.github_token}@github.com/'
-                )
-                cmd.append(authenticated_url)
-            else:
-                cmd.append(repo_url)
-            
+            if self.sparse_paths:
+                # Partial clone: only blobs under the sparse paths are fetched
+                cmd += ['--filter=blob:none', '--no-checkout']
+            if self._object_cache_usable():
+                # Borrow objects already in the cache, then copy them in so
+                # the clone does not depend on the cache afterwards
+                cmd += ['--reference-if-able', self.object_cache, '--dissociate']
+            cmd.append('--')
+            
+            cmd.append(self._authenticated_url(repo_url))
             cmd.append(target_dir)
             
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=self.timeout
-            )
+            result = self._run_git(cmd)
             
             if result.returncode != 0:
                 logger.error(f"Git clone failed: {result.stderr}")
@@ -171,6 +195,22 @@ class GitHubInstaller:
                     "timestamp": get_timestamp()
                 }
             
+            if self.sparse_paths:
+                for step in (['sparse-checkout', 'init', '--cone'],
+                             ['sparse-checkout', 'set', *self.sparse_paths],
+                             ['checkout', branch]):
+                    result = self._run_git(['git', '-C', target_dir, *step])
+                    if result.returncode != 0:
+                        logger.error(f"Git sparse checkout failed: {result.stderr}")
+                        return {
+                            "status": "error",
+                            "error_type": "git_clone_failed",
+                            "message": result.stderr,
+                            "timestamp": get_timestamp()
+                        }
+            
+            self._update_object_cache(repo_url, branch, target_dir)
+            
             logger.info(f"Repository cloned successfully to {target_dir}")
             
             return {
@@ -199,17 +239,172 @@ class GitHubInstaller:
                 "timestamp": get_timestamp()
             }
     
-    def _git_pull(self, repo_dir: str, branch: str) -> Dict[str, Any]:
-        """Execute git pull command"""
+    def _run_git(self, cmd: List[str], timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+        """
+        Run a git command without ever prompting for credentials.
+        
+        Output is streamed to the log line by line as git produces it, with
+        intermediate progress updates at debug level. Only the last
+        GIT_OUTPUT_TAIL lines are kept, and they are returned as stderr for
+        error reporting.
+        
+        Raises:
+            subprocess.TimeoutExpired: If git runs longer than timeout
+                (default self.timeout)
+        """
+        if timeout is None:
+            timeout = self.timeout
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            env={**os.environ, 'GIT_TERMINAL_PROMPT': '0'}
+        )
+        tail = deque(maxlen=self.GIT_OUTPUT_TAIL)
+        timed_out = threading.Event()
+        
+        def kill() -> None:
+            timed_out.set()
+            proc.kill()
+        
+        # Reading blocks until git closes its output, so enforce the timeout separately
+        watchdog = threading.Timer(timeout, kill)
+        watchdog.start()
         try:
-            cmd = ['git', '-C', repo_dir, 'pull', 'origin', branch]
-            
-            result = subprocess.run(
-                cmd,
+            with proc.stdout:
+                for line in proc.stdout:
+                    line = line.rstrip()
+                    if not line:
+                        continue
+                    if '%' in line and not line.endswith('done.'):
+                        # Intermediate progress update; superseded by the next one
+                        logger.debug("git: %s", line)
+                    else:
+                        logger.info("git: %s", line)
+                        tail.append(line)
+            returncode = proc.wait()
+        finally:
+            watchdog.cancel()
+        
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        
+        output = "\n".join(tail)
+        return subprocess.CompletedProcess(cmd, returncode, stdout=output, stderr=output)
+    
+    def _authenticated_url(self, repo_url: str) -> str:
+        """Return repo_url with the GitHub token embedded, if one is configured"""
+        if self.github_token:
+            return repo_url.replace(
+                'https://github.com/',
+                f'https://{self.github_token}@github.com/'
+            )
+        return repo_url
+    
+    def _object_cache_usable(self) -> bool:
+        """
+        Whether the object cache can serve as a clone reference.
+        
+        Git refuses a shallow repository as a reference, so a cache that
+        is still shallow (e.g. filled by an older version) is skipped.
+        """
+        return (
+            bool(self.object_cache)
+            and os.path.isdir(os.path.join(self.object_cache, 'objects'))
+            and not os.path.exists(os.path.join(self.object_cache, 'shallow'))
+        )
+    
+    def _ensure_object_cache(self) -> bool:
+        """Create the shared object cache as a bare repository if needed"""
+        if not self.object_cache:
+            return False
+        if os.path.isdir(os.path.join(self.object_cache, 'objects')):
+            return True
+        try:
+            os.makedirs(self.object_cache, exist_ok=True)
+            result = self._run_git(['git', 'init', '--bare', '--quiet', self.object_cache])
+            return result.returncode == 0
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logger.warning(f"Git object cache unavailable: {e}")
+            return False
+    
+    def _update_object_cache(self, repo_url: str, branch: str, clone_dir: str) -> None:
+        """
+        Fill the shared object cache with the full history of branch.
+        
+        Nothing is fetched when the cache already holds the commit just
+        cloned. Otherwise the fetch runs on a background thread, under
+        GIT_OBJECT_CACHE_TIMEOUT instead of the clone timeout, so the
+        install never waits for it.
+        """
+        if not self._ensure_object_cache():
+            return
+        if self._object_cache_has_head(clone_dir):
+            return
+        
+        ref = f"refs/cache/{hashlib.sha1(repo_url.encode('utf-8')).hexdigest()[:16]}"
+        with self._cache_fetches_lock:
+            if ref in self._cache_fetches:
+                return
+            self._cache_fetches.add(ref)
+        
+        threading.Thread(
+            target=self._fetch_into_object_cache,
+            args=(repo_url, branch, ref),
+            name="git-object-cache",
+            daemon=True
+        ).start()
+    
+    def _object_cache_has_head(self, clone_dir: str) -> bool:
+        """Whether the object cache already contains the HEAD commit of clone_dir"""
+        try:
+            head = subprocess.run(
+                ['git', '-C', clone_dir, 'rev-parse', '--verify', 'HEAD'],
                 capture_output=True,
                 text=True,
                 timeout=self.timeout
             )
+            if head.returncode != 0:
+                return False
+            found = subprocess.run(
+                ['git', '-C', self.object_cache, 'cat-file', '-e', f"{head.stdout.strip()}^{{commit}}"],
+                capture_output=True,
+                timeout=self.timeout
+            )
+            return found.returncode == 0
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+    
+    def _fetch_into_object_cache(self, repo_url: str, branch: str, ref: str) -> None:
+        """
+        Fetch the full history of branch into the shared object cache.
+        
+        The clone itself is shallow, so the cache is filled from the remote
+        rather than from the clone; a shallow cache could not be used as a
+        reference by later clones.
+        """
+        cmd = ['git', '-C', self.object_cache, 'fetch', '--quiet', '--no-tags']
+        if os.path.exists(os.path.join(self.object_cache, 'shallow')):
+            cmd.append('--unshallow')
+        cmd += ['--', self._authenticated_url(repo_url), f'+refs/heads/{branch}:{ref}']
+        try:
+            result = self._run_git(cmd, timeout=self.object_cache_timeout)
+            if result.returncode != 0:
+                logger.warning(f"Failed to update git object cache: {result.stderr}")
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logger.warning(f"Failed to update git object cache: {e}")
+        finally:
+            with self._cache_fetches_lock:
+                self._cache_fetches.discard(ref)
+    
+    def _git_pull(self, repo_dir: str, branch: str) -> Dict[str, Any]:
+        """Execute git pull command"""
+        try:
+            cmd = ['git', '-C', repo_dir, 'pull', '--progress', 'origin', branch]
+            
+            result = self._run_git(cmd)
             
             if result.returncode != 0:
                 logger.error(f"Git pull failed: {result.stderr}")
@@ -257,31 +452,119 @@ class GitHubInstaller:
         Returns:
             List of detected skills with their paths
         """
+        # Only clean git checkouts are cached: their HEAD commit and sparse
+        # patterns pin the content, and the same checkout in another
+        # directory reuses the result
+        head = self._checkout_key(repo_dir)
+        rel_paths = None
+        if head is not None:
+            with self._skill_cache_lock:
+                rel_paths = self._skill_cache.get(head)
+                if rel_paths is not None:
+                    self._skill_cache.move_to_end(head)
+        
         skills = []
         
         try:
-            for root, dirs, files in os.walk(repo_dir):
-                # Check if directory contains OpenClaw skill markers
-                if all(marker in files for marker in self.OPENCLAW_SKILL_MARKERS):
-                    rel_path = os.path.relpath(root, repo_dir)
-                    skill_name = os.path.basename(root)
-                    
-                    skills.append({
-                        "name": skill_name,
-                        "path": rel_path,
-                        "full_path": root,
-                        "config": os.path.join(root, 'config.yaml'),
-                        "skill_file": os.path.join(root, 'skill.py'),
-                        "documentation": os.path.join(root, 'SKILL.md')
-                    })
-                    
-                    logger.info(f"Detected OpenClaw skill: {skill_name}")
+            if rel_paths is None:
+                rel_paths = [
+                    os.path.relpath(root, repo_dir)
+                    for root in self._find_skill_dirs(repo_dir)
+                ]
+                if head is not None:
+                    with self._skill_cache_lock:
+                        self._skill_cache[head] = rel_paths
+                        while len(self._skill_cache) > self.SKILL_CACHE_SIZE:
+                            self._skill_cache.popitem(last=False)
+            
+            for rel_path in rel_paths:
+                root = os.path.normpath(os.path.join(repo_dir, rel_path))
+                skill_name = os.path.basename(root)
+                
+                skills.append({
+                    "name": skill_name,
+                    "path": rel_path,
+                    "full_path": root,
+                    "config": os.path.join(root, 'config.yaml'),
+                    "skill_file": os.path.join(root, 'skill.py'),
+                    "documentation": os.path.join(root, 'SKILL.md')
+                })
+                
+                logger.info(f"Detected OpenClaw skill: {skill_name}")
         
         except Exception as e:
             logger.error(f"Error detecting skills: {e}")
         
         return skills
     
+    def _checkout_key(self, repo_dir: str) -> Optional[tuple]:
+        """
+        Build the detection cache key for a git checkout.
+        
+        Returns:
+            Tuple of (HEAD commit, sparse-checkout patterns), or None if
+            repo_dir is not a git checkout or has added, removed or modified
+            files, whose detection results must not be cached
+        """
+        if not os.path.exists(os.path.join(repo_dir, '.git')):
+            return None
+        try:
+            result = subprocess.run(
+                ['git', '-C', repo_dir, 'status', '--porcelain=v2', '--branch'],
+                capture_output=True,
+                text=True,
+                timeout=self.timeout
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        if result.returncode != 0:
+            return None
+        
+        head = None
+        for line in result.stdout.splitlines():
+            if not line.startswith('#'):
+                return None
+            if line.startswith('# branch.oid '):
+                head = line.split()[2]
+        if head is None or head == '(initial)':
+            return None
+        
+        sparse_file = os.path.join(repo_dir, '.git', 'info', 'sparse-checkout')
+        try:
+            with open(sparse_file, encoding='utf-8') as f:
+                sparse = f.read()
+        except OSError:
+            sparse = None
+        return head, sparse
+    
+    def _find_skill_dirs(self, repo_dir: str) -> List[str]:
+        """Walk repo_dir with os.scandir, skipping SKIP_DIRS, and return directories containing all skill markers"""
+        found = []
+        stack = [repo_dir]
+        
+        while stack:
+            root = stack.pop()
+            names = set()
+            subdirs = []
+            try:
+                with os.scandir(root) as entries:
+                    for entry in entries:
+                        if entry.is_dir():
+                            # Like os.walk, do not descend into symlinked directories
+                            if entry.name not in self.SKIP_DIRS and not entry.is_symlink():
+                                subdirs.append(entry.path)
+                        else:
+                            names.add(entry.name)
+            except OSError as e:
+                logger.warning(f"Cannot scan {root}: {e}")
+                continue
+            
+            if self.OPENCLAW_SKILL_MARKERS.issubset(names):
+                found.append(root)
+            stack.extend(reversed(subdirs))
+        
+        return found
+    
     def install_skills(self, source_dir: str, target_dir: str = None) -> Dict[str, Any]:
         """
         Install detected OpenClaw skills.
@@ -314,37 +597,35 @@ class GitHubInstaller:
             
             installed_skills = []
             failed_skills = []
+            outcomes: Dict[int, Dict[str, Any]] = {}
+            
+            # Skills sharing a name install into the same directory, so each
+            # name is installed serially in detection order (the last wins)
+            groups: Dict[str, List[int]] = {}
+            for index, skill in enumerate(detected_skills):
+                groups.setdefault(skill['name'], []).append(index)
+            
+            # Copies are I/O bound and release the GIL, so threads overlap them
+            max_workers = min(16, (os.cpu_count() or 1) * 4, len(groups))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(
+                        self._install_group,
+                        [detected_skills[index] for index in indexes],
+                        target_dir
+                    ): indexes
+                    for indexes in groups.values()
+                }
+                for future in as_completed(futures):
+                    outcomes.update(zip(futures[future], future.result()))
             
-            for skill in detected_skills:
-                try:
-                    logger.info(f"Installing skill: {skill['name']}")
-                    
-                    # Create backup if skill exists
-                    skill_target = os.path.join(target_dir, skill['name'])
-                    if os.path.exists(skill_target) and self.backup_enabled:
-                        backup_dir = f"{skill_target}.backup.{get_timestamp()}"
-                        shutil.copytree(skill_target, backup_dir)
-                        logger.info(f"Backed up existing skill to {backup_dir}")
-                    
-                    # Copy skill to target directory
-                    if os.path.exists(skill_target):
-                        shutil.rmtree(skill_target)
-                    
-                    shutil.copytree(skill['full_path'], skill_target)
-                    logger.info(f"Skill installed: {skill['name']} -> {skill_target}")
-                    
-                    installed_skills.append({
-                        "name": skill['name'],
-                        "path": skill_target,
-                        "status": "installed"
-                    })
-                
-                except Exception as e:
-                    logger.error(f"Failed to install skill {skill['name']}: {e}")
-                    failed_skills.append({
-                        "name": skill['name'],
-                        "error": str(e)
-                    })
+            # Report in detection order regardless of completion order
+            for index in range(len(detected_skills)):
+                outcome = outcomes[index]
+                if "error" in outcome:
+                    failed_skills.append(outcome)
+                else:
+                    installed_skills.append(outcome)
             
             safe_log_api_call(
                 "GitHub",
@@ -380,6 +661,93 @@ class GitHubInstaller:
                 "timestamp": get_timestamp()
             }
     
+    def _install_group(
+        self,
+        skills: List[Dict[str, str]],
+        target_dir: str
+    ) -> List[Dict[str, Any]]:
+        """Install skills that share a target name one after another"""
+        outcomes = []
+        for skill in skills:
+            try:
+                outcomes.append(self._install_one(skill, target_dir))
+            except Exception as e:
+                logger.error(f"Failed to install skill {skill['name']}: {e}")
+                outcomes.append({
+                    "name": skill['name'],
+                    "error": str(e)
+                })
+        return outcomes
+    
+    def _install_one(self, skill: Dict[str, str], target_dir: str) -> Dict[str, Any]:
+        """
+        Install a single detected skill into target_dir.
+        
+        Raises:
+            OSError: If backing up or copying the skill fails
+        """
+        logger.info(f"Installing skill: {skill['name']}")
+        
+        # Move any existing install aside (backup) or remove it
+        skill_target = os.path.join(target_dir, skill['name'])
+        if os.path.exists(skill_target):
+            if self.backup_enabled:
+                # pid and a random suffix keep concurrent installs from
+                # picking the same backup name within one millisecond
+                backup_dir = (
+                    f"{skill_target}.backup.{get_timestamp()}"
+                    f".{os.getpid()}.{uuid.uuid4().hex[:8]}"
+                )
+                # An atomic rename preserves the old files without copying them
+                os.replace(skill_target, backup_dir)
+                logger.info(f"Backed up existing skill to {backup_dir}")
+            else:
+                shutil.rmtree(skill_target)
+        
+        self._fast_clone(skill['full_path'], skill_target)
+        logger.info(f"Skill installed: {skill['name']} -> {skill_target}")
+        
+        return {
+            "name": skill['name'],
+            "path": skill_target,
+            "status": "installed"
+        }
+    
+    def _fast_clone(self, src: str, dst: str) -> None:
+        """
+        Copy a skill directory according to INSTALL_MODE.
+        
+        - link: hardlink every file (same filesystem only; the installed
+          files share inodes with the clone)
+        - reflink: copy-on-write clone via cp --reflink=auto (Linux)
+        - copy: regular byte copy
+        
+        link and reflink fall back to a regular copy when they fail.
+        """
+        if self.install_mode == 'link':
+            try:
+                shutil.copytree(src, dst, copy_function=os.link)
+                return
+            except OSError as e:
+                logger.warning(f"Hardlink install failed, copying instead: {e}")
+                shutil.rmtree(dst, ignore_errors=True)
+        elif self.install_mode == 'reflink' and sys.platform.startswith('linux'):
+            try:
+                result = subprocess.run(
+                    ['cp', '--reflink=auto', '-r', '--', src, dst],
+                    capture_output=True,
+                    text=True,
+                    timeout=self.timeout
+                )
+                if result.returncode == 0:
+                    return
+                logger.warning(f"Reflink install failed, copying instead: {result.stderr}")
+            except (OSError, subprocess.TimeoutExpired) as e:
+                logger.warning(f"Reflink install failed, copying instead: {e}")
+            shutil.rmtree(dst, ignore_errors=True)
+        
+        shutil.copytree(src, dst)
+    
     def get_google_oauth_url(self, state: str = None) -> Dict[str, Any]:
         """
         Generate Google OAuth authorization URL (for optional authentication).
@@ -435,6 +803,34 @@ class GitHubInstaller:
             }
 
 
+# Shared installer instance; construction reads secrets and config, so it is
+# done once per process (and again after an opt-in reload, see below)
+_installer: Optional[GitHubInstaller] = None
+_installer_lock = threading.Lock()
+
+
+def _get_installer() -> GitHubInstaller:
+    """Return the shared GitHubInstaller, creating it on first use"""
+    global _installer
+    if _installer is None:
+        with _installer_lock:
+            if _installer is None:
+                _installer = GitHubInstaller()
+    return _installer
+
+
+def _reset_installer() -> None:
+    """Drop the shared GitHubInstaller so the next call rebuilds it
+    
+    Not installed on import; a host that reloads on SIGHUP can opt in with
+    shared.utils.register_reload_handler(_reset_installer).
+    """
+    global _installer
+    # No lock: when registered via register_reload_handler this runs as a
+    # signal handler and may interrupt a thread that holds the lock
+    _installer = None
+
+
 def execute_skill(parameters: Dict[str, Any]) -> Dict[str, Any]:
     """
     Execute the GitHub Installer skill.
@@ -459,7 +855,7 @@ def execute_skill(parameters: Dict[str, Any]) -> Dict[str, Any]:
                 "timestamp": get_timestamp()
             }
         
-        installer = GitHubInstaller()
+        installer = _get_installer()
         
         repo_url = parameters['repository_url']
         branch = parameters.get('branch', 'main')
@@ -528,4 +924,4 @@ if __name__ == "__main__":
         "action": "clone"
     }
     result = execute_skill(test_params)
-    print(json.dumps(result, indent=2))
+    print(json_dumps_pretty(result))
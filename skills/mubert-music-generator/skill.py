@@ -12,31 +12,192 @@ License: Royalty-free for personal and commercial use
 import os
 import json
 import time
+import asyncio
+import random
+import shutil
+import hashlib
+import itertools
 import logging
+import threading
+import weakref
 import requests
-from typing import Dict, Any, Optional
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Union, Tuple
 from datetime import datetime
 from pathlib import Path
-from urllib.request import urlretrieve
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = HTTPX_AVAILABLE
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 # Add parent directory to path for shared utilities
 import sys
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+_REPO_ROOT = str(Path(__file__).parent.parent.parent)
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
 
 from shared.utils import (
     validate_string_input,
     get_secure_api_key,
     safe_log_api_call,
-    validate_theme
+    validate_theme,
+    build_http_session,
+    get_retry_after,
+    backoff_delay,
+    json_dumps,
+    json_loads,
+    CircuitBreaker,
+    CircuitOpenError,
+    SingleFlight
 )
 
+# Errors raised by the API client, whichever one is in use
+_API_ERRORS = (requests.RequestException, httpx.HTTPError) if HTTPX_AVAILABLE else (requests.RequestException,)
+
+# Errors that indicate Mubert is unreachable or overloaded. HTTP errors are
+# only raised through the breaker for 5xx and 429 responses; other client
+# errors say nothing about the service's health
+_OUTAGE_ERRORS = (
+    (requests.ConnectionError, requests.Timeout, requests.HTTPError,
+     requests.exceptions.RetryError, httpx.TransportError, httpx.HTTPStatusError)
+    if HTTPX_AVAILABLE else
+    (requests.ConnectionError, requests.Timeout, requests.HTTPError,
+     requests.exceptions.RetryError)
+)
+
+# Shared by all instances: once Mubert keeps failing, calls are rejected
+# immediately instead of each one waiting out its timeouts
+_mubert_breaker = CircuitBreaker("Mubert", fail_max=5, reset_timeout=30.0, failure_types=_OUTAGE_ERRORS)
+
+# Suffix for downloaded file names so downloads within the same second
+# never overwrite each other (next() on a count is atomic under the GIL)
+_file_counter = itertools.count()
+
+
+class _StatusPoller:
+    """
+    Polls the status of every track awaited on one event loop from a single task.
+    
+    Each track keeps its own backoff schedule, but all tracks that are due
+    within BATCH_WINDOW seconds of each other are checked together in one
+    tick, so N concurrent generations share ticks (and, with HTTP/2, one
+    connection) instead of running N independent polling loops.
+    """
+    
+    BATCH_WINDOW = 0.5
+    
+    def __init__(self, generator: "MubertMusicGenerator"):
+        self._generator = generator
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+    
+    def register(
+        self,
+        track_id: str,
+        polling_interval: float,
+        max_poll_interval: float
+    ) -> asyncio.Future:
+        """
+        Start polling track_id.
+        
+        Returns:
+            Future resolved with the download URL, or with the error that
+            ended polling. Cancelling it stops polling the track.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending[track_id] = {
+            "future": future,
+            "polling_interval": polling_interval,
+            "max_poll_interval": max_poll_interval,
+            "polls": 0,
+            "errors": 0,
+            "due": loop.time()
+        }
+        
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+        self._wakeup.set()
+        return future
+    
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while self._pending:
+                # Drop tracks whose waiters gave up
+                for track_id in [t for t, e in self._pending.items() if e["future"].done()]:
+                    del self._pending[track_id]
+                if not self._pending:
+                    break
+                
+                wait = min(e["due"] for e in self._pending.values()) - loop.time()
+                if wait > 0:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                        continue
+                    except asyncio.TimeoutError:
+                        pass
+                
+                cutoff = loop.time() + self.BATCH_WINDOW
+                due = [t for t, e in self._pending.items() if e["due"] <= cutoff]
+                for track_id in due:
+                    self._pending[track_id]["polls"] += 1
+                
+                results = await asyncio.gather(
+                    *(asyncio.to_thread(
+                        self._generator._poll_step,
+                        track_id,
+                        self._pending[track_id]["polls"],
+                        self._pending[track_id]["errors"]
+                    ) for track_id in due),
+                    return_exceptions=True
+                )
+                
+                for track_id, outcome in zip(due, results):
+                    entry = self._pending.get(track_id)
+                    if entry is None or entry["future"].done():
+                        self._pending.pop(track_id, None)
+                        continue
+                    
+                    if isinstance(outcome, BaseException):
+                        entry["future"].set_exception(outcome)
+                        del self._pending[track_id]
+                        continue
+                    
+                    download_url, hinted_delay, entry["errors"] = outcome
+                    if download_url is not None:
+                        logger.info("Generation completed after %s polls", entry["polls"])
+                        entry["future"].set_result(download_url)
+                        del self._pending[track_id]
+                        continue
+                    
+                    entry["due"] = loop.time() + self._generator._next_poll_delay(
+                        entry["polling_interval"],
+                        entry["polls"] - 1,
+                        entry["max_poll_interval"],
+                        hinted_delay
+                    )
+        except Exception as e:
+            # Never leave waiters hanging on a dead poller
+            for entry in self._pending.values():
+                if not entry["future"].done():
+                    entry["future"].set_exception(e)
+            self._pending.clear()
+            raise
+
 
 class MubertMusicGenerator:
     """
@@ -52,6 +213,23 @@ class MubertMusicGenerator:
     """
     
     BASE_URL = "https://api.mubert.com/v1"
+    # While waiting for a webhook, check status this often as a safety net
+    # in case the callback is lost
+    WEBHOOK_SAFETY_POLL_INTERVAL = 15
+    # Callbacks that arrive before their generation starts waiting are
+    # remembered this long, and at most this many are kept
+    EARLY_WEBHOOK_TTL = 300
+    MAX_EARLY_WEBHOOKS = 256
+    # Give up polling after this many status requests fail in a row
+    MAX_CONSECUTIVE_POLL_ERRORS = 5
+    # Upper bound of the random jitter added to each poll delay, in seconds
+    POLL_JITTER = 0.25
+    # Buffer size for streaming downloads to disk
+    DOWNLOAD_CHUNK_SIZE = 1 << 20
+    
+    # Shared by all instances and created on first use; see _get_download_pool
+    _download_pool: Optional[ThreadPoolExecutor] = None
+    _download_pool_lock = threading.Lock()
     
     # Mubert styles
     STYLES = {
@@ -94,6 +272,16 @@ class MubertMusicGenerator:
         "cute": "cute"
     }
     
+    # Precomputed for validation
+    _STYLE_KEYS = frozenset(STYLES)
+    _MOOD_KEYS = frozenset(MOODS)
+    _STYLES_AVAILABLE_MSG = ", ".join(STYLES)
+    _MOODS_AVAILABLE_MSG = ", ".join(MOODS)
+    
+    # Text longer than this is truncated before sending; far longer input is rejected
+    _TEXT_LIMIT = 100
+    _TEXT_MAX_INPUT = 500
+    
     def __init__(self):
         """Initialize the Mubert Music Generator skill."""
         self.api_key = get_secure_api_key("MUBERT_API_KEY")
@@ -101,10 +289,61 @@ class MubertMusicGenerator:
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        # Pooled keep-alive client shared by all API calls. With httpx and h2
+        # installed, concurrent status polls multiplex over one HTTP/2 connection
+        if HTTPX_AVAILABLE:
+            self.session = httpx.Client(
+                headers=self.headers,
+                timeout=httpx.Timeout(30.0, connect=5.0),
+                transport=httpx.HTTPTransport(
+                    http2=HTTP2_AVAILABLE,
+                    retries=3,
+                    limits=httpx.Limits(max_keepalive_connections=10, max_connections=20)
+                )
+            )
+        else:
+            self.session = build_http_session(
+                headers=self.headers,
+                pool_connections=4,
+                pool_maxsize=16,
+                retries=3,
+                backoff_factor=0.3,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=("GET", "POST")
+            )
+        # Separate pool for audio downloads so the API key is never sent
+        # to the CDN hosting the generated files
+        self._download_session = build_http_session(pool_connections=4, pool_maxsize=8)
+        # fsync downloaded files only when explicitly requested
+        self.fsync_downloads = bool(os.getenv("MUBERT_FSYNC"))
         
         self.output_dir = Path(os.getenv("MUSIC_OUTPUT_DIR", "./generated_music"))
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
+        # track_id -> event set when a callback for an awaited track arrives
+        self._webhook_waiters: Dict[str, threading.Event] = {}
+        # track_id -> arrival time of callbacks received before their waiter
+        self._early_webhooks: "OrderedDict[str, float]" = OrderedDict()
+        self._webhook_lock = threading.Lock()
+        
+        # event loop -> _StatusPoller shared by async generations on that loop
+        self._pollers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _StatusPoller]" = weakref.WeakKeyDictionary()
+        self._pollers_lock = threading.Lock()
+        
+        # Concurrent identical requests share a single paid track
+        self._jobs = SingleFlight()
+    
+    def close(self) -> None:
+        """Release pooled HTTP connections."""
+        self.session.close()
+        self._download_session.close()
+    
+    def __enter__(self) -> "MubertMusicGenerator":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+        
     def generate_music(
         self,
         style: str,
@@ -113,7 +352,10 @@ class MubertMusicGenerator:
         text: Optional[str] = None,
         intensity: int = 5,
         polling_interval: int = 1,
-        max_wait_time: int = 60
+        max_wait_time: int = 60,
+        webhook_url: Optional[str] = None,
+        max_poll_interval: float = 8,
+        download: bool = True
     ) -> Dict[str, Any]:
         """
         Generate music using Mubert.
@@ -124,27 +366,34 @@ class MubertMusicGenerator:
             mood: Optional mood tag (see MOODS)
             text: Optional text description for enhanced generation
             intensity: Intensity level (0-10)
-            polling_interval: Seconds between status checks
+            polling_interval: Seconds before the first status check; the
+                interval then grows exponentially
             max_wait_time: Maximum seconds to wait
+            webhook_url: Optional callback URL Mubert notifies on completion.
+                The receiving application must pass the callback body to
+                handle_webhook. Without it, status is polled.
+            max_poll_interval: Upper bound for the delay between status checks
+            download: Download the audio before returning. If False, the
+                download runs in a background pool and the result carries a
+                "file_path_future" instead of "file_path"; resolve it with
+                wait_for_download.
             
         Returns:
-            Dictionary with generation results
+            Dictionary with generation results. Identical requests made while
+            one is in flight share its track and receive the same result.
         """
         
-        validate_string_input(style, "style", min_length=3, max_length=50)
-        
-        if not 10 <= duration <= 600:
-            raise ValueError("Duration must be between 10 and 600 seconds")
-        if not 0 <= intensity <= 10:
-            raise ValueError("Intensity must be between 0 and 10")
+        started_at = datetime.now().isoformat()
+        self._validate_request(style, duration, intensity, mood, text)
         
-        # Normalize style
-        style_lower = style.lower()
-        if style_lower not in self.STYLES:
-            available = ", ".join(self.STYLES.keys())
-            raise ValueError(f"Unknown style '{style}'. Available: {available}")
+        job_key = self._job_key(style, duration, mood, intensity, text)
+        job, is_leader = self._jobs.claim(job_key)
+        if not is_leader:
+            logger.info("Joining in-flight Mubert generation with style: %s", style)
+            result = dict(job.result())
+            return self.wait_for_download(result) if download else result
         
-        logger.info(f"Starting Mubert music generation with style: {style}")
+        logger.info("Starting Mubert music generation with style: %s", style)
         
         try:
             # Create generation request
@@ -153,56 +402,319 @@ class MubertMusicGenerator:
                 duration=duration,
                 mood=mood,
                 text=text,
-                intensity=intensity
+                intensity=intensity,
+                webhook_url=webhook_url
             )
             
-            logger.info(f"Generation created with track ID: {track_id}")
+            logger.info("Generation created with track ID: %s", track_id)
+            
+            # Wait for completion
+            if webhook_url:
+                download_url = self._wait_for_webhook(
+                    track_id=track_id,
+                    max_wait_time=max_wait_time
+                )
+            else:
+                download_url = self._poll_for_completion(
+                    track_id=track_id,
+                    polling_interval=polling_interval,
+                    max_wait_time=max_wait_time,
+                    max_poll_interval=max_poll_interval
+                )
+            
+            # Download audio, or hand it to the pool so the caller can move on
+            file_path = None
+            file_size = None
+            file_path_future = None
+            if download:
+                file_path, file_size = self._download_audio(
+                    download_url=download_url,
+                    track_id=track_id
+                )
+            else:
+                file_path_future = self._get_download_pool().submit(
+                    self._download_audio, download_url, track_id
+                )
             
-            # Poll for completion
-            download_url = self._poll_for_completion(
+            result = self._build_result(
                 track_id=track_id,
-                polling_interval=polling_interval,
-                max_wait_time=max_wait_time
+                download_url=download_url,
+                file_path=file_path,
+                file_size=file_size,
+                file_path_future=file_path_future,
+                style=style,
+                duration=duration,
+                mood=mood,
+                text=text,
+                intensity=intensity,
+                started_at=started_at
             )
+            job.set_result(result)
+            return result
             
-            # Download audio
-            file_path = self._download_audio(
-                download_url=download_url,
-                track_id=track_id
+        except Exception as e:
+            self._log_failure(e, style)
+            job.set_exception(e)
+            raise
+        finally:
+            self._jobs.release(job_key, job)
+    
+    async def agenerate_music(
+        self,
+        style: str,
+        duration: int = 60,
+        mood: Optional[str] = None,
+        text: Optional[str] = None,
+        intensity: int = 5,
+        polling_interval: int = 1,
+        max_wait_time: int = 60,
+        webhook_url: Optional[str] = None,
+        max_poll_interval: float = 8,
+        download: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Async variant of generate_music.
+        
+        Each HTTP call runs in a worker thread over the pooled session, while
+        the waits between status polls are awaited on the event loop. Many
+        tracks can therefore be in flight at once without a thread blocked
+        per job.
+        
+        Args and return value are the same as for generate_music.
+        """
+        
+        started_at = datetime.now().isoformat()
+        self._validate_request(style, duration, intensity, mood, text)
+        
+        job_key = self._job_key(style, duration, mood, intensity, text)
+        job, is_leader = self._jobs.claim(job_key)
+        if not is_leader:
+            logger.info("Joining in-flight Mubert generation with style: %s", style)
+            # Shielded so a cancelled follower does not cancel the shared job
+            result = dict(await asyncio.shield(asyncio.wrap_future(job)))
+            if download:
+                result = await asyncio.to_thread(self.wait_for_download, result)
+            return result
+        
+        logger.info("Starting async Mubert music generation with style: %s", style)
+        
+        try:
+            track_id = await asyncio.to_thread(
+                self._create_generation,
+                style=style,
+                duration=duration,
+                mood=mood,
+                text=text,
+                intensity=intensity,
+                webhook_url=webhook_url
             )
+            logger.info("Generation created with track ID: %s", track_id)
             
-            result = {
-                "track_id": track_id,
-                "download_url": download_url,
-                "status": "completed",
-                "duration": duration,
-                "style": style,
-                "file_path": str(file_path),
-                "timestamp": datetime.now().isoformat(),
-                "metadata": {
-                    "mood": mood,
-                    "intensity": intensity,
-                    "text_description": text,
-                    "model": "Mubert",
-                    "file_size": file_path.stat().st_size if file_path.exists() else 0
-                }
-            }
+            if webhook_url:
+                download_url = await asyncio.to_thread(
+                    self._wait_for_webhook,
+                    track_id=track_id,
+                    max_wait_time=max_wait_time
+                )
+            else:
+                download_url = await self._apoll_for_completion(
+                    track_id=track_id,
+                    polling_interval=polling_interval,
+                    max_wait_time=max_wait_time,
+                    max_poll_interval=max_poll_interval
+                )
             
-            safe_log_api_call("Mubert", "generate_music", "success", {
-                "track_id": track_id,
-                "style": style,
-                "duration": duration
-            })
+            file_path = None
+            file_size = None
+            file_path_future = None
+            if download:
+                file_path, file_size = await asyncio.to_thread(
+                    self._download_audio,
+                    download_url=download_url,
+                    track_id=track_id
+                )
+            else:
+                file_path_future = self._get_download_pool().submit(
+                    self._download_audio, download_url, track_id
+                )
             
+            result = self._build_result(
+                track_id=track_id,
+                download_url=download_url,
+                file_path=file_path,
+                file_size=file_size,
+                file_path_future=file_path_future,
+                style=style,
+                duration=duration,
+                mood=mood,
+                text=text,
+                intensity=intensity,
+                started_at=started_at
+            )
+            job.set_result(result)
             return result
             
         except Exception as e:
-            logger.error(f"Mubert music generation failed: {str(e)}", exc_info=True)
-            safe_log_api_call("Mubert", "generate_music", "error", {
-                "error": str(e),
-                "style": style
-            })
+            self._log_failure(e, style)
+            job.set_exception(e)
             raise
+        finally:
+            self._jobs.release(job_key, job)
+    
+    async def generate_many(
+        self,
+        specs: List[Dict[str, Any]]
+    ) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Generate several tracks concurrently.
+        
+        Args:
+            specs: Keyword arguments for agenerate_music, one dict per track
+            
+        Returns:
+            Results in the order of specs; a failed generation is returned
+            as its exception instead of cancelling the others
+        """
+        return await asyncio.gather(
+            *(self.agenerate_music(**spec) for spec in specs),
+            return_exceptions=True
+        )
+    
+    @staticmethod
+    def _job_key(
+        style: str,
+        duration: int,
+        mood: Optional[str],
+        intensity: int,
+        text: Optional[str]
+    ) -> str:
+        """Build the key under which identical generation requests are coalesced."""
+        canonical = f"{style.lower()}|{duration}|{(mood or '').lower()}|{intensity}|{text or ''}"
+        return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+    
+    def _validate_request(
+        self,
+        style: str,
+        duration: int,
+        intensity: int,
+        mood: Optional[str] = None,
+        text: Optional[str] = None
+    ) -> None:
+        """Validate generation parameters."""
+        
+        validate_string_input(style, "style", min_length=3, max_length=50)
+        
+        if not 10 <= duration <= 600:
+            raise ValueError("Duration must be between 10 and 600 seconds")
+        if not 0 <= intensity <= 10:
+            raise ValueError("Intensity must be between 0 and 10")
+        
+        # Normalize style
+        style_lower = style.lower()
+        if style_lower not in self._STYLE_KEYS:
+            raise ValueError(f"Unknown style '{style}'. Available: {self._STYLES_AVAILABLE_MSG}")
+        
+        if mood:
+            validate_string_input(mood, "mood", min_length=1, max_length=50)
+            if mood.lower() not in self._MOOD_KEYS:
+                raise ValueError(f"Unknown mood '{mood}'. Available: {self._MOODS_AVAILABLE_MSG}")
+        
+        if text:
+            validate_string_input(text, "text", min_length=1, max_length=self._TEXT_MAX_INPUT)
+    
+    def _build_result(
+        self,
+        track_id: str,
+        download_url: str,
+        file_path: Optional[Path],
+        file_size: Optional[int],
+        style: str,
+        duration: int,
+        mood: Optional[str],
+        text: Optional[str],
+        intensity: int,
+        started_at: str,
+        file_path_future: Optional[Future] = None
+    ) -> Dict[str, Any]:
+        """Assemble the generation result and log the successful call."""
+        
+        result = {
+            "track_id": track_id,
+            "download_url": download_url,
+            "status": "completed",
+            "duration": duration,
+            "style": style,
+            "file_path": str(file_path) if file_path is not None else None,
+            "timestamp": started_at,
+            "metadata": {
+                "mood": mood,
+                "intensity": intensity,
+                "text_description": text,
+                "model": "Mubert",
+                "file_size": file_size
+            }
+        }
+        
+        if file_path_future is not None:
+            result["file_path_future"] = file_path_future
+        
+        safe_log_api_call("Mubert", "generate_music", "success", {
+            "track_id": track_id,
+            "style": style,
+            "duration": duration
+        })
+        
+        return result
+    
+    @classmethod
+    def _get_download_pool(cls) -> ThreadPoolExecutor:
+        """Return the shared download pool, sized by MUBERT_DL_WORKERS."""
+        if cls._download_pool is None:
+            with cls._download_pool_lock:
+                if cls._download_pool is None:
+                    cls._download_pool = ThreadPoolExecutor(
+                        max_workers=int(os.getenv("MUBERT_DL_WORKERS", "8")),
+                        thread_name_prefix="mubert-download"
+                    )
+        return cls._download_pool
+    
+    def wait_for_download(
+        self,
+        result: Dict[str, Any],
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Wait for a background download started with download=False.
+        
+        Args:
+            result: Result returned by generate_music or agenerate_music
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+            
+        Returns:
+            The result with "file_path" and "file_size" filled in; results
+            that were already downloaded are returned unchanged
+            
+        Raises:
+            Exception: Whatever the download raised
+        """
+        file_path_future = result.get("file_path_future")
+        if file_path_future is None:
+            return result
+        
+        file_path, file_size = file_path_future.result(timeout=timeout)
+        del result["file_path_future"]
+        result["file_path"] = str(file_path)
+        result["metadata"] = {**result["metadata"], "file_size": file_size}
+        return result
+    
+    def _log_failure(self, error: Exception, style: str) -> None:
+        """Log a failed generation."""
+        
+        logger.error("Mubert music generation failed: %s", error, exc_info=True)
+        safe_log_api_call("Mubert", "generate_music", "error", {
+            "error": str(error),
+            "style": style
+        })
     
     def _create_generation(
         self,
@@ -210,7 +722,8 @@ class MubertMusicGenerator:
         duration: int,
         mood: Optional[str],
         text: Optional[str],
-        intensity: int
+        intensity: int,
+        webhook_url: Optional[str] = None
     ) -> str:
         """Create a generation request on Mubert."""
         
@@ -220,22 +733,27 @@ class MubertMusicGenerator:
             "intensity": intensity
         }
         
-        if mood and mood.lower() in self.MOODS:
+        # mood and text were validated by _validate_request
+        if mood:
             payload["tags"] = [mood.lower()]
         
         if text:
-            payload["text"] = text[:100]  # Limit text length
+            payload["text"] = text[:self._TEXT_LIMIT]
+        
+        if webhook_url:
+            payload["webhook_url"] = webhook_url
+        
+        # Serialized once to bytes (orjson when installed); the
+        # Content-Type header is already set on the client
+        body = json_dumps(payload)
         
         try:
-            response = requests.post(
-                f"{self.BASE_URL}/generate",
-                json=payload,
-                headers=self.headers,
-                timeout=30
-            )
-            response.raise_for_status()
+            if HTTPX_AVAILABLE:
+                response = self._api_request("POST", "/generate", content=body, timeout=30)
+            else:
+                response = self._api_request("POST", "/generate", data=body, timeout=30)
             
-            data = response.json()
+            data = json_loads(response.content)
             
             if not data.get("success"):
                 raise RuntimeError(data.get("error", "Generation creation failed"))
@@ -243,64 +761,298 @@ class MubertMusicGenerator:
             track_id = data.get("track_id") or data.get("id")
             return track_id
             
-        except requests.RequestException as e:
-            logger.error(f"Failed to create generation: {str(e)}")
+        except _API_ERRORS as e:
+            logger.error("Failed to create generation: %s", e)
             raise
     
+    def _next_poll_delay(
+        self,
+        polling_interval: float,
+        attempt: int,
+        max_poll_interval: float,
+        hinted_delay: Optional[float]
+    ) -> float:
+        """
+        Compute the wait before the next status check.
+        
+        The delay starts at polling_interval and grows exponentially up to
+        max_poll_interval, plus a little jitter so concurrent jobs do not
+        poll in lockstep. A Retry-After hint from the API takes precedence.
+        """
+        if hinted_delay is not None:
+            return hinted_delay
+        delay = backoff_delay(polling_interval, attempt, max_delay=max_poll_interval)
+        return delay + random.uniform(0, self.POLL_JITTER)
+    
+    def _poll_step(
+        self,
+        track_id: str,
+        poll_count: int,
+        consecutive_errors: int
+    ) -> Tuple[Optional[str], Optional[float], int]:
+        """
+        Run one status check of a polling loop.
+        
+        Returns:
+            Tuple of (download URL or None, Retry-After hint, updated count
+            of consecutive failed checks)
+            
+        Raises:
+            requests.RequestException, httpx.HTTPError or ValueError: If
+                MAX_CONSECUTIVE_POLL_ERRORS checks have failed in a row
+                (ValueError for a malformed status body)
+        """
+        try:
+            download_url, hinted_delay = self._check_status(track_id, poll_count)
+            return download_url, hinted_delay, 0
+            
+        except (*_API_ERRORS, ValueError) as e:
+            consecutive_errors += 1
+            if consecutive_errors >= self.MAX_CONSECUTIVE_POLL_ERRORS:
+                logger.error("Giving up after %s failed status checks", consecutive_errors)
+                raise
+            logger.warning("Error polling status: %s", e)
+            response = getattr(e, "response", None)
+            hinted_delay = get_retry_after(response) if response is not None else None
+            return None, hinted_delay, consecutive_errors
+    
     def _poll_for_completion(
         self,
         track_id: str,
         polling_interval: int = 1,
-        max_wait_time: int = 60
+        max_wait_time: int = 60,
+        max_poll_interval: float = 8
     ) -> str:
-        """Poll Mubert API until generation is complete."""
+        """Poll Mubert API with exponential backoff until generation is complete."""
         
         start_time = time.time()
         poll_count = 0
+        consecutive_errors = 0
         
-        while time.time() - start_time < max_wait_time:
+        while True:
             poll_count += 1
+            download_url, hinted_delay, consecutive_errors = self._poll_step(
+                track_id, poll_count, consecutive_errors
+            )
+            if download_url is not None:
+                logger.info("Generation completed after %s polls", poll_count)
+                return download_url
             
-            try:
-                response = requests.get(
-                    f"{self.BASE_URL}/status/{track_id}",
-                    headers=self.headers,
-                    timeout=30
-                )
+            delay = self._next_poll_delay(
+                polling_interval, poll_count - 1, max_poll_interval, hinted_delay
+            )
+            remaining = max_wait_time - (time.time() - start_time)
+            if remaining <= 0:
+                break
+            time.sleep(min(delay, remaining))
+        
+        raise TimeoutError(f"Generation did not complete within {max_wait_time} seconds")
+    
+    async def _apoll_for_completion(
+        self,
+        track_id: str,
+        polling_interval: int = 1,
+        max_wait_time: int = 60,
+        max_poll_interval: float = 8
+    ) -> str:
+        """
+        Async counterpart of _poll_for_completion.
+        
+        Rather than running its own loop, the track is handed to the status
+        poller shared by all generations on the running event loop.
+        """
+        
+        future = self._get_status_poller().register(track_id, polling_interval, max_poll_interval)
+        try:
+            # On timeout wait_for cancels the future, which stops polling the track
+            return await asyncio.wait_for(future, timeout=max_wait_time)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Generation did not complete within {max_wait_time} seconds") from None
+    
+    def _get_status_poller(self) -> _StatusPoller:
+        """Return the status poller for the running event loop, creating it if needed."""
+        loop = asyncio.get_running_loop()
+        with self._pollers_lock:
+            poller = self._pollers.get(loop)
+            if poller is None:
+                poller = _StatusPoller(self)
+                self._pollers[loop] = poller
+            return poller
+    
+    def _check_status(
+        self,
+        track_id: str,
+        poll_count: int
+    ) -> Tuple[Optional[str], Optional[float]]:
+        """
+        Request the status of a track once.
+        
+        Returns:
+            Tuple of (download URL when the track is ready, otherwise None;
+            Retry-After hint in seconds, if the API sent one)
+            
+        Raises:
+            RuntimeError: If Mubert reports the generation as failed
+            requests.RequestException or httpx.HTTPError: If the status
+                request fails
+            CircuitOpenError: If Mubert calls are suspended after repeated
+                failures
+        """
+        response = self._api_request("GET", f"/status/{track_id}", timeout=30)
+        
+        data = json_loads(response.content)
+        
+        if data.get("status") == "ready":
+            return data.get("download_url"), None
+        
+        elif data.get("status") == "failed":
+            raise RuntimeError(f"Generation failed: {data.get('error', 'Unknown error')}")
+        
+        logger.info("Poll #%s: Status = %s", poll_count, data.get('status'))
+        return None, get_retry_after(response)
+    
+    def _api_request(self, method: str, path: str, **kwargs: Any):
+        """
+        Send an API request through the circuit breaker.
+        
+        Returns:
+            The response
+            
+        Raises:
+            requests.RequestException or httpx.HTTPError: If the request
+                fails or returns an error status
+            CircuitOpenError: If Mubert calls are suspended
+        """
+        def send():
+            response = self.session.request(method, f"{self.BASE_URL}{path}", **kwargs)
+            if response.status_code == 429 or response.status_code >= 500:
                 response.raise_for_status()
+            return response
+        
+        response = _mubert_breaker.call(send)
+        # Client errors are raised outside the breaker so they are not
+        # counted as failures
+        response.raise_for_status()
+        return response
+    
+    def _register_webhook_waiter(self, track_id: str) -> threading.Event:
+        """Start waiting for track_id, picking up a callback that came early."""
+        with self._webhook_lock:
+            event = threading.Event()
+            arrived = self._early_webhooks.pop(track_id, None)
+            if arrived is not None and time.monotonic() - arrived <= self.EARLY_WEBHOOK_TTL:
+                event.set()
+            self._webhook_waiters[track_id] = event
+            return event
+    
+    def handle_webhook(self, payload: Dict[str, Any]) -> bool:
+        """
+        Deliver a Mubert completion callback.
+        
+        Call this from the application's webhook endpoint with the decoded
+        JSON body. The callback only wakes the waiting generation, which
+        then confirms the result with an authenticated status request, so
+        a forged body cannot inject a download URL. A callback that
+        arrives before generate_music starts waiting is remembered for
+        EARLY_WEBHOOK_TTL seconds.
+        
+        Args:
+            payload: Callback body with the track_id
+            
+        Returns:
+            True if the payload carried a track ID and was accepted
+        """
+        track_id = payload.get("track_id") or payload.get("id")
+        if not track_id:
+            return False
+        track_id = str(track_id)
+        
+        with self._webhook_lock:
+            event = self._webhook_waiters.get(track_id)
+            if event is not None:
+                event.set()
+                return True
+            
+            now = time.monotonic()
+            while self._early_webhooks:
+                oldest, arrived = next(iter(self._early_webhooks.items()))
+                if now - arrived <= self.EARLY_WEBHOOK_TTL and len(self._early_webhooks) < self.MAX_EARLY_WEBHOOKS:
+                    break
+                del self._early_webhooks[oldest]
+            self._early_webhooks[track_id] = now
+            self._early_webhooks.move_to_end(track_id)
+        return True
+    
+    def _wait_for_webhook(self, track_id: str, max_wait_time: int = 60) -> str:
+        """
+        Wait for the completion webhook of a track.
+        
+        Status is requested whenever a callback arrives, and every
+        WEBHOOK_SAFETY_POLL_INTERVAL seconds otherwise, so a lost callback
+        costs at most one interval.
+        """
+        event = self._register_webhook_waiter(track_id)
+        deadline = time.monotonic() + max_wait_time
+        checks = 0
+        
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
                 
-                data = response.json()
-                
-                if data.get("status") == "ready":
-                    download_url = data.get("download_url")
-                    logger.info(f"Generation completed after {poll_count} polls")
-                    return download_url
-                
-                elif data.get("status") == "failed":
-                    raise RuntimeError(f"Generation failed: {data.get('error', 'Unknown error')}")
-                
-                logger.info(f"Poll #{poll_count}: Status = {data.get('status')}")
-                time.sleep(polling_interval)
+                notified = event.wait(min(self.WEBHOOK_SAFETY_POLL_INTERVAL, remaining))
+                event.clear()
                 
-            except requests.RequestException as e:
-                logger.warning(f"Error polling status: {str(e)}")
-                time.sleep(polling_interval)
+                checks += 1
+                try:
+                    download_url, _ = self._check_status(track_id, checks)
+                    if download_url is not None:
+                        if notified:
+                            logger.info("Generation completed via webhook for track %s", track_id)
+                        else:
+                            logger.info("Generation completed (webhook not received)")
+                        return download_url
+                except (*_API_ERRORS, CircuitOpenError, ValueError) as e:
+                    logger.warning("Error polling status: %s", e)
+        finally:
+            with self._webhook_lock:
+                self._webhook_waiters.pop(track_id, None)
         
         raise TimeoutError(f"Generation did not complete within {max_wait_time} seconds")
     
-    def _download_audio(self, download_url: str, track_id: str) -> Path:
-        """Download generated audio file."""
+    def _download_audio(self, download_url: str, track_id: str) -> Tuple[Path, int]:
+        """
+        Download generated audio file.
+        
+        Returns:
+            Tuple of (path of the saved file, bytes written)
+        """
         
         try:
-            file_path = self.output_dir / f"mubert_{track_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.wav"
+            file_path = self.output_dir / f"mubert_{track_id}_{time.strftime('%Y%m%d_%H%M%S')}_{next(_file_counter)}.wav"
             
-            urlretrieve(download_url, file_path)
+            # Stream to disk so the full file is never held in memory
+            with self._download_session.get(download_url, stream=True, timeout=(5, 120)) as response:
+                response.raise_for_status()
+                
+                content_length = response.headers.get("Content-Length")
+                if content_length:
+                    logger.info("Downloading %s bytes for track %s", content_length, track_id)
+                
+                response.raw.decode_content = True
+                with open(file_path, "wb") as f:
+                    shutil.copyfileobj(response.raw, f, length=self.DOWNLOAD_CHUNK_SIZE)
+                    file_size = f.tell()
+                    if self.fsync_downloads:
+                        f.flush()
+                        os.fsync(f.fileno())
             
-            logger.info(f"Audio saved to {file_path}")
-            return file_path
+            logger.info("Audio saved to %s", file_path)
+            return file_path, file_size
             
-        except Exception as e:
-            logger.error(f"Failed to download audio: {str(e)}")
+        except requests.RequestException as e:
+            logger.error("Failed to download audio: %s", e)
             raise
     
     def execute_skill(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -324,7 +1076,9 @@ class MubertMusicGenerator:
                 text=input_data.get("text"),
                 intensity=input_data.get("intensity", 5),
                 polling_interval=input_data.get("polling_interval", 1),
-                max_wait_time=input_data.get("max_wait_time", 60)
+                max_wait_time=input_data.get("max_wait_time", 60),
+                webhook_url=input_data.get("webhook_url"),
+                max_poll_interval=input_data.get("max_poll_interval", 8)
             )
             
             return {
@@ -332,13 +1086,22 @@ class MubertMusicGenerator:
                 "data": result
             }
             
+        except CircuitOpenError as e:
+            logger.error("Skill execution failed: %s", e)
+            return self._error("upstream_unavailable", str(e))
         except Exception as e:
-            logger.error(f"Skill execution failed: {str(e)}", exc_info=True)
-            return {
-                "status": "error",
-                "error": str(e),
-                "error_type": type(e).__name__
-            }
+            logger.error("Skill execution failed: %s", e, exc_info=True)
+            return self._error(type(e).__name__, str(e))
+    
+    @staticmethod
+    def _error(error_type: str, message: str, **extra: Any) -> Dict[str, Any]:
+        """Build the error result returned by execute_skill."""
+        return {
+            "status": "error",
+            "error": message,
+            "error_type": error_type,
+            **extra
+        }
     
     @staticmethod
     def list_styles() -> Dict[str, str]:
@@ -371,6 +1134,7 @@ def get_skill_info() -> Dict[str, Any]:
             "duration": "integer (10-600 seconds)",
             "mood": "string (optional, see MOODS)",
             "text": "string (optional, additional description)",
-            "intensity": "integer (0-10)"
+            "intensity": "integer (0-10)",
+            "webhook_url": "string (optional, completion callback; see handle_webhook)"
         }
     }
@@ -5,30 +5,81 @@ Orchestrates the complete workflow: theme -> ChatGPT prompt -> Suno music genera
 
 import logging
 import json
+import csv
 import sys
 import os
-from typing import Dict, Any
+import time
+import asyncio
+import threading
+from typing import Dict, Any, List, Optional
 
 # Add parent directory to path for imports
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+_SKILLS_DIR = os.path.join(os.path.dirname(__file__), '..')
+if _SKILLS_DIR not in sys.path:
+    sys.path.insert(0, _SKILLS_DIR)
 
 from shared.utils import (
     ValidationError,
     SecurityError,
     validate_theme,
     safe_log_api_call,
-    get_timestamp
+    get_timestamp,
+    CircuitBreaker,
+    CircuitOpenError,
+    run_coroutine_sync
 )
 
 # Import the individual skills
-from chatgpt_prompt_generator.skill import ChatGPTPromptGenerator
+from chatgpt_prompt_generator.skill import ChatGPTPromptGenerator, LLMCache
 from suno_music_generator.skill import SunoAIMusicGenerator
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+
+
+# Errors caused by the caller's input rather than by a failure
+_CLIENT_ERROR_TYPES = frozenset({"missing_parameter", "validation_error", "security_error"})
+
+
+def _error(
+    error_type: str,
+    message: str,
+    timestamp: Optional[str] = None,
+    step: Optional[str] = None,
+    **extra: Any
+) -> Dict[str, Any]:
+    """
+    Log a failed orchestration and build its error result.
+    
+    Client input errors are logged at warning level, everything else at
+    error level.
+    
+    Args:
+        error_type: Machine-readable error category
+        message: Human-readable error message
+        timestamp: Timestamp for the result; defaults to now
+        step: Workflow step that failed, if any
+        **extra: Additional fields for the result
+        
+    Returns:
+        Error result dictionary
+    """
+    details = {"error_type": error_type, "error": message}
+    if step:
+        details["step"] = step
+    safe_log_api_call(
+        "MusicOrchestrator",
+        "generate_from_theme",
+        "error",
+        details,
+        level=logging.WARNING if error_type in _CLIENT_ERROR_TYPES else None
+    )
+    return {
+        "status": "error",
+        "error_type": error_type,
+        "message": message,
+        "timestamp": timestamp or get_timestamp(),
+        **extra
+    }
 
 
 class MusicGenerationOrchestrator:
@@ -47,9 +98,23 @@ class MusicGenerationOrchestrator:
         try:
             self.chatgpt_generator = ChatGPTPromptGenerator()
             self.suno_generator = SunoAIMusicGenerator()
+            
+            # One breaker per provider so an outage of one does not block the other
+            self._chatgpt_breaker = CircuitBreaker("ChatGPT", fail_max=5, reset_timeout=30.0)
+            self._suno_breaker = CircuitBreaker("Suno", fail_max=5, reset_timeout=30.0)
+            
+            # Successful prompts are cached by normalized theme so repeated
+            # themes don't spend tokens; a TTL of 0 disables the cache
+            ttl = int(os.getenv('ORCHESTRATOR_PROMPT_CACHE_TTL', '3600'))
+            self._prompt_cache = LLMCache(ttl_seconds=ttl) if ttl > 0 else None
+            self._prompt_cache_file = os.getenv('ORCHESTRATOR_PROMPT_CACHE_FILE', '')
+            self._prompt_cache_file_lock = threading.Lock()
+            if self._prompt_cache is not None and self._prompt_cache_file:
+                self._load_prompt_cache()
+            
             logger.info("Music Generation Orchestrator initialized successfully")
         except SecurityError as e:
-            logger.error(f"Failed to initialize orchestrator: {e}")
+            logger.error("Failed to initialize orchestrator: %s", e)
             raise
     
     def generate_music_from_theme(self, theme: str, tags: str = None) -> Dict[str, Any]:
@@ -63,10 +128,11 @@ class MusicGenerationOrchestrator:
         Returns:
             Dictionary containing the music file URL or error details
         """
+        ts = get_timestamp()
         try:
             # Step 1: Validate theme
             validated_theme = validate_theme(theme)
-            logger.info(f"Starting music generation orchestration for theme: {validated_theme}")
+            logger.info("Starting music generation orchestration for theme: %s", validated_theme)
             
             safe_log_api_call(
                 "MusicOrchestrator",
@@ -77,45 +143,35 @@ class MusicGenerationOrchestrator:
             
             # Step 2: Generate prompt using ChatGPT
             logger.info("Step 1: Generating music prompt with ChatGPT...")
-            prompt_result = self.chatgpt_generator.generate_prompt(validated_theme)
+            prompt_result = self._generate_prompt(validated_theme)
             
             if prompt_result.get("status") != "success":
-                logger.error(f"Failed to generate prompt: {prompt_result.get('message')}")
-                safe_log_api_call(
-                    "MusicOrchestrator",
-                    "generate_from_theme",
-                    "error",
-                    {"step": "prompt_generation", "error": prompt_result.get("message")}
+                logger.error("Failed to generate prompt: %s", prompt_result.get('message'))
+                return _error(
+                    "prompt_generation_failed",
+                    f"Failed to generate prompt: {prompt_result.get('message')}",
+                    timestamp=ts,
+                    step="prompt_generation"
                 )
-                return {
-                    "status": "error",
-                    "error_type": "prompt_generation_failed",
-                    "message": f"Failed to generate prompt: {prompt_result.get('message')}",
-                    "timestamp": get_timestamp()
-                }
             
             generated_prompt = prompt_result.get("prompt")
-            logger.info(f"Step 1 Complete: Prompt generated successfully")
+            logger.info("Step 1 Complete: Prompt generated successfully")
             
             # Step 3: Generate music using Suno AI
             logger.info("Step 2: Generating music with Suno AI...")
-            music_result = self.suno_generator.generate_music(generated_prompt, tags)
+            music_result = self._call_provider(
+                self._suno_breaker, self.suno_generator.generate_music, generated_prompt, tags
+            )
             
             if music_result.get("status") != "success":
-                logger.error(f"Failed to generate music: {music_result.get('message')}")
-                safe_log_api_call(
-                    "MusicOrchestrator",
-                    "generate_from_theme",
-                    "error",
-                    {"step": "music_generation", "error": music_result.get("message")}
+                logger.error("Failed to generate music: %s", music_result.get('message'))
+                return _error(
+                    "music_generation_failed",
+                    f"Failed to generate music: {music_result.get('message')}",
+                    timestamp=ts,
+                    step="music_generation",
+                    prompt=generated_prompt
                 )
-                return {
-                    "status": "error",
-                    "error_type": "music_generation_failed",
-                    "message": f"Failed to generate music: {music_result.get('message')}",
-                    "prompt": generated_prompt,
-                    "timestamp": get_timestamp()
-                }
             
             logger.info("Step 2 Complete: Music generated successfully")
             
@@ -144,40 +200,201 @@ class MusicGenerationOrchestrator:
                         "metadata": music_result.get("metadata")
                     }
                 },
-                "timestamp": get_timestamp()
+                "timestamp": ts
             }
             
-            logger.info(f"Music generation orchestration completed successfully for theme: {validated_theme}")
+            logger.info("Music generation orchestration completed successfully for theme: %s", validated_theme)
             return result
             
         except ValidationError as e:
-            logger.error(f"Validation error in orchestration: {e}")
-            safe_log_api_call(
-                "MusicOrchestrator",
-                "generate_from_theme",
-                "error",
-                {"error_type": "validation"}
-            )
-            return {
-                "status": "error",
-                "error_type": "validation_error",
-                "message": str(e),
-                "timestamp": get_timestamp()
-            }
+            logger.warning("Validation error in orchestration: %s", e)
+            return _error("validation_error", str(e), timestamp=ts)
+        except CircuitOpenError as e:
+            logger.error("Upstream unavailable: %s", e)
+            return _error("upstream_unavailable", str(e), timestamp=ts)
         except Exception as e:
-            logger.error(f"Unexpected error in orchestration: {e}")
-            safe_log_api_call(
-                "MusicOrchestrator",
-                "generate_from_theme",
-                "error",
-                {"error_type": "unexpected"}
+            logger.error("Unexpected error in orchestration: %s", e)
+            return _error("unexpected", f"Unexpected error: {str(e)}", timestamp=ts)
+    
+    # Error results that indicate the provider is unreachable or failing
+    # (connection errors, timeouts, 5xx). Rate limits, authentication and
+    # input errors mean the provider answered and do not open a breaker
+    OUTAGE_ERROR_TYPES = frozenset({
+        "openai_unavailable", "connection_error", "timeout", "server_error"
+    })
+    
+    @classmethod
+    def _call_provider(cls, breaker: CircuitBreaker, func, *args: Any) -> Dict[str, Any]:
+        """
+        Call a sub-skill through its provider's circuit breaker.
+        
+        The sub-skills report failures as error results rather than
+        exceptions; only results whose error_type is in OUTAGE_ERROR_TYPES
+        count as provider failures.
+        
+        Raises:
+            CircuitOpenError: If the provider is suspended after repeated failures
+        """
+        breaker.before_call()
+        try:
+            result = func(*args)
+        except Exception:
+            breaker.record_failure()
+            raise
+        
+        if result.get("status") != "success" and result.get("error_type") in cls.OUTAGE_ERROR_TYPES:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return result
+    
+    def _prompt_cache_key(self, theme: str) -> str:
+        """Build the prompt cache key, ignoring case and whitespace differences"""
+        normalized = " ".join(theme.lower().split())
+        return LLMCache.make_key(theme=normalized, model=self.chatgpt_generator.model)
+    
+    def _generate_prompt(self, validated_theme: str) -> Dict[str, Any]:
+        """Generate a prompt with ChatGPT, reusing a cached prompt for repeated themes"""
+        if self._prompt_cache is None:
+            return self._call_provider(
+                self._chatgpt_breaker, self.chatgpt_generator.generate_prompt, validated_theme
             )
-            return {
-                "status": "error",
-                "error_type": "unexpected",
-                "message": f"Unexpected error: {str(e)}",
-                "timestamp": get_timestamp()
-            }
+        
+        key = self._prompt_cache_key(validated_theme)
+        cached = self._prompt_cache.get(key)
+        if cached is not None:
+            logger.info("Prompt cache hit for theme: %s", validated_theme)
+            return {**cached, "cached": True}
+        
+        prompt_result = self._call_provider(
+            self._chatgpt_breaker, self.chatgpt_generator.generate_prompt, validated_theme
+        )
+        if prompt_result.get("status") == "success":
+            self._prompt_cache.set(key, prompt_result)
+            if self._prompt_cache_file:
+                self._append_prompt_cache(key, prompt_result)
+        return prompt_result
+    
+    def _load_prompt_cache(self) -> None:
+        """
+        Load unexpired prompts from ORCHESTRATOR_PROMPT_CACHE_FILE.
+        
+        Each entry keeps only the rest of its original TTL. The file is then
+        rewritten with just the loaded rows, so expired and superseded rows
+        do not accumulate across restarts.
+        """
+        now = time.time()
+        rows: Dict[str, List[str]] = {}
+        total = 0
+        try:
+            with open(self._prompt_cache_file, newline='', encoding='utf-8') as f:
+                for row in csv.reader(f):
+                    total += 1
+                    if len(row) != 4:
+                        continue
+                    try:
+                        remaining = self._prompt_cache.ttl_seconds - (now - float(row[3]))
+                    except ValueError:
+                        continue
+                    if remaining > 0:
+                        # Later rows for the same key supersede earlier ones
+                        rows.pop(row[0], None)
+                        rows[row[0]] = row
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logger.warning("Could not read prompt cache file: %s", e)
+            return
+        
+        for key, prompt, model, created in rows.values():
+            self._prompt_cache.set(key, {
+                "status": "success",
+                "prompt": prompt,
+                "model": model,
+                "tokens_used": None
+            }, ttl_seconds=self._prompt_cache.ttl_seconds - (now - float(created)))
+        logger.info("Loaded %s cached prompts", len(rows))
+        
+        if len(rows) < total:
+            self._rewrite_prompt_cache(list(rows.values()))
+    
+    def _rewrite_prompt_cache(self, rows: List[List[str]]) -> None:
+        """Replace ORCHESTRATOR_PROMPT_CACHE_FILE with rows"""
+        tmp_path = f"{self._prompt_cache_file}.{os.getpid()}.tmp"
+        try:
+            with self._prompt_cache_file_lock:
+                with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+                    csv.writer(f).writerows(rows)
+                os.replace(tmp_path, self._prompt_cache_file)
+        except OSError as e:
+            logger.warning("Could not compact prompt cache file: %s", e)
+    
+    def _append_prompt_cache(self, key: str, prompt_result: Dict[str, Any]) -> None:
+        """Persist a generated prompt to ORCHESTRATOR_PROMPT_CACHE_FILE"""
+        row = [key, prompt_result.get("prompt", ""), prompt_result.get("model", ""), f"{time.time():.0f}"]
+        try:
+            with self._prompt_cache_file_lock:
+                directory = os.path.dirname(self._prompt_cache_file)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self._prompt_cache_file, 'a', newline='', encoding='utf-8') as f:
+                    csv.writer(f).writerow(row)
+        except OSError as e:
+            logger.warning("Could not write prompt cache file: %s", e)
+    
+    async def generate_many(
+        self,
+        themes: List[str],
+        tags: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run the theme -> prompt -> music workflow for several themes concurrently.
+        
+        Concurrency is bounded by ORCHESTRATOR_MAX_CONCURRENCY. While one
+        theme waits on Suno, others can already be generating prompts.
+        
+        Args:
+            themes: Music themes/topics
+            tags: Optional tags for Suno generation, applied to every theme
+            
+        Returns:
+            One result dictionary per theme, in input order, each shaped like
+            the return value of generate_music_from_theme
+        """
+        semaphore = asyncio.Semaphore(int(os.getenv('ORCHESTRATOR_MAX_CONCURRENCY', '8')))
+        
+        async def run(theme: str) -> Dict[str, Any]:
+            async with semaphore:
+                # The sub-skills are synchronous; run the workflow off the event loop
+                return await asyncio.to_thread(self.generate_music_from_theme, theme, tags)
+        
+        return await asyncio.gather(*(run(theme) for theme in themes))
+
+
+_orchestrator: Optional[MusicGenerationOrchestrator] = None
+_orchestrator_lock = threading.Lock()
+
+
+def _get_orchestrator() -> MusicGenerationOrchestrator:
+    """Return the shared MusicGenerationOrchestrator, creating it on first use"""
+    global _orchestrator
+    if _orchestrator is None:
+        with _orchestrator_lock:
+            if _orchestrator is None:
+                _orchestrator = MusicGenerationOrchestrator()
+    return _orchestrator
+
+
+def _reset_orchestrator() -> None:
+    """Drop the shared MusicGenerationOrchestrator so the next call rebuilds it
+    
+    Not installed on import; a host that reloads on SIGHUP can opt in with
+    shared.utils.register_reload_handler(_reset_orchestrator).
+    """
+    global _orchestrator
+    # No lock: when registered via register_reload_handler this runs as a
+    # signal handler and may interrupt a thread that holds the lock
+    _orchestrator = None
 
 
 def execute_skill(parameters: Dict[str, Any]) -> Dict[str, Any]:
@@ -185,45 +402,54 @@ def execute_skill(parameters: Dict[str, Any]) -> Dict[str, Any]:
     Execute the Music Generation Orchestrator skill.
     
     Args:
-        parameters: OpenClaw parameters containing 'theme'
+        parameters: OpenClaw parameters containing 'theme' (a string, or a
+            list of themes to process concurrently)
         
     Returns:
         Result dictionary with download link or error
     """
     try:
         if not parameters or 'theme' not in parameters:
+            return _error("missing_parameter", "Missing required parameter: 'theme'")
+        
+        tags = parameters.get('tags', None)
+        
+        orchestrator = _get_orchestrator()
+        
+        if isinstance(parameters['theme'], list):
+            results = run_coroutine_sync(orchestrator.generate_many(parameters['theme'], tags))
+            succeeded = sum(1 for r in results if r.get("status") == "success")
+            if succeeded == len(results):
+                status = "success"
+            elif succeeded:
+                status = "partial"
+            else:
+                status = "error"
             return {
-                "status": "error",
-                "error_type": "missing_parameter",
-                "message": "Missing required parameter: 'theme'",
+                "status": status,
+                "results": results,
+                "succeeded": succeeded,
+                "failed": len(results) - succeeded,
                 "timestamp": get_timestamp()
             }
         
-        tags = parameters.get('tags', None)
-        
-        orchestrator = MusicGenerationOrchestrator()
         result = orchestrator.generate_music_from_theme(parameters['theme'], tags)
         return result
         
     except SecurityError as e:
-        logger.error(f"Security error in skill execution: {e}")
-        return {
-            "status": "error",
-            "error_type": "security_error",
-            "message": str(e),
-            "timestamp": get_timestamp()
-        }
+        logger.warning("Security error in skill execution: %s", e)
+        return _error("security_error", str(e))
     except Exception as e:
-        logger.error(f"Unexpected error in skill execution: {e}")
-        return {
-            "status": "error",
-            "error_type": "execution_error",
-            "message": str(e),
-            "timestamp": get_timestamp()
-        }
+        logger.error("Unexpected error in skill execution: %s", e)
+        return _error("execution_error", str(e))
 
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
     # Test execution
     test_params = {"theme": "tropical beach sunset with ocean waves"}
     result = execute_skill(test_params)
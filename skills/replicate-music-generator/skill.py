@@ -9,14 +9,34 @@ Available Models: MusicGen, Jukebox, Riffusion, and more
 """
 
 import os
-import json
+import hmac
 import time
+import base64
+import hashlib
+import shutil
+import random
+import asyncio
 import logging
+import functools
+import threading
 import requests
-from typing import Dict, Any, Optional, List
+from dataclasses import dataclass, fields
+from types import MappingProxyType
+from typing import Dict, Any, Optional, List, Tuple, Mapping, Iterator, Union
 from datetime import datetime
 from pathlib import Path
-from urllib.request import urlretrieve
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = HTTPX_AVAILABLE
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 # Configure logging
 logging.basicConfig(
@@ -27,15 +47,85 @@ logger = logging.getLogger(__name__)
 
 # Add parent directory to path for shared utilities
 import sys
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+_REPO_ROOT = str(Path(__file__).parent.parent.parent)
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
 
 from shared.utils import (
     validate_string_input,
     get_secure_api_key,
     safe_log_api_call,
-    validate_theme
+    get_rate_limit_delay,
+    backoff_delay,
+    build_http_session,
+    MusicCache,
+    TokenBucket,
+    RequestLimiter,
+    SingleFlight,
+    prewarm_connection,
+    json_dumps,
+    json_loads
 )
 
+# Errors raised by the API client, whichever one is in use
+_API_ERRORS = (requests.RequestException, httpx.HTTPError) if HTTPX_AVAILABLE else (requests.RequestException,)
+
+# Failures that happen before a request reaches the server
+_CONNECT_ERRORS = (
+    (requests.ConnectionError, httpx.ConnectError, httpx.ConnectTimeout)
+    if HTTPX_AVAILABLE else (requests.ConnectionError,)
+)
+
+# Shared by all instances so concurrent jobs together stay within
+# Replicate's limits: at most REPLICATE_MAX_CONCURRENT requests in flight and
+# REPLICATE_RATE_LIMIT requests per minute. Creates held open by "Prefer:
+# wait" take one of REPLICATE_MAX_WAITING separate slots instead, so they
+# never starve status polls
+_replicate_bucket = TokenBucket(max_rate=int(os.getenv("REPLICATE_RATE_LIMIT", "60")), time_period=60.0)
+_replicate_limiter = RequestLimiter(
+    "Replicate", int(os.getenv("REPLICATE_MAX_CONCURRENT", "5")), _replicate_bucket
+)
+_replicate_wait_limiter = RequestLimiter(
+    "Replicate", int(os.getenv("REPLICATE_MAX_WAITING", "5")), _replicate_bucket
+)
+
+
+@functools.lru_cache(maxsize=1)
+def _build_headers(api_token: str) -> Dict[str, str]:
+    """Build the API request headers once per token and share them between instances."""
+    return {
+        "Authorization": f"Token {api_token}",
+        "Content-Type": "application/json"
+    }
+
+
+@dataclass(frozen=True)
+class ModelInfo(Mapping):
+    """
+    A model hosted on Replicate.
+    
+    Fields are attributes, and for code written against the earlier dict
+    of dicts, also keys: MODELS[name]["full_id"] still works.
+    """
+    id: str
+    full_id: str
+    description: str
+    best_for: str
+    
+    def __getitem__(self, key: str) -> str:
+        if key not in _MODEL_INFO_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(_MODEL_INFO_FIELDS)
+    
+    def __len__(self) -> int:
+        return len(_MODEL_INFO_FIELDS)
+
+
+_MODEL_INFO_FIELDS = tuple(f.name for f in fields(ModelInfo))
+
 
 class ReplicateMusicGenerator:
     """
@@ -52,28 +142,44 @@ class ReplicateMusicGenerator:
     """
     
     BASE_URL = "https://api.replicate.com/v1"
+    MAX_POLL_INTERVAL = 10
+    POLL_JITTER = 0.2
+    CREATE_RETRIES = 3
+    # Seconds the create request may block until the prediction finishes
+    # (Replicate's "Prefer: wait" header, at most 60; 0 disables)
+    SYNC_WAIT = 60
+    # While waiting for a webhook, check status this often as a safety net
+    WEBHOOK_SAFETY_POLL_INTERVAL = 15
+    # Webhooks whose signed timestamp is further off than this are rejected
+    WEBHOOK_TOLERANCE = 300
+    # Prediction states; anything not terminal means still running
+    SUCCEEDED_STATES = frozenset({"succeeded"})
+    FAILED_STATES = frozenset({"failed", "canceled"})
+    _KNOWN_STATES = SUCCEEDED_STATES | FAILED_STATES | frozenset({"starting", "processing"})
+    # Large copy chunks keep write() calls to a handful per file
+    DOWNLOAD_CHUNK_SIZE = 1 << 20
     
     # Available models on Replicate
-    MODELS = {
-        "musicgen": {
-            "id": "facebook/musicgen",
-            "full_id": "facebook/musicgen:7a76a47476de1ea6299c4d6fe53dd8c33ef1ae38490def302445efc6037f7b50",
-            "description": "Meta's MusicGen - highest quality text-to-audio",
-            "best_for": "professional compositions, diverse genres"
-        },
-        "musicgen-large": {
-            "id": "facebook/musicgen",
-            "full_id": "facebook/musicgen:1c39d20554b8435f94e85304fde3a19186530fde3c6c91729271d8a8ca2cdc66",
-            "description": "MusicGen Large model - improved quality and duration",
-            "best_for": "longer compositions, complex arrangements"
-        },
-        "stable-audio": {
-            "id": "stability-ai/stable-audio",
-            "full_id": "stability-ai/stable-audio:cae302ffa8b4a7b8b3c1e3e6c1e3e6c1e3e6c1e3e6c1e3e6c1e3e6c1e3e6",
-            "description": "Stability AI's audio generation model",
-            "best_for": "various audio effects and minimal music"
-        }
-    }
+    MODELS: Mapping[str, ModelInfo] = MappingProxyType({
+        "musicgen": ModelInfo(
+            id="facebook/musicgen",
+            full_id="facebook/musicgen:7a76a47476de1ea6299c4d6fe53dd8c33ef1ae38490def302445efc6037f7b50",
+            description="Meta's MusicGen - highest quality text-to-audio",
+            best_for="professional compositions, diverse genres"
+        ),
+        "musicgen-large": ModelInfo(
+            id="facebook/musicgen",
+            full_id="facebook/musicgen:1c39d20554b8435f94e85304fde3a19186530fde3c6c91729271d8a8ca2cdc66",
+            description="MusicGen Large model - improved quality and duration",
+            best_for="longer compositions, complex arrangements"
+        ),
+        "stable-audio": ModelInfo(
+            id="stability-ai/stable-audio",
+            full_id="stability-ai/stable-audio:cae302ffa8b4a7b8b3c1e3e6c1e3e6c1e3e6c1e3e6c1e3e6c1e3e6c1e3e6",
+            description="Stability AI's audio generation model",
+            best_for="various audio effects and minimal music"
+        )
+    })
     
     def __init__(self, model: str = "musicgen"):
         """
@@ -88,15 +194,65 @@ class ReplicateMusicGenerator:
         if self.model not in self.MODELS:
             available = ", ".join(self.MODELS.keys())
             raise ValueError(f"Unknown model '{model}'. Available: {available}")
+        self._model_info = self.MODELS[self.model]
         
-        self.headers = {
-            "Authorization": f"Token {self.api_token}",
-            "Content-Type": "application/json"
-        }
+        self.headers = _build_headers(self.api_token)
+        # Pooled keep-alive client shared by all API calls. With httpx and h2
+        # installed, concurrent status polls multiplex over one HTTP/2 connection
+        if HTTPX_AVAILABLE:
+            self.session = httpx.Client(
+                headers=self.headers,
+                timeout=httpx.Timeout(30.0, connect=5.0),
+                transport=httpx.HTTPTransport(
+                    http2=HTTP2_AVAILABLE,
+                    retries=3,
+                    limits=httpx.Limits(max_keepalive_connections=10, max_connections=20)
+                )
+            )
+        else:
+            # Idempotent requests are retried on 502/503/504
+            self.session = build_http_session(headers=self.headers, pool_connections=10, pool_maxsize=20)
+        # Separate pool for audio downloads so the API key is never sent
+        # to the CDN hosting the generated files
+        self._download_session = build_http_session(pool_connections=4, pool_maxsize=8)
         
         self.output_dir = Path(os.getenv("MUSIC_OUTPUT_DIR", "./generated_music"))
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
+        # Default completion callback URL; see handle_webhook
+        self.webhook_url = os.getenv("REPLICATE_WEBHOOK_URL")
+        # Signing secret for webhooks; fetched from the API on first use if unset
+        self._webhook_secret = os.getenv("REPLICATE_WEBHOOK_SECRET")
+        # prediction_id -> (event, payload) for predictions awaited via webhook
+        self._webhook_waiters: Dict[str, Dict[str, Any]] = {}
+        self._webhook_lock = threading.Lock()
+        
+        # Opt-in: with MUSIC_CACHE_TTL > 0, identical requests reuse an
+        # earlier download instead of generating a new track
+        cache_ttl = int(os.getenv("MUSIC_CACHE_TTL", "0"))
+        self._cache = MusicCache(
+            self.output_dir / MusicCache.DEFAULT_FILENAME, ttl_seconds=cache_ttl
+        ) if cache_ttl > 0 else None
+        
+        # Concurrent identical requests share a single paid job
+        self._jobs = SingleFlight()
+        
+        # Warm up the API connection; MUSIC_PREWARM=0 disables
+        prewarm_connection(self.session, self.BASE_URL)
+    
+    def close(self) -> None:
+        """Release pooled HTTP connections and the cache database."""
+        self.session.close()
+        self._download_session.close()
+        if self._cache is not None:
+            self._cache.close()
+    
+    def __enter__(self) -> "ReplicateMusicGenerator":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+        
     def generate_music(
         self,
         prompt: str,
@@ -105,7 +261,9 @@ class ReplicateMusicGenerator:
         top_k: int = 250,
         top_p: float = 0.0,
         polling_interval: int = 2,
-        max_wait_time: int = 600
+        max_wait_time: int = 600,
+        use_cache: bool = True,
+        webhook_url: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Generate music from a text prompt using Replicate.
@@ -118,6 +276,11 @@ class ReplicateMusicGenerator:
             top_p: Nucleus sampling parameter (0.0-1.0)
             polling_interval: Seconds between status checks
             max_wait_time: Maximum seconds to wait for completion
+            use_cache: Return an earlier generation with identical parameters,
+                or join one still in flight, instead of paying for a new one
+            webhook_url: Callback URL Replicate notifies on completion
+                (defaults to REPLICATE_WEBHOOK_URL). Deliver the callbacks
+                via handle_webhook. Without one, status is polled.
             
         Returns:
             Dictionary with music generation results including:
@@ -126,43 +289,52 @@ class ReplicateMusicGenerator:
             - status: Generation status
             - duration: Length of generated music
             - file_path: Local path where audio was saved
+            - cache_hit: Whether the result was served from the cache
             - metadata: Additional information
         """
         
-        # Validate inputs
-        validate_string_input(prompt, "prompt", min_length=5, max_length=500)
-        
-        if not 5 <= duration <= 30:
-            raise ValueError("Duration must be between 5 and 30 seconds for Replicate")
-        if not 0.0 <= temperature <= 1.0:
-            raise ValueError("Temperature must be between 0.0 and 1.0")
+        self._validate_request(prompt, duration, temperature)
         
-        logger.info(f"Starting Replicate music generation with model {self.model}")
-        logger.info(f"Prompt: {prompt[:100]}...")
+        cache_key = self._cache_key(prompt, duration, temperature, top_k, top_p)
+        job, is_leader = self._jobs.claim(cache_key, shared=use_cache)
+        if not is_leader:
+            logger.info("Joining in-flight Replicate prediction")
+            return dict(job.result())
         
         try:
-            # Get model information
-            model_info = self.MODELS[self.model]
-            model_full_id = model_info["full_id"]
+            if use_cache:
+                cached = self._get_cached(cache_key)
+                if cached is not None:
+                    job.set_result(cached)
+                    return cached
+            
+            logger.info(f"Starting Replicate music generation with model {self.model}")
+            logger.info(f"Prompt: {prompt[:100]}...")
             
-            # Create prediction (async job)
-            prediction_id = self._create_prediction(
-                model_id=model_full_id,
+            webhook_url = webhook_url or self.webhook_url
+        
+            # Create prediction; short jobs often finish within SYNC_WAIT
+            prediction_id, output_url = self._create_prediction(
+                model_id=self._model_info.full_id,
                 prompt=prompt,
                 duration=duration,
                 temperature=temperature,
                 top_k=top_k,
-                top_p=top_p
+                top_p=top_p,
+                webhook_url=webhook_url
             )
             
             logger.info(f"Prediction created with ID: {prediction_id}")
             
-            # Poll for completion
-            output_url = self._poll_for_completion(
-                prediction_id=prediction_id,
-                polling_interval=polling_interval,
-                max_wait_time=max_wait_time
-            )
+            if output_url is None:
+                if webhook_url:
+                    output_url = self._wait_for_webhook(prediction_id, max_wait_time)
+                else:
+                    output_url = self._poll_for_completion(
+                        prediction_id=prediction_id,
+                        polling_interval=polling_interval,
+                        max_wait_time=max_wait_time
+                    )
             
             # Download and save audio
             file_path = self._download_audio(
@@ -170,50 +342,286 @@ class ReplicateMusicGenerator:
                 prediction_id=prediction_id
             )
             
-            result = {
-                "prediction_id": prediction_id,
-                "output_url": output_url,
-                "status": "completed",
-                "duration": duration,
-                "model": self.model,
-                "file_path": str(file_path),
-                "timestamp": datetime.now().isoformat(),
-                "metadata": {
-                    "prompt": prompt,
-                    "temperature": temperature,
-                    "top_k": top_k,
-                    "top_p": top_p,
-                    "model_provider": "Replicate",
-                    "file_size": file_path.stat().st_size if file_path.exists() else 0
-                }
-            }
+            result = self._build_result(
+                prediction_id=prediction_id,
+                output_url=output_url,
+                file_path=file_path,
+                prompt=prompt,
+                duration=duration,
+                temperature=temperature,
+                top_k=top_k,
+                top_p=top_p,
+                cache_key=cache_key
+            )
+            job.set_result(result)
+            return result
             
-            safe_log_api_call("Replicate", "generate_music", "success", {
-                "prediction_id": prediction_id,
-                "model": self.model,
-                "duration": duration
-            })
+        except Exception as e:
+            self._log_failure(e, prompt)
+            job.set_exception(e)
+            raise
+        finally:
+            self._jobs.release(cache_key, job)
+    
+    async def agenerate_music(
+        self,
+        prompt: str,
+        duration: int = 30,
+        temperature: float = 1.0,
+        top_k: int = 250,
+        top_p: float = 0.0,
+        polling_interval: int = 2,
+        max_wait_time: int = 600,
+        use_cache: bool = True,
+        webhook_url: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Async variant of generate_music.
+        
+        Each HTTP call runs in a worker thread, while the waits between
+        status polls are awaited on the event loop. Many predictions can
+        therefore be in flight at once, e.g. via asyncio.gather, without a
+        thread blocked per job.
+        
+        Args and return value are the same as for generate_music.
+        """
+        
+        self._validate_request(prompt, duration, temperature)
+        
+        cache_key = self._cache_key(prompt, duration, temperature, top_k, top_p)
+        job, is_leader = self._jobs.claim(cache_key, shared=use_cache)
+        if not is_leader:
+            logger.info("Joining in-flight Replicate prediction")
+            # Shielded so a cancelled follower does not cancel the shared job
+            return dict(await asyncio.shield(asyncio.wrap_future(job)))
+        
+        try:
+            if use_cache:
+                cached = self._get_cached(cache_key)
+                if cached is not None:
+                    job.set_result(cached)
+                    return cached
+            
+            logger.info(f"Starting async Replicate music generation with model {self.model}")
+            
+            webhook_url = webhook_url or self.webhook_url
+        
+            prediction_id, output_url = await asyncio.to_thread(
+                self._create_prediction,
+                model_id=self._model_info.full_id,
+                prompt=prompt,
+                duration=duration,
+                temperature=temperature,
+                top_k=top_k,
+                top_p=top_p,
+                webhook_url=webhook_url
+            )
+            logger.info(f"Prediction created with ID: {prediction_id}")
+            
+            if output_url is None:
+                if webhook_url:
+                    output_url = await asyncio.to_thread(
+                        self._wait_for_webhook, prediction_id, max_wait_time
+                    )
+                else:
+                    output_url = await self._apoll_for_completion(
+                        prediction_id=prediction_id,
+                        polling_interval=polling_interval,
+                        max_wait_time=max_wait_time
+                    )
+            
+            file_path = await asyncio.to_thread(
+                self._download_audio,
+                audio_url=output_url,
+                prediction_id=prediction_id
+            )
             
+            result = self._build_result(
+                prediction_id=prediction_id,
+                output_url=output_url,
+                file_path=file_path,
+                prompt=prompt,
+                duration=duration,
+                temperature=temperature,
+                top_k=top_k,
+                top_p=top_p,
+                cache_key=cache_key
+            )
+            job.set_result(result)
             return result
             
         except Exception as e:
-            logger.error(f"Replicate music generation failed: {str(e)}", exc_info=True)
-            safe_log_api_call("Replicate", "generate_music", "error", {
-                "error": str(e),
-                "prompt": prompt[:50]
-            })
+            self._log_failure(e, prompt)
+            job.set_exception(e)
             raise
+        finally:
+            self._jobs.release(cache_key, job)
     
-    def _create_prediction(
+    async def generate_music_batch(
+        self,
+        requests_: List[Dict[str, Any]]
+    ) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Generate several tracks concurrently.
+        
+        Every job is created, polled and downloaded independently, so a
+        finished track is downloaded while others are still generating.
+        The API requests of the whole batch stay within the shared
+        concurrency and rate limits.
+        
+        Args:
+            requests_: Keyword arguments for agenerate_music, one dict per track
+            
+        Returns:
+            Results in the order of requests_; a failed generation is
+            returned as its exception instead of cancelling the others
+        """
+        return await asyncio.gather(
+            *(self.agenerate_music(**request) for request in requests_),
+            return_exceptions=True
+        )
+    
+    def _validate_request(self, prompt: str, duration: int, temperature: float) -> None:
+        """Validate generation parameters."""
+        
+        validate_string_input(prompt, "prompt", min_length=5, max_length=500)
+        
+        if not 5 <= duration <= 30:
+            raise ValueError("Duration must be between 5 and 30 seconds for Replicate")
+        if not 0.0 <= temperature <= 1.0:
+            raise ValueError("Temperature must be between 0.0 and 1.0")
+    
+    def _build_result(
+        self,
+        prediction_id: str,
+        output_url: str,
+        file_path: Path,
+        prompt: str,
+        duration: int,
+        temperature: float,
+        top_k: int,
+        top_p: float,
+        cache_key: str
+    ) -> Dict[str, Any]:
+        """Assemble the generation result, cache it and log the successful call."""
+        
+        result = {
+            "prediction_id": prediction_id,
+            "output_url": output_url,
+            "status": "completed",
+            "duration": duration,
+            "model": self.model,
+            "file_path": str(file_path),
+            "cache_hit": False,
+            "timestamp": datetime.now().isoformat(),
+            "metadata": {
+                "prompt": prompt,
+                "temperature": temperature,
+                "top_k": top_k,
+                "top_p": top_p,
+                "model_provider": "Replicate",
+                "file_size": file_path.stat().st_size if file_path.exists() else 0
+            }
+        }
+        
+        safe_log_api_call("Replicate", "generate_music", "success", {
+            "prediction_id": prediction_id,
+            "model": self.model,
+            "duration": duration
+        })
+        
+        if self._cache is not None:
+            self._cache.put(cache_key, file_path, result)
+        
+        return result
+    
+    def _cache_key(
         self,
-        model_id: str,
         prompt: str,
         duration: int,
         temperature: float,
         top_k: int,
         top_p: float
     ) -> str:
-        """Create a prediction (async job) on Replicate."""
+        """Build the cache key for a request; the model version is part of it."""
+        
+        return MusicCache.make_key(
+            provider="Replicate",
+            model=self._model_info.full_id,
+            prompt=prompt,
+            duration=duration,
+            temperature=temperature,
+            top_k=top_k,
+            top_p=top_p
+        )
+    
+    def _get_cached(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for cache_key, or None on a miss."""
+        
+        if self._cache is None:
+            return None
+        
+        hit = self._cache.get(cache_key)
+        if hit is None:
+            return None
+        
+        result = dict(hit[1], cache_hit=True)
+        logger.info(f"Reusing cached Replicate prediction {result['prediction_id']}")
+        safe_log_api_call("Replicate", "generate_music", "cache_hit", {
+            "prediction_id": result["prediction_id"],
+            "model": self.model
+        })
+        return result
+    
+    def _log_failure(self, error: Exception, prompt: str) -> None:
+        """Log a failed generation."""
+        
+        logger.error(f"Replicate music generation failed: {str(error)}", exc_info=True)
+        safe_log_api_call("Replicate", "generate_music", "error", {
+            "error": str(error),
+            "prompt": prompt[:50]
+        })
+    
+    def _api_request(self, method: str, path: str, held: bool = False, **kwargs: Any):
+        """
+        Send an API request within the shared concurrency and rate limits.
+        
+        Args:
+            method: HTTP method
+            path: Path below BASE_URL
+            held: Whether the server may hold the response open ("Prefer:
+                wait"); such requests use their own slots
+            **kwargs: Passed to the session's request method
+            
+        Returns:
+            The HTTP response
+        """
+        limiter = _replicate_wait_limiter if held else _replicate_limiter
+        return limiter.call(self.session.request, method, f"{self.BASE_URL}{path}", **kwargs)
+    
+    def _create_prediction(
+        self,
+        model_id: str,
+        prompt: str,
+        duration: int,
+        temperature: float,
+        top_k: int,
+        top_p: float,
+        webhook_url: Optional[str] = None
+    ) -> Tuple[str, Optional[str]]:
+        """
+        Create a prediction (async job) on Replicate.
+        
+        The request asks Replicate to hold the response for up to SYNC_WAIT
+        seconds, so predictions that finish quickly need no polling.
+        
+        Returns:
+            Tuple of (prediction_id, output_url). output_url is None if the
+            prediction had not finished when the response was sent.
+            
+        Raises:
+            RuntimeError: If the prediction failed within the wait
+        """
         
         payload = {
             "version": model_id,
@@ -226,26 +634,90 @@ class ReplicateMusicGenerator:
             }
         }
         
-        try:
-            response = requests.post(
-                f"{self.BASE_URL}/predictions",
-                json=payload,
-                headers=self.headers,
-                timeout=30
-            )
-            response.raise_for_status()
+        if webhook_url:
+            payload["webhook"] = webhook_url
+            payload["webhook_events_filter"] = ["completed"]
+        
+        request_kwargs: Dict[str, Any] = {"timeout": 30}
+        if self.SYNC_WAIT:
+            request_kwargs = {
+                "headers": {"Prefer": f"wait={self.SYNC_WAIT}"},
+                "timeout": self.SYNC_WAIT + 30
+            }
+        
+        # Encode once; the raw body is reused if the request is retried
+        body = json_dumps(payload)
+        body_kwarg = {"content": body} if HTTPX_AVAILABLE else {"data": body}
+        
+        for attempt in range(self.CREATE_RETRIES + 1):
+            last_attempt = attempt == self.CREATE_RETRIES
+            
+            try:
+                response = self._api_request(
+                    "POST",
+                    "/predictions",
+                    held=bool(self.SYNC_WAIT),
+                    **body_kwarg,
+                    **request_kwargs
+                )
+            except _CONNECT_ERRORS as e:
+                # Only connection failures are retried: after a timeout the
+                # prediction may already exist and be billed
+                if last_attempt:
+                    logger.error(f"Failed to create prediction: {str(e)}")
+                    raise
+                delay = backoff_delay(0.2, attempt, factor=2.0, max_delay=10.0)
+                logger.warning(f"Error creating prediction, retrying in {delay:.1f}s: {str(e)}")
+                time.sleep(delay)
+                continue
+            except _API_ERRORS as e:
+                logger.error(f"Failed to create prediction: {str(e)}")
+                raise
             
-            data = response.json()
+            # Throttled requests are rejected before a prediction is created
+            if response.status_code == 429 and not last_attempt:
+                delay = get_rate_limit_delay(response)
+                if delay is None:
+                    delay = backoff_delay(0.2, attempt, factor=2.0, max_delay=10.0)
+                logger.warning(f"Rate limited by Replicate, retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            
+            try:
+                response.raise_for_status()
+            except _API_ERRORS as e:
+                logger.error(f"Failed to create prediction: {str(e)}")
+                raise
+            
+            data = json_loads(response.content)
             prediction_id = data.get("id")
             
             if not prediction_id:
                 raise RuntimeError("No prediction ID in response")
             
-            return prediction_id
-            
-        except requests.RequestException as e:
-            logger.error(f"Failed to create prediction: {str(e)}")
-            raise
+            output_url = self._prediction_output(data)
+            if output_url is not None:
+                logger.info(f"Prediction {prediction_id} completed within the create request")
+            return prediction_id, output_url
+    
+    def _next_poll_delay(
+        self,
+        polling_interval: int,
+        poll_count: int,
+        hinted_delay: Optional[float]
+    ) -> float:
+        """
+        Compute the wait before the next poll.
+        
+        The delay starts at polling_interval and grows exponentially up to
+        MAX_POLL_INTERVAL, with jitter so concurrent jobs don't poll in
+        lockstep. A rate limit hint from the API takes precedence.
+        """
+        if hinted_delay is not None:
+            return hinted_delay
+        delay = backoff_delay(polling_interval, poll_count - 1,
+                              factor=2.0, max_delay=self.MAX_POLL_INTERVAL)
+        return delay * random.uniform(1 - self.POLL_JITTER, 1 + self.POLL_JITTER)
     
     def _poll_for_completion(
         self,
@@ -258,42 +730,257 @@ class ReplicateMusicGenerator:
         start_time = time.time()
         poll_count = 0
         
-        while time.time() - start_time < max_wait_time:
+        while True:
             poll_count += 1
             
             try:
-                response = requests.get(
-                    f"{self.BASE_URL}/predictions/{prediction_id}",
-                    headers=self.headers,
-                    timeout=30
-                )
-                response.raise_for_status()
-                
-                data = response.json()
-                status = data.get("status", "processing").lower()
+                output_url, hinted_delay = self._check_prediction(prediction_id, poll_count)
+                if output_url is not None:
+                    logger.info(f"Prediction completed after {poll_count} polls")
+                    return output_url
                 
-                if status == "succeeded":
-                    output = data.get("output")
-                    
-                    if isinstance(output, list) and len(output) > 0:
-                        output_url = output[0]
-                    else:
-                        output_url = output
-                    
+            except _API_ERRORS as e:
+                logger.warning(f"Error polling prediction status: {str(e)}")
+                hinted_delay = None
+            
+            delay = self._next_poll_delay(polling_interval, poll_count, hinted_delay)
+            remaining = max_wait_time - (time.time() - start_time)
+            if remaining <= 0:
+                break
+            time.sleep(min(delay, remaining))
+        
+        raise TimeoutError(f"Prediction did not complete within {max_wait_time} seconds")
+    
+    async def _apoll_for_completion(
+        self,
+        prediction_id: str,
+        polling_interval: int = 2,
+        max_wait_time: int = 600
+    ) -> str:
+        """Async counterpart of _poll_for_completion that awaits between polls."""
+        
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        poll_count = 0
+        
+        while True:
+            poll_count += 1
+            
+            try:
+                output_url, hinted_delay = await asyncio.to_thread(
+                    self._check_prediction, prediction_id, poll_count
+                )
+                if output_url is not None:
                     logger.info(f"Prediction completed after {poll_count} polls")
                     return output_url
-                    
-                elif status == "failed":
-                    error = data.get("error", "Unknown error")
-                    logger.error(f"Prediction failed: {error}")
-                    raise RuntimeError(f"Replicate prediction failed: {error}")
-                    
-                logger.info(f"Poll #{poll_count}: Status = {status}")
-                time.sleep(polling_interval)
                 
-            except requests.RequestException as e:
+            except _API_ERRORS as e:
                 logger.warning(f"Error polling prediction status: {str(e)}")
-                time.sleep(polling_interval)
+                hinted_delay = None
+            
+            delay = self._next_poll_delay(polling_interval, poll_count, hinted_delay)
+            remaining = max_wait_time - (loop.time() - start_time)
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(delay, remaining))
+        
+        raise TimeoutError(f"Prediction did not complete within {max_wait_time} seconds")
+    
+    def _check_prediction(
+        self,
+        prediction_id: str,
+        poll_count: int
+    ) -> Tuple[Optional[str], Optional[float]]:
+        """
+        Request the status of a prediction once.
+        
+        Returns:
+            Tuple of (output_url, hinted_delay). output_url is None until the
+            prediction has succeeded; hinted_delay comes from the rate limit
+            headers, if present.
+            
+        Raises:
+            RuntimeError: If Replicate reports the prediction as failed
+            httpx.HTTPError or requests.RequestException: If the status request fails
+        """
+        response = self._api_request(
+            "GET",
+            f"/predictions/{prediction_id}",
+            timeout=30
+        )
+        hinted_delay = get_rate_limit_delay(response)
+        if response.status_code == 429:
+            logger.warning(f"Poll #{poll_count}: rate limited by Replicate")
+            return None, hinted_delay
+        response.raise_for_status()
+        
+        data = json_loads(response.content)
+        output_url = self._prediction_output(data)
+        if output_url is not None:
+            return output_url, None
+        
+        logger.info(f"Poll #{poll_count}: Status = {data.get('status', 'processing')}")
+        return None, hinted_delay
+    
+    @classmethod
+    def _prediction_output(cls, data: Dict[str, Any]) -> Optional[str]:
+        """
+        Extract the output URL from a prediction object.
+        
+        Returns:
+            The output URL if the prediction succeeded, None while it is running
+            
+        Raises:
+            RuntimeError: If the prediction failed or was canceled
+        """
+        status = data.get("status") or "processing"
+        # Replicate reports lowercase states; only normalize unexpected ones
+        if status not in cls._KNOWN_STATES:
+            status = status.lower()
+        
+        if status in cls.SUCCEEDED_STATES:
+            output = data.get("output")
+            
+            if isinstance(output, list) and len(output) > 0:
+                output = output[0]
+            if not output:
+                raise RuntimeError("Replicate prediction succeeded without output")
+            return output
+            
+        elif status in cls.FAILED_STATES:
+            error = data.get("error") or status
+            logger.error(f"Prediction failed: {error}")
+            raise RuntimeError(f"Replicate prediction failed: {error}")
+        
+        return None
+    
+    def _register_webhook_waiter(self, prediction_id: str) -> Dict[str, Any]:
+        """Start waiting for the webhook of a prediction."""
+        waiter = {"event": threading.Event(), "payload": None}
+        with self._webhook_lock:
+            self._webhook_waiters[prediction_id] = waiter
+        return waiter
+    
+    def _get_webhook_secret(self) -> bytes:
+        """Return the webhook signing key, fetching it from Replicate once."""
+        if not self._webhook_secret:
+            response = self._api_request("GET", "/webhooks/default/secret", timeout=30)
+            response.raise_for_status()
+            self._webhook_secret = json_loads(response.content)["key"]
+        return base64.b64decode(self._webhook_secret.split("_", 1)[-1])
+    
+    def _verify_webhook(self, body: bytes, headers: Mapping[str, str]) -> bool:
+        """
+        Check the signature Replicate puts on every webhook.
+        
+        Replicate signs "{webhook-id}.{webhook-timestamp}.{body}" with
+        HMAC-SHA256 and sends the base64 digests as "v1,<signature>"
+        entries in the webhook-signature header.
+        """
+        headers = {key.lower(): value for key, value in headers.items()}
+        webhook_id = headers.get("webhook-id")
+        timestamp = headers.get("webhook-timestamp")
+        signatures = headers.get("webhook-signature")
+        if not (webhook_id and timestamp and signatures):
+            return False
+        
+        try:
+            if abs(time.time() - int(timestamp)) > self.WEBHOOK_TOLERANCE:
+                return False
+        except ValueError:
+            return False
+        
+        signed = f"{webhook_id}.{timestamp}.".encode() + body
+        expected = base64.b64encode(
+            hmac.new(self._get_webhook_secret(), signed, hashlib.sha256).digest()
+        ).decode()
+        return any(
+            hmac.compare_digest(expected, entry.split(",", 1)[-1])
+            for entry in signatures.split()
+        )
+    
+    def handle_webhook(self, body: Union[bytes, str], headers: Mapping[str, str]) -> bool:
+        """
+        Deliver a Replicate completion webhook.
+        
+        Call this from the application's webhook endpoint with the raw
+        request body and headers. The signature is verified before the
+        body is trusted, and webhooks for predictions nobody is waiting
+        for are ignored (status polling covers a webhook that arrives
+        before its generation starts waiting).
+        
+        Args:
+            body: Raw request body (the prediction object as JSON)
+            headers: Request headers, including Replicate's webhook-id,
+                webhook-timestamp and webhook-signature
+            
+        Returns:
+            True if the webhook was verified and delivered to a waiting
+            generation
+            
+        Raises:
+            requests.RequestException or httpx.HTTPError: If the signing
+                secret cannot be fetched
+        """
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        
+        if not self._verify_webhook(body, headers):
+            logger.warning("Rejected Replicate webhook with a missing or invalid signature")
+            return False
+        
+        try:
+            payload = json_loads(body)
+        except ValueError:
+            return False
+        prediction_id = payload.get("id") if isinstance(payload, dict) else None
+        if not prediction_id:
+            return False
+        
+        with self._webhook_lock:
+            waiter = self._webhook_waiters.get(str(prediction_id))
+            if waiter is None:
+                return False
+            waiter["payload"] = payload
+            waiter["event"].set()
+        return True
+    
+    def _wait_for_webhook(self, prediction_id: str, max_wait_time: int = 600) -> str:
+        """
+        Wait for the completion webhook of a prediction.
+        
+        A status request is made every WEBHOOK_SAFETY_POLL_INTERVAL seconds
+        while waiting, so a lost webhook costs at most one interval.
+        """
+        waiter = self._register_webhook_waiter(prediction_id)
+        deadline = time.monotonic() + max_wait_time
+        checks = 0
+        
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                
+                if waiter["event"].wait(min(self.WEBHOOK_SAFETY_POLL_INTERVAL, remaining)):
+                    output_url = self._prediction_output(waiter["payload"])
+                    if output_url is not None:
+                        logger.info(f"Prediction {prediction_id} completed via webhook")
+                        return output_url
+                    waiter["event"].clear()
+                    continue
+                
+                checks += 1
+                try:
+                    output_url, _ = self._check_prediction(prediction_id, checks)
+                    if output_url is not None:
+                        logger.info("Prediction completed (webhook not received)")
+                        return output_url
+                except _API_ERRORS as e:
+                    logger.warning(f"Error polling prediction status: {str(e)}")
+        finally:
+            with self._webhook_lock:
+                self._webhook_waiters.pop(prediction_id, None)
         
         raise TimeoutError(f"Prediction did not complete within {max_wait_time} seconds")
     
@@ -301,9 +988,15 @@ class ReplicateMusicGenerator:
         """Download generated audio file."""
         
         try:
-            file_path = self.output_dir / f"replicate_{prediction_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.wav"
+            file_path = self.output_dir / f"replicate_{prediction_id}_{time.strftime('%Y%m%d_%H%M%S')}.wav"
             
-            urlretrieve(audio_url, file_path)
+            # Stream to disk over a pooled connection so the full file is
+            # never held in memory
+            with self._download_session.get(audio_url, stream=True, timeout=(5, 60)) as response:
+                response.raise_for_status()
+                response.raw.decode_content = True
+                with open(file_path, "wb") as f:
+                    shutil.copyfileobj(response.raw, f, length=self.DOWNLOAD_CHUNK_SIZE)
             
             logger.info(f"Audio saved to {file_path}")
             return file_path
@@ -322,7 +1015,8 @@ class ReplicateMusicGenerator:
             "duration": 20,
             "temperature": 0.8,
             "top_k": 250,
-            "top_p": 0.0
+            "top_p": 0.0,
+            "use_cache": true
         }
         """
         
@@ -334,7 +1028,9 @@ class ReplicateMusicGenerator:
                 top_k=input_data.get("top_k", 250),
                 top_p=input_data.get("top_p", 0.0),
                 polling_interval=input_data.get("polling_interval", 2),
-                max_wait_time=input_data.get("max_wait_time", 600)
+                max_wait_time=input_data.get("max_wait_time", 600),
+                use_cache=input_data.get("use_cache", True),
+                webhook_url=input_data.get("webhook_url")
             )
             
             return {
@@ -353,7 +1049,7 @@ class ReplicateMusicGenerator:
     @staticmethod
     def list_available_models() -> Dict[str, Dict[str, str]]:
         """Return information about available models."""
-        return ReplicateMusicGenerator.MODELS
+        return {name: dict(info) for name, info in ReplicateMusicGenerator.MODELS.items()}
 
 
 def get_skill_info() -> Dict[str, Any]:
@@ -375,6 +1071,8 @@ def get_skill_info() -> Dict[str, Any]:
             "duration": "integer (5-30 seconds)",
             "temperature": "float (0.0-1.0, higher = more random)",
             "top_k": "integer (diversity parameter)",
-            "top_p": "float (0.0-1.0, nucleus sampling)"
+            "top_p": "float (0.0-1.0, nucleus sampling)",
+            "use_cache": "boolean (default true, reuse identical earlier generations)",
+            "webhook_url": "string (optional, completion callback; see handle_webhook)"
         }
     }
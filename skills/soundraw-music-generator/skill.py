@@ -10,14 +10,28 @@ License: Royalty-free for personal and commercial use
 """
 
 import os
-import json
 import time
+import shutil
+import random
+import asyncio
 import logging
+import functools
 import requests
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple, List, Union
 from datetime import datetime
 from pathlib import Path
-from urllib.request import urlretrieve
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = HTTPX_AVAILABLE
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 # Configure logging
 logging.basicConfig(
@@ -28,16 +42,54 @@ logger = logging.getLogger(__name__)
 
 # Add parent directory to path for shared utilities
 import sys
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+_REPO_ROOT = str(Path(__file__).parent.parent.parent)
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
 
 from shared.utils import (
     validate_string_input,
     get_secure_api_key,
     safe_log_api_call,
-    validate_theme
+    get_rate_limit_delay,
+    backoff_delay,
+    build_http_session,
+    MusicCache,
+    TokenBucket,
+    RequestLimiter,
+    SingleFlight,
+    prewarm_connection,
+    json_dumps,
+    json_loads
+)
+
+# Errors raised by the API client, whichever one is in use
+_API_ERRORS = (requests.RequestException, httpx.HTTPError) if HTTPX_AVAILABLE else (requests.RequestException,)
+
+# Failures that happen before a request reaches the server
+_CONNECT_ERRORS = (
+    (requests.ConnectionError, httpx.ConnectError, httpx.ConnectTimeout)
+    if HTTPX_AVAILABLE else (requests.ConnectionError,)
+)
+
+# Shared by all instances so concurrent jobs together stay within
+# Soundraw's limits: at most SOUNDRAW_MAX_CONCURRENT requests in flight and
+# SOUNDRAW_RATE_LIMIT requests per minute
+_soundraw_limiter = RequestLimiter(
+    "Soundraw",
+    int(os.getenv("SOUNDRAW_MAX_CONCURRENT", "5")),
+    TokenBucket(max_rate=int(os.getenv("SOUNDRAW_RATE_LIMIT", "60")), time_period=60.0)
 )
 
 
+@functools.lru_cache(maxsize=1)
+def _build_headers(api_token: str) -> Dict[str, str]:
+    """Build the API request headers once per token and share them between instances."""
+    return {
+        "Authorization": f"Bearer {api_token}",
+        "Content-Type": "application/json"
+    }
+
+
 class SoundrawMusicGenerator:
     """
     Skill for generating music using the Soundraw API.
@@ -53,6 +105,15 @@ class SoundrawMusicGenerator:
     """
     
     BASE_URL = "https://api.soundraw.io"
+    MAX_POLL_INTERVAL = 10
+    POLL_JITTER = 0.2
+    CREATE_RETRIES = 3
+    # Large copy chunks keep write() calls to a handful per file
+    DOWNLOAD_CHUNK_SIZE = 1 << 20
+    # Track states; anything not terminal means still generating
+    DONE_STATES = frozenset({"completed", "ready"})
+    FAILED_STATES = frozenset({"failed"})
+    _KNOWN_STATES = DONE_STATES | FAILED_STATES | frozenset({"generating", "processing"})
     
     # Soundraw genres
     GENRES = [
@@ -72,17 +133,64 @@ class SoundrawMusicGenerator:
         "sophisticated", "tense", "uplifting", "urgent", "victorious", "vintage"
     ]
     
+    # Precomputed for validation
+    _GENRE_KEYS = frozenset(GENRES)
+    _MOOD_KEYS = frozenset(MOODS)
+    _GENRES_AVAILABLE_MSG = ", ".join(GENRES)
+    _MOODS_AVAILABLE_MSG = ", ".join(MOODS[:10]) + "... (and more)"
+    
     def __init__(self):
         """Initialize the Soundraw Music Generator skill."""
         self.api_key = get_secure_api_key("SOUNDRAW_API_KEY")
-        self.headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        self.headers = _build_headers(self.api_key)
+        # Pooled keep-alive client shared by all API calls. With httpx and h2
+        # installed, concurrent status polls multiplex over one HTTP/2 connection
+        if HTTPX_AVAILABLE:
+            self.session = httpx.Client(
+                headers=self.headers,
+                timeout=httpx.Timeout(30.0, connect=5.0),
+                transport=httpx.HTTPTransport(
+                    http2=HTTP2_AVAILABLE,
+                    retries=3,
+                    limits=httpx.Limits(max_keepalive_connections=10, max_connections=20)
+                )
+            )
+        else:
+            # Idempotent requests are retried on 502/503/504
+            self.session = build_http_session(headers=self.headers, pool_connections=10, pool_maxsize=20)
+        # Separate pool for audio downloads so the API key is never sent
+        # to the CDN hosting the generated files
+        self._download_session = build_http_session(pool_connections=4, pool_maxsize=8)
         
         self.output_dir = Path(os.getenv("MUSIC_OUTPUT_DIR", "./generated_music"))
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
+        # Opt-in: with MUSIC_CACHE_TTL > 0, identical requests reuse an
+        # earlier download instead of generating a new track
+        cache_ttl = int(os.getenv("MUSIC_CACHE_TTL", "0"))
+        self._cache = MusicCache(
+            self.output_dir / MusicCache.DEFAULT_FILENAME, ttl_seconds=cache_ttl
+        ) if cache_ttl > 0 else None
+        
+        # Concurrent identical requests share a single paid job
+        self._jobs = SingleFlight()
+        
+        # Warm up the API connection; MUSIC_PREWARM=0 disables
+        prewarm_connection(self.session, self.BASE_URL)
+    
+    def close(self) -> None:
+        """Release pooled HTTP connections and the cache database."""
+        self.session.close()
+        self._download_session.close()
+        if self._cache is not None:
+            self._cache.close()
+    
+    def __enter__(self) -> "SoundrawMusicGenerator":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+        
     def generate_music(
         self,
         genre: str,
@@ -92,7 +200,8 @@ class SoundrawMusicGenerator:
         tempo: Optional[int] = None,
         energy: int = 5,
         polling_interval: int = 2,
-        max_wait_time: int = 180
+        max_wait_time: int = 180,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
         """
         Generate music using Soundraw.
@@ -106,31 +215,31 @@ class SoundrawMusicGenerator:
             energy: Energy level (1-10)
             polling_interval: Seconds between status checks
             max_wait_time: Maximum seconds to wait
+            use_cache: Return an earlier track with identical parameters, or
+                join one still in flight, instead of generating a new one
             
         Returns:
-            Dictionary with generation results
+            Dictionary with generation results; cache_hit tells whether the
+            track was served from the cache
         """
         
-        validate_string_input(genre, "genre", min_length=3, max_length=50)
-        validate_string_input(mood, "mood", min_length=3, max_length=50)
-        
-        if not 10 <= duration <= 600:
-            raise ValueError("Duration must be between 10 and 600 seconds")
-        if not 1 <= energy <= 10:
-            raise ValueError("Energy must be between 1 and 10")
-        
-        # Validate genre and mood
-        genre_lower = genre.lower()
-        mood_lower = mood.lower()
-        
-        if genre_lower not in self.GENRES:
-            raise ValueError(f"Unknown genre '{genre}'. Available: {', '.join(self.GENRES)}")
-        if mood_lower not in self.MOODS:
-            raise ValueError(f"Unknown mood '{mood}'. Available: {', '.join(self.MOODS[:10])}... (and more)")
+        self._validate_request(genre, mood, duration, energy)
         
-        logger.info(f"Starting Soundraw music generation: {genre} - {mood}")
+        cache_key = self._cache_key(genre, mood, duration, instrumentation, tempo, energy)
+        job, is_leader = self._jobs.claim(cache_key, shared=use_cache)
+        if not is_leader:
+            logger.info("Joining in-flight Soundraw generation")
+            return dict(job.result())
         
         try:
+            if use_cache:
+                cached = self._get_cached(cache_key)
+                if cached is not None:
+                    job.set_result(cached)
+                    return cached
+            
+            logger.info(f"Starting Soundraw music generation: {genre} - {mood}")
+            
             # Create generation request
             track_id = self._create_generation(
                 genre=genre,
@@ -156,40 +265,266 @@ class SoundrawMusicGenerator:
                 track_id=track_id
             )
             
-            result = {
-                "track_id": track_id,
-                "download_url": download_url,
-                "status": "completed",
-                "duration": duration,
-                "genre": genre,
-                "mood": mood,
-                "file_path": str(file_path),
-                "timestamp": datetime.now().isoformat(),
-                "metadata": {
-                    "instrumentation": instrumentation,
-                    "tempo": tempo,
-                    "energy": energy,
-                    "model": "Soundraw",
-                    "file_size": file_path.stat().st_size if file_path.exists() else 0
-                }
-            }
+            result = self._build_result(
+                track_id=track_id,
+                download_url=download_url,
+                file_path=file_path,
+                genre=genre,
+                mood=mood,
+                duration=duration,
+                instrumentation=instrumentation,
+                tempo=tempo,
+                energy=energy,
+                cache_key=cache_key
+            )
+            job.set_result(result)
+            return result
+            
+        except Exception as e:
+            self._log_failure(e, genre, mood)
+            job.set_exception(e)
+            raise
+        finally:
+            self._jobs.release(cache_key, job)
+    
+    async def agenerate_music(
+        self,
+        genre: str,
+        mood: str,
+        duration: int = 60,
+        instrumentation: Optional[str] = None,
+        tempo: Optional[int] = None,
+        energy: int = 5,
+        polling_interval: int = 2,
+        max_wait_time: int = 180,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Async variant of generate_music.
+        
+        Each HTTP call runs in a worker thread, while the waits between
+        status polls are awaited on the event loop. Many tracks can
+        therefore be generated at once, e.g. via asyncio.gather, without a
+        thread blocked per job.
+        
+        Args and return value are the same as for generate_music.
+        """
+        
+        self._validate_request(genre, mood, duration, energy)
+        
+        cache_key = self._cache_key(genre, mood, duration, instrumentation, tempo, energy)
+        job, is_leader = self._jobs.claim(cache_key, shared=use_cache)
+        if not is_leader:
+            logger.info("Joining in-flight Soundraw generation")
+            # Shielded so a cancelled follower does not cancel the shared job
+            return dict(await asyncio.shield(asyncio.wrap_future(job)))
+        
+        try:
+            if use_cache:
+                cached = self._get_cached(cache_key)
+                if cached is not None:
+                    job.set_result(cached)
+                    return cached
+            
+            logger.info(f"Starting async Soundraw music generation: {genre} - {mood}")
+            
+            track_id = await asyncio.to_thread(
+                self._create_generation,
+                genre=genre,
+                mood=mood,
+                duration=duration,
+                instrumentation=instrumentation,
+                tempo=tempo,
+                energy=energy
+            )
+            logger.info(f"Generation created with track ID: {track_id}")
+            
+            download_url = await self._apoll_for_completion(
+                track_id=track_id,
+                polling_interval=polling_interval,
+                max_wait_time=max_wait_time
+            )
             
-            safe_log_api_call("Soundraw", "generate_music", "success", {
-                "track_id": track_id,
-                "genre": genre,
-                "mood": mood
-            })
+            file_path = await asyncio.to_thread(
+                self._download_audio,
+                download_url=download_url,
+                track_id=track_id
+            )
             
+            result = self._build_result(
+                track_id=track_id,
+                download_url=download_url,
+                file_path=file_path,
+                genre=genre,
+                mood=mood,
+                duration=duration,
+                instrumentation=instrumentation,
+                tempo=tempo,
+                energy=energy,
+                cache_key=cache_key
+            )
+            job.set_result(result)
             return result
             
         except Exception as e:
-            logger.error(f"Soundraw music generation failed: {str(e)}", exc_info=True)
-            safe_log_api_call("Soundraw", "generate_music", "error", {
-                "error": str(e),
-                "genre": genre,
-                "mood": mood
-            })
+            self._log_failure(e, genre, mood)
+            job.set_exception(e)
             raise
+        finally:
+            self._jobs.release(cache_key, job)
+    
+    async def generate_music_batch(
+        self,
+        requests_: List[Dict[str, Any]]
+    ) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Generate several tracks concurrently.
+        
+        Every job is created, polled and downloaded independently, so a
+        finished track is downloaded while others are still generating.
+        The API requests of the whole batch stay within the shared
+        concurrency and rate limits.
+        
+        Args:
+            requests_: Keyword arguments for agenerate_music, one dict per track
+            
+        Returns:
+            Results in the order of requests_; a failed generation is
+            returned as its exception instead of cancelling the others
+        """
+        return await asyncio.gather(
+            *(self.agenerate_music(**request) for request in requests_),
+            return_exceptions=True
+        )
+    
+    def _validate_request(self, genre: str, mood: str, duration: int, energy: int) -> None:
+        """Validate generation parameters."""
+        
+        validate_string_input(genre, "genre", min_length=3, max_length=50)
+        validate_string_input(mood, "mood", min_length=3, max_length=50)
+        
+        if not 10 <= duration <= 600:
+            raise ValueError("Duration must be between 10 and 600 seconds")
+        if not 1 <= energy <= 10:
+            raise ValueError("Energy must be between 1 and 10")
+        
+        # Validate genre and mood
+        genre_lower = genre.lower()
+        mood_lower = mood.lower()
+        
+        if genre_lower not in self._GENRE_KEYS:
+            raise ValueError(f"Unknown genre '{genre}'. Available: {self._GENRES_AVAILABLE_MSG}")
+        if mood_lower not in self._MOOD_KEYS:
+            raise ValueError(f"Unknown mood '{mood}'. Available: {self._MOODS_AVAILABLE_MSG}")
+    
+    def _build_result(
+        self,
+        track_id: str,
+        download_url: str,
+        file_path: Path,
+        genre: str,
+        mood: str,
+        duration: int,
+        instrumentation: Optional[str],
+        tempo: Optional[int],
+        energy: int,
+        cache_key: str
+    ) -> Dict[str, Any]:
+        """Assemble the generation result, cache it and log the successful call."""
+        
+        result = {
+            "track_id": track_id,
+            "download_url": download_url,
+            "status": "completed",
+            "duration": duration,
+            "genre": genre,
+            "mood": mood,
+            "file_path": str(file_path),
+            "cache_hit": False,
+            "timestamp": datetime.now().isoformat(),
+            "metadata": {
+                "instrumentation": instrumentation,
+                "tempo": tempo,
+                "energy": energy,
+                "model": "Soundraw",
+                "file_size": file_path.stat().st_size if file_path.exists() else 0
+            }
+        }
+        
+        safe_log_api_call("Soundraw", "generate_music", "success", {
+            "track_id": track_id,
+            "genre": genre,
+            "mood": mood
+        })
+        
+        if self._cache is not None:
+            self._cache.put(cache_key, file_path, result)
+        
+        return result
+    
+    def _cache_key(
+        self,
+        genre: str,
+        mood: str,
+        duration: int,
+        instrumentation: Optional[str],
+        tempo: Optional[int],
+        energy: int
+    ) -> str:
+        """Build the cache key for a request from the parameters sent to Soundraw."""
+        
+        return MusicCache.make_key(
+            provider="Soundraw",
+            genre=genre.lower(),
+            mood=mood.lower(),
+            duration=duration,
+            instrumentation=instrumentation or None,
+            tempo=tempo or None,
+            energy=energy
+        )
+    
+    def _get_cached(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for cache_key, or None on a miss."""
+        
+        if self._cache is None:
+            return None
+        
+        hit = self._cache.get(cache_key)
+        if hit is None:
+            return None
+        
+        result = dict(hit[1], cache_hit=True)
+        logger.info(f"Reusing cached Soundraw track {result['track_id']}")
+        safe_log_api_call("Soundraw", "generate_music", "cache_hit", {
+            "track_id": result["track_id"],
+            "genre": result["genre"],
+            "mood": result["mood"]
+        })
+        return result
+    
+    def _log_failure(self, error: Exception, genre: str, mood: str) -> None:
+        """Log a failed generation."""
+        
+        logger.error(f"Soundraw music generation failed: {str(error)}", exc_info=True)
+        safe_log_api_call("Soundraw", "generate_music", "error", {
+            "error": str(error),
+            "genre": genre,
+            "mood": mood
+        })
+    
+    def _api_request(self, method: str, path: str, **kwargs: Any):
+        """
+        Send an API request within the shared concurrency and rate limits.
+        
+        Args:
+            method: HTTP method
+            path: Path below BASE_URL
+            **kwargs: Passed to the session's request method
+            
+        Returns:
+            The HTTP response
+        """
+        return _soundraw_limiter.call(self.session.request, method, f"{self.BASE_URL}{path}", **kwargs)
     
     def _create_generation(
         self,
@@ -215,16 +550,50 @@ class SoundrawMusicGenerator:
         if tempo:
             payload["tempo"] = tempo
         
-        try:
-            response = requests.post(
-                f"{self.BASE_URL}/api/v1/songs",
-                json=payload,
-                headers=self.headers,
-                timeout=30
-            )
-            response.raise_for_status()
+        # Encode once; the raw body is reused if the request is retried
+        body = json_dumps(payload)
+        body_kwarg = {"content": body} if HTTPX_AVAILABLE else {"data": body}
+        
+        for attempt in range(self.CREATE_RETRIES + 1):
+            last_attempt = attempt == self.CREATE_RETRIES
             
-            data = response.json()
+            try:
+                response = self._api_request(
+                    "POST",
+                    "/api/v1/songs",
+                    **body_kwarg,
+                    timeout=30
+                )
+            except _CONNECT_ERRORS as e:
+                # Only connection failures are retried: after a timeout the
+                # track may already exist and count against the quota
+                if last_attempt:
+                    logger.error(f"Failed to create generation: {str(e)}")
+                    raise
+                delay = backoff_delay(0.2, attempt, factor=2.0, max_delay=10.0)
+                logger.warning(f"Error creating generation, retrying in {delay:.1f}s: {str(e)}")
+                time.sleep(delay)
+                continue
+            except _API_ERRORS as e:
+                logger.error(f"Failed to create generation: {str(e)}")
+                raise
+            
+            # Throttled requests are rejected before a track is created
+            if response.status_code == 429 and not last_attempt:
+                delay = get_rate_limit_delay(response)
+                if delay is None:
+                    delay = backoff_delay(0.2, attempt, factor=2.0, max_delay=10.0)
+                logger.warning(f"Rate limited by Soundraw, retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            
+            try:
+                response.raise_for_status()
+            except _API_ERRORS as e:
+                logger.error(f"Failed to create generation: {str(e)}")
+                raise
+            
+            data = json_loads(response.content)
             
             if not data.get("success") and "error" in data:
                 raise RuntimeError(data.get("error", "Generation creation failed"))
@@ -235,10 +604,25 @@ class SoundrawMusicGenerator:
                 raise RuntimeError("No track ID in response")
             
             return track_id
-            
-        except requests.RequestException as e:
-            logger.error(f"Failed to create generation: {str(e)}")
-            raise
+    
+    def _next_poll_delay(
+        self,
+        polling_interval: int,
+        poll_count: int,
+        hinted_delay: Optional[float]
+    ) -> float:
+        """
+        Compute the wait before the next poll.
+        
+        The delay starts at polling_interval and grows exponentially up to
+        MAX_POLL_INTERVAL, with jitter so concurrent jobs don't poll in
+        lockstep. A rate limit hint from the API takes precedence.
+        """
+        if hinted_delay is not None:
+            return hinted_delay
+        delay = backoff_delay(polling_interval, poll_count - 1,
+                              factor=2.0, max_delay=self.MAX_POLL_INTERVAL)
+        return delay * random.uniform(1 - self.POLL_JITTER, 1 + self.POLL_JITTER)
     
     def _poll_for_completion(
         self,
@@ -251,45 +635,122 @@ class SoundrawMusicGenerator:
         start_time = time.time()
         poll_count = 0
         
-        while time.time() - start_time < max_wait_time:
+        while True:
             poll_count += 1
             
             try:
-                response = requests.get(
-                    f"{self.BASE_URL}/api/v1/songs/{track_id}",
-                    headers=self.headers,
-                    timeout=30
-                )
-                response.raise_for_status()
-                
-                data = response.json()
-                status = data.get("status", "generating").lower()
-                
-                if status == "completed" or status == "ready":
-                    download_url = data.get("download_url") or data.get("audio_url")
+                download_url, hinted_delay = self._check_status(track_id, poll_count)
+                if download_url is not None:
                     logger.info(f"Generation completed after {poll_count} polls")
                     return download_url
                 
-                elif status == "failed":
-                    error_msg = data.get("error", "Unknown error")
-                    raise RuntimeError(f"Generation failed: {error_msg}")
-                
-                logger.info(f"Poll #{poll_count}: Status = {status}")
-                time.sleep(polling_interval)
+            except _API_ERRORS as e:
+                logger.warning(f"Error polling status: {str(e)}")
+                hinted_delay = None
+            
+            delay = self._next_poll_delay(polling_interval, poll_count, hinted_delay)
+            remaining = max_wait_time - (time.time() - start_time)
+            if remaining <= 0:
+                break
+            time.sleep(min(delay, remaining))
+        
+        raise TimeoutError(f"Generation did not complete within {max_wait_time} seconds")
+    
+    async def _apoll_for_completion(
+        self,
+        track_id: str,
+        polling_interval: int = 2,
+        max_wait_time: int = 180
+    ) -> str:
+        """Async counterpart of _poll_for_completion that awaits between polls."""
+        
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        poll_count = 0
+        
+        while True:
+            poll_count += 1
+            
+            try:
+                download_url, hinted_delay = await asyncio.to_thread(
+                    self._check_status, track_id, poll_count
+                )
+                if download_url is not None:
+                    logger.info(f"Generation completed after {poll_count} polls")
+                    return download_url
                 
-            except requests.RequestException as e:
+            except _API_ERRORS as e:
                 logger.warning(f"Error polling status: {str(e)}")
-                time.sleep(polling_interval)
+                hinted_delay = None
+            
+            delay = self._next_poll_delay(polling_interval, poll_count, hinted_delay)
+            remaining = max_wait_time - (loop.time() - start_time)
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(delay, remaining))
         
         raise TimeoutError(f"Generation did not complete within {max_wait_time} seconds")
     
+    def _check_status(
+        self,
+        track_id: str,
+        poll_count: int
+    ) -> Tuple[Optional[str], Optional[float]]:
+        """
+        Request the status of a track once.
+        
+        Returns:
+            Tuple of (download_url, hinted_delay). download_url is None until
+            the track is ready; hinted_delay comes from the rate limit
+            headers, if present.
+            
+        Raises:
+            RuntimeError: If Soundraw reports the generation as failed
+            httpx.HTTPError or requests.RequestException: If the status request fails
+        """
+        response = self._api_request(
+            "GET",
+            f"/api/v1/songs/{track_id}",
+            timeout=30
+        )
+        hinted_delay = get_rate_limit_delay(response)
+        if response.status_code == 429:
+            logger.warning(f"Poll #{poll_count}: rate limited by Soundraw")
+            return None, hinted_delay
+        response.raise_for_status()
+        
+        data = json_loads(response.content)
+        status = data.get("status") or "generating"
+        # Soundraw reports lowercase states; only normalize unexpected ones
+        if status not in self._KNOWN_STATES:
+            status = status.lower()
+        
+        if status in self.DONE_STATES:
+            download_url = data.get("download_url") or data.get("audio_url")
+            if not download_url:
+                raise RuntimeError("Soundraw track is ready but has no download URL")
+            return download_url, None
+        
+        elif status in self.FAILED_STATES:
+            error_msg = data.get("error", "Unknown error")
+            raise RuntimeError(f"Generation failed: {error_msg}")
+        
+        logger.info(f"Poll #{poll_count}: Status = {status}")
+        return None, hinted_delay
+    
     def _download_audio(self, download_url: str, track_id: str) -> Path:
         """Download generated audio file."""
         
         try:
-            file_path = self.output_dir / f"soundraw_{track_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.wav"
+            file_path = self.output_dir / f"soundraw_{track_id}_{time.strftime('%Y%m%d_%H%M%S')}.wav"
             
-            urlretrieve(download_url, file_path)
+            # Stream to disk over a pooled connection so the full file is
+            # never held in memory
+            with self._download_session.get(download_url, stream=True, timeout=(5, 60)) as response:
+                response.raise_for_status()
+                response.raw.decode_content = True
+                with open(file_path, "wb") as f:
+                    shutil.copyfileobj(response.raw, f, length=self.DOWNLOAD_CHUNK_SIZE)
             
             logger.info(f"Audio saved to {file_path}")
             return file_path
@@ -309,7 +770,8 @@ class SoundrawMusicGenerator:
             "duration": 90,
             "instrumentation": "full orchestra with strings and brass",
             "tempo": 120,
-            "energy": 8
+            "energy": 8,
+            "use_cache": true
         }
         """
         
@@ -322,7 +784,8 @@ class SoundrawMusicGenerator:
                 tempo=input_data.get("tempo"),
                 energy=input_data.get("energy", 5),
                 polling_interval=input_data.get("polling_interval", 2),
-                max_wait_time=input_data.get("max_wait_time", 180)
+                max_wait_time=input_data.get("max_wait_time", 180),
+                use_cache=input_data.get("use_cache", True)
             )
             
             return {
@@ -371,6 +834,7 @@ def get_skill_info() -> Dict[str, Any]:
             "duration": "integer (10-600 seconds)",
             "instrumentation": "string (optional)",
             "tempo": "integer (optional, in BPM)",
-            "energy": "integer (1-10)"
+            "energy": "integer (1-10)",
+            "use_cache": "boolean (default true, reuse identical earlier generations)"
         }
     }
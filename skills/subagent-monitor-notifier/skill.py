@@ -18,14 +18,16 @@ Scheduling: APScheduler for cron-like job scheduling
 """
 
 import os
-import json
 import time
 import logging
 import threading
-from typing import Dict, Any, Optional, List, Set
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import Dict, Any, Optional, List, Tuple, Callable
 from datetime import datetime, timedelta
 from pathlib import Path
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from enum import Enum
 import hashlib
 
@@ -38,13 +40,19 @@ logger = logging.getLogger(__name__)
 
 # Add parent directory to path for shared utilities
 import sys
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+_REPO_ROOT = str(Path(__file__).parent.parent.parent)
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
 
 from shared.utils import (
     validate_string_input,
     get_secure_api_key,
     safe_log_api_call,
-    validate_theme
+    validate_theme,
+    json_loads,
+    json_dumps,
+    json_dumps_pretty,
+    build_http_session
 )
 
 try:
@@ -68,6 +76,14 @@ class AgentStatus(Enum):
     UNKNOWN = "unknown"
 
 
+# Statuses that are alerted at warning level and shown as failures
+_CRITICAL_STATUSES = frozenset({
+    AgentStatus.FAILED.value,
+    AgentStatus.TIMEOUT.value,
+    AgentStatus.CANCELLED.value
+})
+
+
 class NotificationChannel(Enum):
     """Supported notification channels"""
     LOG = "log"
@@ -78,7 +94,12 @@ class NotificationChannel(Enum):
     FILE = "file"
 
 
-@dataclass
+# Slotted records drop the per-instance __dict__ (Python 3.10+), which
+# adds up over a long status history
+_RECORD_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_RECORD_OPTIONS)
 class AgentStatusSnapshot:
     """Snapshot of an agent's status at a point in time"""
     agent_id: str
@@ -91,7 +112,7 @@ class AgentStatusSnapshot:
     session_id: Optional[str] = None
 
 
-@dataclass
+@dataclass(**_RECORD_OPTIONS)
 class StatusChange:
     """Record of a status change for an agent"""
     agent_id: str
@@ -102,6 +123,166 @@ class StatusChange:
     change_hash: Optional[str] = None
 
 
+_NOTIFICATION_TEMPLATE = (
+    "Agent Status Update\n"
+    "Agent ID: {agent_id}\n"
+    "Previous Status: {previous_status}\n"
+    "New Status: {new_status}\n"
+    "Timestamp: {timestamp}\n"
+    "Reason: {reason}\n"
+    "Details: {details}\n"
+    "Error: {error}\n"
+    "Progress: {progress}%"
+)
+
+
+# Keep-alive session for webhook and Slack posts, created on first use so
+# requests is only imported when an HTTP channel is configured
+_notify_session = None
+_notify_session_lock = threading.Lock()
+
+
+def _get_notify_session():
+    """Return the shared session used for HTTP notifications."""
+    global _notify_session
+    if _notify_session is None:
+        with _notify_session_lock:
+            if _notify_session is None:
+                _notify_session = build_http_session(
+                    headers={"Content-Type": "application/json"},
+                    pool_connections=4,
+                    pool_maxsize=32,
+                    retries=2,
+                    backoff_factor=0.2
+                )
+    return _notify_session
+
+
+def _snapshot_to_dict(snapshot: AgentStatusSnapshot) -> Dict[str, Any]:
+    """Same result as asdict(snapshot), with a shallow copy of details instead of a deepcopy."""
+    return {
+        "agent_id": snapshot.agent_id,
+        "agent_name": snapshot.agent_name,
+        "status": snapshot.status,
+        "timestamp": snapshot.timestamp,
+        "details": dict(snapshot.details),
+        "error_message": snapshot.error_message,
+        "completion_percentage": snapshot.completion_percentage,
+        "session_id": snapshot.session_id
+    }
+
+
+def _change_to_dict(change: StatusChange) -> Dict[str, Any]:
+    """Same result as asdict(change), without the generic field walk."""
+    return {
+        "agent_id": change.agent_id,
+        "previous_status": change.previous_status,
+        "new_status": change.new_status,
+        "timestamp": change.timestamp,
+        "reason": change.reason,
+        "change_hash": change.change_hash
+    }
+
+
+def _tail(items: deque, limit: int) -> list:
+    """Return the last limit items of a deque, oldest first."""
+    return list(islice(items, max(0, len(items) - limit), None))
+
+
+class _NotifyBatcher:
+    """
+    Collects HTTP notification payloads and posts them in batches.
+    
+    Payloads are grouped per (channel, url). A background thread flushes a
+    group once it holds max_batch_size payloads, or max_batch_delay seconds
+    after the first payload arrived, so a burst of status changes costs one
+    request per batch instead of one per change.
+    """
+    
+    def __init__(
+        self,
+        send: Callable[[str, str, List[Dict[str, Any]]], None],
+        max_batch_size: int = 50,
+        max_batch_delay: float = 0.1
+    ):
+        """
+        Args:
+            send: Called as send(channel, url, payloads) for every batch
+            max_batch_size: Payloads per request
+            max_batch_delay: Seconds a payload may wait for others to join it
+        """
+        self._send = send
+        self.max_batch_size = max_batch_size
+        self.max_batch_delay = max_batch_delay
+        
+        self._pending: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._has_items = threading.Event()
+        self._batch_full = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+    
+    def add(self, channel: str, url: str, payload: Dict[str, Any]) -> None:
+        """Queue a payload; the flusher thread is started on first use."""
+        with self._lock:
+            batch = self._pending.setdefault((channel, url), [])
+            batch.append(payload)
+            if self._thread is None:
+                self._start_locked()
+            self._has_items.set()
+            if len(batch) >= self.max_batch_size:
+                self._batch_full.set()
+    
+    def _start_locked(self) -> None:
+        """Start a flusher thread; the caller holds self._lock."""
+        self._thread = threading.Thread(
+            target=self._run, name="notify-batcher", daemon=True
+        )
+        self._thread.start()
+    
+    def _run(self) -> None:
+        while not self._stopped:
+            self._has_items.wait()
+            self._batch_full.wait(self.max_batch_delay)
+            self.flush()
+        
+        # Only the exiting thread re-arms the batcher, so a flusher that
+        # outlived close() never runs alongside its replacement
+        with self._lock:
+            self._thread = None
+            self._stopped = False
+            if self._pending:
+                self._start_locked()
+    
+    def flush(self) -> None:
+        """Send everything queued so far."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._has_items.clear()
+            self._batch_full.clear()
+        
+        for (channel, url), payloads in pending.items():
+            for start in range(0, len(payloads), self.max_batch_size):
+                try:
+                    self._send(channel, url, payloads[start:start + self.max_batch_size])
+                except Exception as e:
+                    logger.error("Failed to send %s notification batch: %s", channel, e)
+    
+    def close(self) -> None:
+        """Stop the flusher thread and send what is still queued."""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            self._stopped = True
+        self._has_items.set()
+        self._batch_full.set()
+        thread.join(timeout=self.max_batch_delay + 15)
+        if thread.is_alive():
+            logger.warning("Notification batcher is still sending; it stops after the current batch")
+        self.flush()
+
+
 class SubAgentMonitor:
     """
     Monitors sub-agent status and sends notifications.
@@ -118,6 +299,20 @@ class SubAgentMonitor:
     - Alert deduplication
     """
     
+    # Per-agent status changes kept for get_agent_status
+    MAX_STATUS_CHANGES = 1024
+    # Distinct transitions remembered for deduplication
+    MAX_ALERT_CACHE = 10000
+    # Notification channel -> handler method name
+    CHANNEL_HANDLERS = {
+        "log": "_notify_log",
+        "file": "_notify_file",
+        "email": "_notify_email",
+        "webhook": "_notify_webhook",
+        "slack": "_notify_slack",
+        "sms": "_notify_sms"
+    }
+    
     def __init__(
         self,
         poll_interval: int = 60,
@@ -138,26 +333,60 @@ class SubAgentMonitor:
         self.poll_interval = poll_interval
         self.retention_days = retention_days
         self.notification_channels = notification_channels or ["log"]
+        # Resolved once so each alert is a plain loop over bound methods;
+        # unknown channels are ignored
+        self._handlers = tuple(
+            (channel, getattr(self, self.CHANNEL_HANDLERS[channel.lower()]))
+            for channel in self.notification_channels
+            if channel.lower() in self.CHANNEL_HANDLERS
+        )
+        # With only the log channel, routine changes skip the full message
+        self._log_only = [channel.lower() for channel, _ in self._handlers] == ["log"]
         self.enable_scheduling = enable_scheduling and SCHEDULER_AVAILABLE
         
-        # State tracking
+        # State tracking; history holds at most retention_days worth of polls
+        self._history_cap = max(1, (retention_days * 86400) // max(1, poll_interval))
         self.agent_statuses: Dict[str, AgentStatusSnapshot] = {}
-        self.status_history: Dict[str, List[AgentStatusSnapshot]] = {}
-        self.status_changes: Dict[str, List[StatusChange]] = {}
+        self.status_history: Dict[str, "deque[AgentStatusSnapshot]"] = {}
+        self.status_changes: Dict[str, "deque[StatusChange]"] = {}
         self.last_poll_time: Dict[str, datetime] = {}
-        self.alert_cache: Set[str] = set()  # For deduplication
+        # For deduplication, least recently seen transitions are dropped first
+        self.alert_cache: "OrderedDict[Tuple[str, str, str], None]" = OrderedDict()
         self.polling_active = False
+        # Guards the state above while agents are polled concurrently
+        self._state_lock = threading.Lock()
+        self._poll_pool: Optional[ThreadPoolExecutor] = None
         
         # Storage
         self.storage_dir = Path(os.getenv("MONITOR_STORAGE_DIR", "./monitor_data"))
         self.storage_dir.mkdir(parents=True, exist_ok=True)
+        # agent_id -> ((mtime_ns, size), snapshot) of the last status file read
+        self._status_file_cache: Dict[str, Tuple[Tuple[int, int], AgentStatusSnapshot]] = {}
+        # alerts.log stays open while monitoring; see _notify_file
+        self._alert_fp = None
+        self._alert_lock = threading.Lock()
+        
+        # Webhook and Slack payloads are posted one per change unless
+        # NOTIFY_BATCH_SIZE > 1 opts in to batching
+        batch_size = int(os.getenv("NOTIFY_BATCH_SIZE", "1"))
+        self._batcher: Optional[_NotifyBatcher] = None
+        if batch_size > 1:
+            self._batcher = _NotifyBatcher(
+                self._post_notifications,
+                max_batch_size=batch_size,
+                max_batch_delay=int(os.getenv("NOTIFY_BATCH_MS", "100")) / 1000
+            )
         
         # Scheduler
         self.scheduler: Optional[BackgroundScheduler] = None
         if self.enable_scheduling:
-            self.scheduler = BackgroundScheduler()
+            # A poll that overruns its slot is not run twice, and missed
+            # runs collapse into one instead of firing back to back
+            self.scheduler = BackgroundScheduler(
+                job_defaults={"coalesce": True, "max_instances": 1}
+            )
         
-        logger.info(f"SubAgentMonitor initialized with poll_interval={poll_interval}s")
+        logger.info("SubAgentMonitor initialized with poll_interval=%ss", poll_interval)
     
     def start_monitoring(
         self,
@@ -175,7 +404,7 @@ class SubAgentMonitor:
             Monitoring configuration and status
         """
         
-        logger.info(f"Starting monitoring for agents: {agent_ids}")
+        logger.info("Starting monitoring for agents: %s", agent_ids)
         
         result = {
             "status": "monitoring_started",
@@ -195,8 +424,8 @@ class SubAgentMonitor:
                 timestamp=datetime.now().isoformat(),
                 details={}
             )
-            self.status_history[agent_id] = []
-            self.status_changes[agent_id] = []
+            self.status_history[agent_id] = deque(maxlen=self._history_cap)
+            self.status_changes[agent_id] = deque(maxlen=self.MAX_STATUS_CHANGES)
         
         # Schedule monitoring job if requested
         if schedule_pattern and self.scheduler and not self.polling_active:
@@ -230,12 +459,12 @@ class SubAgentMonitor:
                 )
                 result["scheduling_error"] = str(e)
         
+        self.polling_active = True
+        
         # Perform initial poll
         changes = self._poll_agents(agent_ids)
         result["initial_poll_changes"] = len(changes)
         
-        self.polling_active = True
-        
         return result
     
     def _poll_agents(self, agent_ids: List[str]) -> List[StatusChange]:
@@ -246,13 +475,42 @@ class SubAgentMonitor:
         or any available status source.
         """
         
-        changes: List[StatusChange] = []
+        # Scheduled runs that fire after stop_monitoring() have nothing to do
+        if not self.polling_active or not agent_ids:
+            return []
         
-        for agent_id in agent_ids:
-            try:
-                # Simulate fetching agent status (in real implementation,
-                # would fetch from session_history, job queue, etc.)
-                current_status = self._fetch_agent_status(agent_id)
+        status_files = self._scan_status_files()
+        # One clock reading per poll cycle, shared by all agents
+        now = datetime.now()
+        
+        # Agents are polled concurrently so slow status sources and
+        # notification channels overlap instead of adding up
+        if len(agent_ids) > 1:
+            results = self._get_poll_pool().map(
+                lambda agent_id: self._poll_one(agent_id, status_files, now), agent_ids
+            )
+        else:
+            results = (self._poll_one(agent_id, status_files, now) for agent_id in agent_ids)
+        
+        changes = [change for change in results if change is not None]
+        self._flush_alert_file()
+        return changes
+    
+    def _poll_one(
+        self,
+        agent_id: str,
+        status_files: Dict[str, os.DirEntry],
+        now: datetime
+    ) -> Optional[StatusChange]:
+        """Poll a single agent and notify on a new status change, which is returned."""
+        
+        try:
+            # Simulate fetching agent status (in real implementation,
+            # would fetch from session_history, job queue, etc.)
+            current_status = self._fetch_agent_status(agent_id, status_files)
+            new_change: Optional[StatusChange] = None
+            
+            with self._state_lock:
                 previous_status = self.agent_statuses.get(agent_id)
                 
                 # Check for status change
@@ -261,39 +519,68 @@ class SubAgentMonitor:
                         agent_id=agent_id,
                         previous_status=previous_status.status,
                         new_status=current_status.status,
-                        timestamp=datetime.now().isoformat(),
+                        timestamp=now.isoformat(),
                         reason=f"Status change detected: {previous_status.status} → {current_status.status}"
                     )
                     
-                    # Calculate change hash for deduplication
-                    change_str = f"{agent_id}:{change.previous_status}:{change.new_status}"
-                    change.change_hash = hashlib.md5(change_str.encode()).hexdigest()
-                    
                     # Check if this is a duplicate alert
-                    if change.change_hash not in self.alert_cache:
+                    alert_key = (agent_id, change.previous_status, change.new_status)
+                    if alert_key in self.alert_cache:
+                        self.alert_cache.move_to_end(alert_key)
+                    else:
+                        # Stable ID for consumers of the change record
+                        change.change_hash = hashlib.md5(":".join(alert_key).encode()).hexdigest()
                         self.status_changes[agent_id].append(change)
-                        changes.append(change)
-                        self.alert_cache.add(change.change_hash)
-                        
-                        # Send notifications
-                        self._send_notifications(change, current_status)
+                        self.alert_cache[alert_key] = None
+                        if len(self.alert_cache) > self.MAX_ALERT_CACHE:
+                            self.alert_cache.popitem(last=False)
+                        new_change = change
                 
                 # Update status
                 self.agent_statuses[agent_id] = current_status
                 self.status_history[agent_id].append(current_status)
-                self.last_poll_time[agent_id] = datetime.now()
-                
-            except Exception as e:
-                safe_log_api_call(
-                    "SubAgentMonitor",
-                    "poll_agents",
-                    "error",
-                    {"agent_id": agent_id, "error": str(e), "error_type": type(e).__name__}
-                )
+                self.last_poll_time[agent_id] = now
+            
+            # Send notifications
+            if new_change is not None:
+                self._send_notifications(new_change, current_status)
+            return new_change
+            
+        except Exception as e:
+            safe_log_api_call(
+                "SubAgentMonitor",
+                "poll_agents",
+                "error",
+                {"agent_id": agent_id, "error": str(e), "error_type": type(e).__name__}
+            )
+            return None
+    
+    def _get_poll_pool(self) -> ThreadPoolExecutor:
+        """Return the polling pool, sized by MONITOR_POLL_WORKERS."""
+        if self._poll_pool is None:
+            with self._state_lock:
+                if self._poll_pool is None:
+                    self._poll_pool = ThreadPoolExecutor(
+                        max_workers=int(os.getenv("MONITOR_POLL_WORKERS", "16")),
+                        thread_name_prefix="monitor-poll"
+                    )
+        return self._poll_pool
+    
+    def _scan_status_files(self) -> Dict[str, os.DirEntry]:
+        """List the status files in storage_dir with one directory scan."""
         
-        return changes
+        try:
+            with os.scandir(self.storage_dir) as entries:
+                return {e.name: e for e in entries if e.name.endswith("_status.json")}
+        except OSError as e:
+            logger.warning("Failed to scan status directory: %s", e)
+            return {}
     
-    def _fetch_agent_status(self, agent_id: str) -> AgentStatusSnapshot:
+    def _fetch_agent_status(
+        self,
+        agent_id: str,
+        status_files: Optional[Dict[str, os.DirEntry]] = None
+    ) -> AgentStatusSnapshot:
         """
         Fetch current status of an agent.
         
@@ -302,18 +589,38 @@ class SubAgentMonitor:
         - Check job queue status
         - Poll agent process status
         - Read from status files
+        
+        Args:
+            agent_id: Agent to fetch
+            status_files: Result of _scan_status_files for this poll; when
+                omitted the agent's status file is looked up directly
         """
         
         # Placeholder implementation that reads from status file if available
-        status_file = self.storage_dir / f"{agent_id}_status.json"
+        file_name = f"{agent_id}_status.json"
+        if status_files is None:
+            status_file = self.storage_dir / file_name
+            status_path = str(status_file) if status_file.exists() else None
+        else:
+            entry = status_files.get(file_name)
+            status_path = entry.path if entry is not None else None
         
-        if status_file.exists():
+        if status_path is not None:
             try:
-                with open(status_file, 'r') as f:
-                    data = json.load(f)
-                return AgentStatusSnapshot(**data)
+                # Unchanged files are not read and parsed again
+                stat = os.stat(status_path)
+                signature = (stat.st_mtime_ns, stat.st_size)
+                cached = self._status_file_cache.get(agent_id)
+                if cached is not None and cached[0] == signature:
+                    return cached[1]
+                
+                with open(status_path, 'rb') as f:
+                    data = json_loads(f.read())
+                snapshot = AgentStatusSnapshot(**data)
+                self._status_file_cache[agent_id] = (signature, snapshot)
+                return snapshot
             except Exception as e:
-                logger.warning(f"Failed to read status file for {agent_id}: {e}")
+                logger.warning("Failed to read status file for %s: %s", agent_id, e)
         
         # Return current known status or unknown
         if agent_id in self.agent_statuses:
@@ -334,25 +641,20 @@ class SubAgentMonitor:
     ) -> None:
         """Send notifications through configured channels"""
         
+        if self._log_only and change.new_status not in _CRITICAL_STATUSES:
+            logger.info(
+                "ALERT: Agent %s status changed: %s → %s",
+                change.agent_id, change.previous_status, change.new_status
+            )
+            return
+        
         notification_message = self._format_notification(change, current_status)
         
-        for channel in self.notification_channels:
+        for channel, handler in self._handlers:
             try:
-                if channel.lower() == "log":
-                    self._notify_log(notification_message, change)
-                elif channel.lower() == "file":
-                    self._notify_file(notification_message, change)
-                elif channel.lower() == "email":
-                    self._notify_email(notification_message, change)
-                elif channel.lower() == "webhook":
-                    self._notify_webhook(notification_message, change)
-                elif channel.lower() == "slack":
-                    self._notify_slack(notification_message, change)
-                elif channel.lower() == "sms":
-                    self._notify_sms(notification_message, change)
-                    
+                handler(notification_message, change)
             except Exception as e:
-                logger.error(f"Failed to send {channel} notification: {str(e)}")
+                logger.error("Failed to send %s notification: %s", channel, e)
     
     def _format_notification(
         self,
@@ -361,29 +663,43 @@ class SubAgentMonitor:
     ) -> str:
         """Format notification message"""
         
-        return f"""
-Agent Status Update
-Agent ID: {change.agent_id}
-Previous Status: {change.previous_status}
-New Status: {change.new_status}
-Timestamp: {change.timestamp}
-Reason: {change.reason}
-Details: {json.dumps(status.details, indent=2) if status.details else 'None'}
-Error: {status.error_message or 'None'}
-Progress: {status.completion_percentage}%
-        """.strip()
+        return _NOTIFICATION_TEMPLATE.format_map({
+            "agent_id": change.agent_id,
+            "previous_status": change.previous_status,
+            "new_status": change.new_status,
+            "timestamp": change.timestamp,
+            "reason": change.reason,
+            "details": json_dumps_pretty(status.details) if status.details else "None",
+            "error": status.error_message or "None",
+            "progress": status.completion_percentage
+        })
     
     def _notify_log(self, message: str, change: StatusChange) -> None:
         """Send notification via logging"""
-        log_level = "WARNING" if change.new_status in ["FAILED", "TIMEOUT"] else "INFO"
-        getattr(logger, log_level.lower())(f"ALERT: {message}")
+        log = logger.warning if change.new_status in _CRITICAL_STATUSES else logger.info
+        log("ALERT: %s", message)
     
     def _notify_file(self, message: str, change: StatusChange) -> None:
         """Send notification via file"""
-        alert_file = self.storage_dir / "alerts.log"
-        with open(alert_file, 'a') as f:
-            f.write(f"{datetime.now().isoformat()} - {change.agent_id}\n")
-            f.write(message + "\n\n")
+        entry = f"{datetime.now().isoformat()} - {change.agent_id}\n{message}\n\n"
+        # Buffered in one open handle; _poll_agents flushes after each cycle
+        with self._alert_lock:
+            if self._alert_fp is None:
+                self._alert_fp = open(self.storage_dir / "alerts.log", 'a', buffering=64 * 1024)
+            self._alert_fp.write(entry)
+    
+    def _flush_alert_file(self, close: bool = False) -> None:
+        """Flush buffered file alerts to disk, optionally closing the handle."""
+        with self._alert_lock:
+            if self._alert_fp is None:
+                return
+            try:
+                self._alert_fp.flush()
+            except OSError as e:
+                logger.error("Failed to write alert file: %s", e)
+            if close:
+                self._alert_fp.close()
+                self._alert_fp = None
     
     def _notify_email(self, message: str, change: StatusChange) -> None:
         """Send notification via email"""
@@ -400,7 +716,7 @@ Progress: {status.completion_percentage}%
             else:
                 logger.debug("Email notifications disabled: NOTIFICATION_EMAIL_CONFIG not set")
         except Exception as e:
-            logger.error(f"Email notification failed: {e}")
+            logger.error("Email notification failed: %s", e)
     
     def _notify_webhook(self, message: str, change: StatusChange) -> None:
         """Send notification via webhook"""
@@ -416,8 +732,6 @@ Progress: {status.completion_percentage}%
                 logger.error("Invalid webhook URL format (must be HTTP/HTTPS)")
                 return
             
-            import requests
-            
             payload = {
                 "agent_id": change.agent_id,
                 "previous_status": change.previous_status,
@@ -434,14 +748,7 @@ Progress: {status.completion_percentage}%
                 {"agent_id": change.agent_id, "status": change.new_status}
             )
             
-            requests.post(webhook_url, json=payload, timeout=10)
-            
-            safe_log_api_call(
-                "SubAgentMonitor",
-                "notify_webhook",
-                "success",
-                {"agent_id": change.agent_id}
-            )
+            self._queue_notification("webhook", webhook_url, payload)
             
         except Exception as e:
             safe_log_api_call(
@@ -464,9 +771,7 @@ Progress: {status.completion_percentage}%
                 logger.error("Invalid Slack webhook URL format (must be HTTP/HTTPS)")
                 return
             
-            import requests
-            
-            color = "danger" if change.new_status in ["failed", "timeout"] else "good"
+            color = "danger" if change.new_status in _CRITICAL_STATUSES else "good"
             payload = {
                 "attachments": [{
                     "color": color,
@@ -484,21 +789,62 @@ Progress: {status.completion_percentage}%
                 {"agent_id": change.agent_id, "status": change.new_status}
             )
             
-            requests.post(slack_webhook, json=payload, timeout=10)
+            self._queue_notification("slack", slack_webhook, payload)
             
+        except Exception as e:
             safe_log_api_call(
                 "SubAgentMonitor",
                 "notify_slack",
+                "error",
+                {"error": str(e), "error_type": type(e).__name__}
+            )
+    
+    def _queue_notification(self, channel: str, url: str, payload: Dict[str, Any]) -> None:
+        """Hand a webhook or Slack payload to the batcher, or post it right away."""
+        if self._batcher is not None:
+            self._batcher.add(channel, url, payload)
+        else:
+            self._post_notifications(channel, url, [payload])
+    
+    def _post_notifications(
+        self,
+        channel: str,
+        url: str,
+        payloads: List[Dict[str, Any]]
+    ) -> None:
+        """
+        POST one or more payloads to a webhook or Slack URL in a single request.
+        
+        With batching enabled a webhook always receives {"events": [...]},
+        even for a single change, so receivers see one shape; otherwise it
+        receives the bare payload. For Slack the attachments are merged into
+        one message.
+        """
+        operation = f"notify_{channel}"
+        if channel == "slack":
+            body = {"attachments": [a for p in payloads for a in p["attachments"]]}
+        elif self._batcher is None:
+            body = payloads[0]
+        else:
+            body = {"events": payloads}
+        
+        try:
+            # Encoded once with orjson when available; the session already
+            # sends Content-Type: application/json
+            response = _get_notify_session().post(url, data=json_dumps(body), timeout=(3, 10))
+            response.raise_for_status()
+            safe_log_api_call(
+                "SubAgentMonitor",
+                operation,
                 "success",
-                {"agent_id": change.agent_id}
+                {"events": len(payloads)}
             )
-            
         except Exception as e:
             safe_log_api_call(
                 "SubAgentMonitor",
-                "notify_slack",
+                operation,
                 "error",
-                {"error": str(e), "error_type": type(e).__name__}
+                {"events": len(payloads), "error": str(e), "error_type": type(e).__name__}
             )
     
     def _notify_sms(self, message: str, change: StatusChange) -> None:
@@ -519,7 +865,7 @@ Progress: {status.completion_percentage}%
             )
             
             # Placeholder for SMS implementation
-            logger.info(f"SMS notification queued for agent {change.agent_id}")
+            logger.info("SMS notification queued for agent %s", change.agent_id)
             
         except Exception as e:
             safe_log_api_call(
@@ -547,7 +893,7 @@ Progress: {status.completion_percentage}%
             "details": snapshot.details,
             "error": snapshot.error_message,
             "progress": snapshot.completion_percentage,
-            "recent_changes": [asdict(c) for c in self.status_changes[agent_id][-5:]]
+            "recent_changes": [_change_to_dict(c) for c in _tail(self.status_changes[agent_id], 5)]
         }
     
     def get_status_history(
@@ -560,18 +906,29 @@ Progress: {status.completion_percentage}%
         if agent_id not in self.status_history:
             return []
         
-        return [asdict(s) for s in self.status_history[agent_id][-limit:]]
+        return [_snapshot_to_dict(s) for s in _tail(self.status_history[agent_id], limit)]
     
     def stop_monitoring(self, agent_id: Optional[str] = None) -> Dict[str, Any]:
         """Stop monitoring an agent or all agents"""
         
         if self.scheduler and self.scheduler.running:
             if agent_id:
-                logger.info(f"Stopping monitoring for agent: {agent_id}")
+                logger.info("Stopping monitoring for agent: %s", agent_id)
             else:
                 logger.info("Stopping all monitoring")
+                # Drop the job first so no further runs are submitted
+                if self.scheduler.get_job("agent_monitor_cron") is not None:
+                    self.scheduler.remove_job("agent_monitor_cron")
                 self.scheduler.shutdown()
-                self.polling_active = False
+        
+        if agent_id is None:
+            self.polling_active = False
+            if self._poll_pool is not None:
+                self._poll_pool.shutdown(wait=False)
+                self._poll_pool = None
+            if self._batcher is not None:
+                self._batcher.close()
+            self._flush_alert_file(close=True)
         
         return {
             "status": "monitoring_stopped",
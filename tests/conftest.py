@@ -0,0 +1,11 @@
+"""
+Shared pytest setup for the OpenClaw skills
+"""
+
+import sys
+from pathlib import Path
+
+# Make the shared package importable however pytest is invoked
+_REPO_ROOT = str(Path(__file__).parent.parent)
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
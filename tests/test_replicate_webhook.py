@@ -0,0 +1,83 @@
+"""
+Tests for Replicate webhook signature verification
+"""
+
+import base64
+import hashlib
+import hmac
+import importlib.util
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("requests")
+
+_SKILL_PATH = Path(__file__).parent.parent / "skills" / "replicate-music-generator" / "skill.py"
+_spec = importlib.util.spec_from_file_location("replicate_skill", _SKILL_PATH)
+replicate_skill = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(replicate_skill)
+
+_KEY = b"test-signing-key"
+_SECRET = "whsec_" + base64.b64encode(_KEY).decode()
+_BODY = b'{"id": "abc123", "status": "succeeded"}'
+
+
+@pytest.fixture
+def generator():
+    # Skip __init__: verification only needs the signing secret, not an API client
+    gen = replicate_skill.ReplicateMusicGenerator.__new__(replicate_skill.ReplicateMusicGenerator)
+    gen._webhook_secret = _SECRET
+    return gen
+
+
+def _sign(body: bytes, webhook_id: str = "msg_1", timestamp=None, key: bytes = _KEY) -> dict:
+    timestamp = str(int(time.time()) if timestamp is None else timestamp)
+    signed = f"{webhook_id}.{timestamp}.".encode() + body
+    signature = base64.b64encode(hmac.new(key, signed, hashlib.sha256).digest()).decode()
+    return {
+        "webhook-id": webhook_id,
+        "webhook-timestamp": timestamp,
+        "webhook-signature": f"v1,{signature}",
+    }
+
+
+def test_accepts_valid_signature(generator):
+    assert generator._verify_webhook(_BODY, _sign(_BODY))
+
+
+def test_accepts_any_matching_signature_and_header_case(generator):
+    headers = _sign(_BODY)
+    headers = {
+        "Webhook-Id": headers["webhook-id"],
+        "Webhook-Timestamp": headers["webhook-timestamp"],
+        "Webhook-Signature": "v1,bm90LXRoaXMtb25l " + headers["webhook-signature"],
+    }
+    assert generator._verify_webhook(_BODY, headers)
+
+
+def test_rejects_tampered_body(generator):
+    headers = _sign(_BODY)
+    assert not generator._verify_webhook(_BODY.replace(b"succeeded", b"failed"), headers)
+
+
+def test_rejects_wrong_key(generator):
+    assert not generator._verify_webhook(_BODY, _sign(_BODY, key=b"other-key"))
+
+
+def test_rejects_stale_timestamp(generator):
+    stale = int(time.time()) - replicate_skill.ReplicateMusicGenerator.WEBHOOK_TOLERANCE - 60
+    assert not generator._verify_webhook(_BODY, _sign(_BODY, timestamp=stale))
+
+
+@pytest.mark.parametrize("missing", ["webhook-id", "webhook-timestamp", "webhook-signature"])
+def test_rejects_missing_headers(generator, missing):
+    headers = _sign(_BODY)
+    del headers[missing]
+    assert not generator._verify_webhook(_BODY, headers)
+
+
+def test_rejects_malformed_timestamp(generator):
+    headers = _sign(_BODY)
+    headers["webhook-timestamp"] = "yesterday"
+    assert not generator._verify_webhook(_BODY, headers)
@@ -0,0 +1,323 @@
+"""
+Tests for the shared utilities
+"""
+
+import re
+import asyncio
+import types
+
+import pytest
+
+from shared import utils
+from shared.utils import (
+    CircuitBreaker,
+    CircuitOpenError,
+    MusicCache,
+    TokenBucket,
+    ValidationError,
+    run_coroutine_sync,
+    validate_string_input,
+    validate_theme,
+)
+
+
+class FakeClock:
+    """Stands in for the time module so timing-dependent code runs instantly"""
+    
+    def __init__(self, start: float = 1000.0):
+        self.now = start
+        self.sleeps = []
+    
+    def monotonic(self) -> float:
+        return self.now
+    
+    def time(self) -> float:
+        return self.now
+    
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(utils, "time", types.SimpleNamespace(
+        monotonic=fake.monotonic, time=fake.time, sleep=fake.sleep
+    ))
+    return fake
+
+
+# ============================================================================
+# CIRCUIT BREAKER
+# ============================================================================
+
+def _fail():
+    raise ConnectionError("down")
+
+
+def test_breaker_opens_after_fail_max(clock):
+    breaker = CircuitBreaker("test", fail_max=3, reset_timeout=30)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            breaker.call(_fail)
+    assert breaker.state == CircuitBreaker.CLOSED
+    
+    with pytest.raises(ConnectionError):
+        breaker.call(_fail)
+    assert breaker.state == CircuitBreaker.OPEN
+    
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        breaker.call(calls.append, 1)
+    assert calls == []
+
+
+def test_breaker_success_resets_failure_count(clock):
+    breaker = CircuitBreaker("test", fail_max=2)
+    with pytest.raises(ConnectionError):
+        breaker.call(_fail)
+    assert breaker.call(lambda: "ok") == "ok"
+    with pytest.raises(ConnectionError):
+        breaker.call(_fail)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_half_open_allows_single_trial(clock):
+    breaker = CircuitBreaker("test", fail_max=1, reset_timeout=30)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    
+    clock.now += 30
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_call()
+    # Only one trial call while half-open
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+
+def test_breaker_failed_trial_reopens(clock):
+    breaker = CircuitBreaker("test", fail_max=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    
+    with pytest.raises(ConnectionError):
+        breaker.call(_fail)
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += 29
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_breaker_ignores_exceptions_outside_failure_types(clock):
+    breaker = CircuitBreaker("test", fail_max=1, failure_types=(ConnectionError,))
+    
+    def bad_request():
+        raise ValueError("rejected")
+    
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            breaker.call(bad_request)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+# ============================================================================
+# TOKEN BUCKET
+# ============================================================================
+
+def test_bucket_allows_burst_then_waits(clock):
+    bucket = TokenBucket(max_rate=3, time_period=3)
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert clock.sleeps == []
+    
+    assert bucket.acquire() == pytest.approx(1.0)
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+
+def test_bucket_refills_over_time(clock):
+    bucket = TokenBucket(max_rate=2, time_period=2)
+    bucket.acquire()
+    bucket.acquire()
+    
+    clock.now += 1
+    assert bucket.acquire() == 0.0
+    
+    # Refill never exceeds capacity
+    clock.now += 100
+    assert [bucket.acquire() for _ in range(2)] == [0.0, 0.0]
+    assert bucket.acquire() > 0
+
+
+def test_bucket_rejects_invalid_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(max_rate=0)
+
+
+# ============================================================================
+# MUSIC CACHE
+# ============================================================================
+
+@pytest.fixture
+def audio_file(tmp_path):
+    path = tmp_path / "track.mp3"
+    path.write_bytes(b"ID3")
+    return path
+
+
+def test_cache_roundtrip_and_persistence(tmp_path, audio_file):
+    db = tmp_path / MusicCache.DEFAULT_FILENAME
+    key = MusicCache.make_key(prompt="calm piano", duration=30)
+    assert key == MusicCache.make_key(duration=30, prompt="calm piano")
+    
+    cache = MusicCache(db)
+    assert cache.get(key) is None
+    cache.put(key, audio_file, {"id": "abc"})
+    assert cache.get(key) == (audio_file, {"id": "abc"})
+    cache.close()
+    
+    # A fresh instance reads the entry back from SQLite
+    reopened = MusicCache(db)
+    assert reopened.get(key) == (audio_file, {"id": "abc"})
+    reopened.close()
+
+
+def test_cache_entries_expire(clock, tmp_path, audio_file):
+    db = tmp_path / MusicCache.DEFAULT_FILENAME
+    cache = MusicCache(db, ttl_seconds=60)
+    cache.put("k", audio_file, {})
+    
+    clock.now += 60
+    assert cache.get("k") is not None
+    clock.now += 1
+    assert cache.get("k") is None
+    cache.close()
+    
+    # Expired entries are deleted, not just skipped
+    clock.now -= 61
+    reopened = MusicCache(db, ttl_seconds=60)
+    assert reopened.get("k") is None
+    reopened.close()
+
+
+def test_cache_drops_entries_whose_file_is_gone(tmp_path, audio_file):
+    cache = MusicCache(tmp_path / MusicCache.DEFAULT_FILENAME)
+    cache.put("k", audio_file, {})
+    audio_file.unlink()
+    assert cache.get("k") is None
+    
+    audio_file.write_bytes(b"ID3")
+    assert cache.get("k") is None
+    cache.close()
+
+
+def test_cache_memory_lru_is_bounded(tmp_path, audio_file):
+    cache = MusicCache(tmp_path / MusicCache.DEFAULT_FILENAME, max_memory_entries=2)
+    cache.put("a", audio_file, {})
+    cache.put("b", audio_file, {})
+    cache.get("a")
+    cache.put("c", audio_file, {})
+    assert list(cache._memory) == ["a", "c"]
+    
+    # Evicted entries are still served from SQLite
+    assert cache.get("b") == (audio_file, {})
+    assert list(cache._memory) == ["c", "b"]
+    cache.close()
+
+
+# ============================================================================
+# COROUTINES
+# ============================================================================
+
+async def _double(value):
+    await asyncio.sleep(0)
+    return value * 2
+
+
+def test_run_coroutine_sync_without_loop():
+    assert run_coroutine_sync(_double(21)) == 42
+
+
+def test_run_coroutine_sync_inside_running_loop():
+    async def host():
+        return run_coroutine_sync(_double(4))
+    
+    assert asyncio.run(host()) == 8
+
+
+# ============================================================================
+# VALIDATORS
+# ============================================================================
+
+def _baseline_validate(value, min_length, max_length, allowed_chars):
+    """The original regex-per-call validator the fast paths must agree with"""
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    if len(value) < min_length or len(value) > max_length:
+        return None
+    if allowed_chars and not re.match(f"^[{allowed_chars}]+$", value):
+        return None
+    return value
+
+
+def _current_validate(value, min_length, max_length, allowed_chars):
+    try:
+        return validate_string_input(value, "field", min_length=min_length,
+                                     max_length=max_length, allowed_chars=allowed_chars)
+    except ValidationError:
+        return None
+
+
+# Every character covered by the translation tables, plus a few beyond them
+_CODE_POINTS = list(range(utils._TABLE_LIMIT)) + [0x3001, 0xFEFF, 0xFF10, 0x1F3B5]
+
+
+@pytest.mark.parametrize("allowed_chars", [utils._THEME_CHARS, utils._OAUTH_CHARS])
+def test_fast_tables_match_regex_for_every_character(allowed_chars):
+    mismatches = [
+        hex(c) for c in _CODE_POINTS
+        if _current_validate(f"ab{chr(c)}cd", 1, 1000, allowed_chars)
+        != _baseline_validate(f"ab{chr(c)}cd", 1, 1000, allowed_chars)
+    ]
+    assert mismatches == []
+
+
+@pytest.mark.parametrize("value", [
+    "epic orchestral",
+    "  lo-fi, chill_beats.  ",
+    "ab",
+    "x" * 501,
+    "rock & roll",
+    "jazz night",
+    "café",
+    "",
+    "   ",
+    42,
+])
+def test_validate_theme_matches_baseline(value):
+    expected = _baseline_validate(value, 3, 500, utils._THEME_CHARS)
+    if expected is None:
+        with pytest.raises(ValidationError):
+            validate_theme(value)
+    else:
+        assert validate_theme(value) == expected
+        # A second, memoized call gives the same answer
+        assert validate_theme(value) == expected
+
+
+@pytest.mark.parametrize("allowed_chars", [r"a-z", r"0-9a-f", r"\w\s"])
+@pytest.mark.parametrize("value", ["abc", "DEADbeef", "under_score here", "12 34", "ok!"])
+def test_custom_character_classes_match_baseline(allowed_chars, value):
+    assert (_current_validate(value, 1, 100, allowed_chars)
+            == _baseline_validate(value, 1, 100, allowed_chars))
+
+
+def test_compiled_pattern_takes_precedence():
+    pattern = re.compile(r"^[0-9]+$")
+    assert validate_string_input("123", "n", allowed_chars="a-z", compiled_pattern=pattern) == "123"
+    with pytest.raises(ValidationError):
+        validate_string_input("abc", "n", allowed_chars="a-z", compiled_pattern=pattern)